@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 21:12:40
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 21:12:40
+
+### allocations of the error arrays of the error-bar plots
+#   errors of 1000 series, as 2xN arrays, (N, 2) arrays, records with two fields or symmetric values,
+#   compared with the previous handling (np.array then np.vstack of the lower and upper errors)
+
+import tracemalloc
+
+import numpy as np
+
+from plotting.CommonInternal import _error_array
+
+N_SERIES = 1000
+N_POINTS = [10**3, 10**5]
+LAYOUTS = ['2xN', 'Nx2', 'records', 'symmetric']
+
+def _copied_errors(err, xvals):
+    """
+    Previous handling of the errors of one series (only right for (lower, upper) inputs)
+    """
+
+    err = np.array(err)
+    return np.vstack([err[0], err[1]])
+
+class ErrorArrays:
+    """
+    Errors of N_SERIES series prepared for errorbar
+        the series share one input array, so that only the preparation allocates memory
+    """
+
+    params = [N_POINTS, LAYOUTS, ['copy', 'view']]
+    param_names = ['n_points', 'layout', 'method']
+    timeout = 600
+
+    def setup(self, n_points, layout, method):
+
+        if (method == 'copy') and (layout != '2xN'):
+            raise NotImplementedError(f'{layout} errors were not supported before')
+
+        rng = np.random.default_rng(0)
+        lower, upper = rng.uniform(0.01, 0.1, (2, n_points))
+        if layout == '2xN':
+            err = np.vstack([lower, upper])
+        elif layout == 'Nx2':
+            err = np.column_stack([lower, upper])
+        elif layout == 'records':
+            err = np.empty(n_points, dtype=[('lower', np.float64), ('upper', np.float64)])
+            err['lower'], err['upper'] = lower, upper
+        else:
+            err = upper
+
+        self.xval = np.arange(n_points, dtype=np.float64)
+        self.errs = [err] * N_SERIES
+        self.prepare = _copied_errors if method == 'copy' else _error_array
+
+    def time_prepare(self, n_points, layout, method):
+
+        for err in self.errs:
+            self.prepare(err, self.xval)
+
+    def track_allocated_bytes(self, n_points, layout, method):
+        """
+        Bytes allocated while preparing all the series (summed over the series)
+        """
+
+        tracemalloc.start()
+        try:
+            allocated = 0
+            for err in self.errs:
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                self.prepare(err, self.xval)
+                allocated += tracemalloc.get_traced_memory()[1] - current
+        finally:
+            tracemalloc.stop()
+
+        return allocated
+
+    track_allocated_bytes.unit = 'bytes'
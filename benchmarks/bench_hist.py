@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 20:21:10
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 20:21:10
+
+### benchmarks of HistPlot
+
+from plotting import HistPlotFunc, Hist2DPlotFunc, HistPlotFunc_subplots, Hist2DPlotFunc_subplots
+
+from .common import _RenderBenchmark
+from .catalogues import make_catalogue_file
+
+class HistPlot(_RenderBenchmark):
+    """
+    Two weighted magnitude histograms
+    """
+
+    def render(self):
+        cat = self.cat
+        HistPlotFunc(self.outpath, [cat['mag'], cat['mag']], [cat['weight'], None], ['r', 'b'], ['weighted', 'raw'],
+                    61, [17, 25], XLABEL='mag', YLABEL='N', TIGHT=True)
+
+class HistPlotFileColumn(_RenderBenchmark):
+    """
+    Weighted magnitude histogram binned from the columns of a .npy table on disk
+        (memory-mapped and binned chunk by chunk, the peak memory does not grow with the table)
+    """
+
+    def prepare(self, n_points):
+        self.path = make_catalogue_file(n_points)
+
+    def render(self):
+        HistPlotFunc(self.outpath, [(self.path, 'mag')], [(self.path, 'weight')], ['r'], ['weighted'],
+                    61, [17, 25], XLABEL='mag', YLABEL='N', TIGHT=True)
+
+class Hist2DPlot(_RenderBenchmark):
+    """
+    Weighted magnitude-redshift histogram
+    """
+
+    def render(self):
+        cat = self.cat
+        Hist2DPlotFunc(self.outpath, cat['mag'], cat['z'], cat['weight'], 100, [17, 25], [0, 3],
+                    XLABEL='mag', YLABEL='z', CBAR_LABEL='N', TIGHT=True)
+
+class HistPlotSubplots(_RenderBenchmark):
+    """
+    Four panels of two histograms (the points are split between the panels)
+    """
+
+    def prepare(self, n_points):
+        n_split = n_points // 8
+        self.paras_list = [[self.cat[col][i*2*n_split:(i*2+1)*n_split], self.cat[col][(i*2+1)*n_split:(i*2+2)*n_split]]
+                            for i, col in enumerate(['e1', 'e2', 'e1', 'e2'])]
+
+    def render(self):
+        HistPlotFunc_subplots(self.outpath, 4, self.paras_list, None, [['r', 'b']]*4, [['a', 'b']]*4,
+                    [41]*4, [-1, 1], subLABEL_list=['a', 'b', 'c', 'd'], XLABEL='e', YLABEL='N')
+
+class Hist2DPlotSubplots(_RenderBenchmark):
+    """
+    Three panels of magnitude-size histograms (the points are split between the panels)
+    """
+
+    def prepare(self, n_points):
+        n_split = n_points // 3
+        self.x_list = [self.cat['mag'][i*n_split:(i+1)*n_split] for i in range(3)]
+        self.y_list = [self.cat['size'][i*n_split:(i+1)*n_split] for i in range(3)]
+
+    def render(self):
+        Hist2DPlotFunc_subplots(self.outpath, 3, self.x_list, self.y_list, None, [60]*3, [17, 25], [0, 2],
+                    subLABEL_list=['a', 'b', 'c'], XLABEL='mag', YLABEL='size', CBAR_LABEL='N')
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 20:21:10
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 20:21:10
+
+### benchmarks of HistLinePlot
+
+from plotting import HistErrorPlotFunc, HistTwinxErrorPlotFunc
+
+from .common import _RenderBenchmark
+from .catalogues import binned_series
+
+class HistErrorPlot(_RenderBenchmark):
+    """
+    Redshift histogram with the mean ellipticity in redshift bins
+    """
+
+    def prepare(self, n_points):
+        self.series = binned_series(self.cat['z'][:10**6], self.cat['e1'][:10**6], 20, [0, 3])
+
+    def render(self):
+        z_bins, e_mean, e_err = self.series
+        HistErrorPlotFunc(self.outpath, [self.cat['z']], [self.cat['weight']], ['gray'], [z_bins], [e_mean], ['r'],
+                    yerrs_error=[e_err], XRANGE=[0, 3], XLABEL='z', YLABEL_hist='N', YLABEL_error='e1')
+
+class HistTwinxErrorPlot(_RenderBenchmark):
+    """
+    Redshift histogram with the mean ellipticities (left) and sizes (right) in redshift bins
+    """
+
+    def prepare(self, n_points):
+        z, e1, size = (self.cat[col][:10**6] for col in ['z', 'e1', 'size'])
+        self.left = binned_series(z, e1, 20, [0, 3])
+        self.right = binned_series(z, size, 20, [0, 3])
+
+    def render(self):
+        z_bins, e_mean, e_err = self.left
+        _, size_mean, size_err = self.right
+        HistTwinxErrorPlotFunc(self.outpath, [self.cat['z']], [self.cat['weight']], ['gray'],
+                    [z_bins], [e_mean], ['r'], [z_bins], [size_mean], ['b'],
+                    yerrs_error_left=[e_err], yerrs_error_right=[size_err], XRANGE=[0, 3],
+                    XLABEL='z', YLABEL_hist='N', YLABEL_error_left='e1', YLABEL_error_right='size')
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 19:40:05
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 19:40:05
+
+### import time of the package (asv benchmarks, each one in a fresh interpreter)
+#   asv run (from the repository root), or: python benchmarks/bench_import.py
+
+import sys
+import subprocess
+
+def timeraw_import_plotting():
+    """
+    import plotting (matplotlib is not imported yet)
+    """
+
+    return "import plotting"
+
+def timeraw_import_function():
+    """
+    first use of a plotting function (its submodule and matplotlib are imported)
+    """
+
+    return "from plotting import HistPlotFunc"
+
+def timeraw_import_matplotlib():
+    """
+    reference: import matplotlib
+    """
+
+    return "import matplotlib"
+
+if __name__ == '__main__':
+
+    N_runs = 10
+    for name, func in list(globals().items()):
+        if name.startswith('timeraw_'):
+            code = (f'import time; t_start = time.perf_counter(); {func()}; '
+                    'print(time.perf_counter() - t_start)')
+            times = sorted(float(subprocess.run([sys.executable, '-c', code],
+                                        capture_output=True, text=True, check=True).stdout)
+                            for _ in range(N_runs))
+            print(f'{name[8:]:<24} {1e3*times[N_runs//2]:8.1f} ms (median of {N_runs})')
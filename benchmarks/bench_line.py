@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 20:21:10
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 20:21:10
+
+### benchmarks of LinePlot
+
+import numpy as np
+
+from plotting import (LinePlotFunc, LinePlotFunc_subplots, ErrorPlotFunc, ErrorPlotFunc_subplots,
+                        ScatterPlotFunc, ErrorPlotFunc_2sub_shareX)
+
+from .common import _RenderBenchmark
+
+class LinePlot(_RenderBenchmark):
+    """
+    One long trace (random walk of e1) with the default markers
+    """
+
+    max_points = 10**7
+
+    def prepare(self, n_points):
+        self.xval = np.arange(n_points, dtype=np.float64)
+        self.yval = np.cumsum(self.cat['e1'])
+
+    def render(self):
+        LinePlotFunc(self.outpath, [self.xval], [self.yval], ['k'], LINEs=['-'], XLABEL='step', YLABEL='e1')
+
+class LinePlotDownsample(LinePlot):
+    """
+    One long trace drawn as a line with min-max downsampling
+    """
+
+    max_points = 10**8
+
+    def render(self):
+        LinePlotFunc(self.outpath, [self.xval], [self.yval], ['k'], LINEs=['-'], POINTs=[''], downsample='minmax',
+                    XLABEL='step', YLABEL='e1')
+
+class LinePlotSubplots(_RenderBenchmark):
+    """
+    Four panels of one trace each (the points are split between the panels)
+    """
+
+    max_points = 10**7
+
+    def prepare(self, n_points):
+        n_split = n_points // 4
+        self.xvals_list = [[np.arange(n_split, dtype=np.float64)]]*4
+        self.yvals_list = [[np.cumsum(self.cat[col][i*n_split:(i+1)*n_split])] for i, col in enumerate(['e1', 'e2', 'e1', 'e2'])]
+
+    def render(self):
+        LinePlotFunc_subplots(self.outpath, 4, self.xvals_list, self.yvals_list, [['k']]*4, LINEs_list=[['-']]*4,
+                    XLABEL='step', YLABEL='e')
+
+class ErrorPlot(_RenderBenchmark):
+    """
+    Magnitude-size points with magnitude errors
+    """
+
+    max_points = 10**6
+
+    def prepare(self, n_points):
+        self.cols = [np.asarray(self.cat[col]) for col in ['mag', 'size', 'mag_err']]
+
+    def render(self):
+        mag, size, mag_err = self.cols
+        ErrorPlotFunc(self.outpath, [size], [mag], [mag_err], ['k'], LABELs=['galaxies'], LINEs=['none'],
+                    XLABEL='size', YLABEL='mag')
+
+class ErrorPlotSubplots(_RenderBenchmark):
+    """
+    Four panels of points with errors (the points are split between the panels)
+    """
+
+    max_points = 10**6
+
+    def prepare(self, n_points):
+        n_split = n_points // 4
+        cols = [np.asarray(self.cat[col]) for col in ['mag', 'size', 'mag_err']]
+        self.vals_list = [[[col[i*n_split:(i+1)*n_split]] for i in range(4)] for col in cols]
+
+    def render(self):
+        mag_list, size_list, err_list = self.vals_list
+        ErrorPlotFunc_subplots(self.outpath, 4, size_list, mag_list, err_list, [['k']]*4, LINEs_list=[['none']]*4,
+                    XLABEL='size', YLABEL='mag')
+
+class ErrorPlot2subShareX(_RenderBenchmark):
+    """
+    Points with errors and their residuals (the points are split between the panels)
+    """
+
+    max_points = 10**6
+
+    def prepare(self, n_points):
+        n_split = n_points // 2
+        mag, size, mag_err = (np.asarray(self.cat[col]) for col in ['mag', 'size', 'mag_err'])
+        self.upper = [size[:n_split]], [mag[:n_split]], [mag_err[:n_split]]
+        self.lower = [size[n_split:2*n_split]], [mag[n_split:2*n_split] - 22.], [mag_err[n_split:2*n_split]]
+
+    def render(self):
+        ErrorPlotFunc_2sub_shareX(self.outpath, *self.upper, *self.lower, ['k'], ['r'],
+                    LINEs_u=['none'], LINEs_d=['none'], XLABEL='size', YLABEL_u='mag', YLABEL_d='residual')
+
+class ScatterPlot(_RenderBenchmark):
+    """
+    Magnitude-redshift points coloured by size
+    """
+
+    max_points = 10**6
+
+    def render(self):
+        cat = self.cat
+        ScatterPlotFunc(self.outpath, cat['mag'], cat['z'], POINTS=1, cval=cat['size'], cmap='viridis',
+                    bar_label='size', XLABEL='mag', YLABEL='z')
+
+class ScatterPlotAggregate(_RenderBenchmark):
+    """
+    Magnitude-redshift mean size on one cell per pixel
+    """
+
+    def render(self):
+        cat = self.cat
+        ScatterPlotFunc(self.outpath, cat['mag'], cat['z'], cval=cat['size'], cmap='viridis', aggregate='mean',
+                    XRANGE=[17, 25], YRANGE=[0, 3], bar_label='size', XLABEL='mag', YLABEL='z')
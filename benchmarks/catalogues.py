@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 20:21:10
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 20:21:10
+
+### synthetic galaxy catalogues for the benchmarks
+#   large catalogues are written once as .npy files and memory-mapped
+#   (in $PLOTTING_BENCH_DIR, or in the temporary directory)
+
+import os
+import tempfile
+
+import numpy as np
+
+# catalogues with more rows are kept on disk
+ON_DISK_SIZE = 10**7
+# number of rows generated at once
+GENERATE_CHUNK = 10**7
+
+COLUMNS = ('mag', 'z', 'size', 'e1', 'e2', 'weight', 'mag_err')
+
+def catalogue_dir():
+    """
+    Directory of the on-disk catalogues
+    """
+
+    path = os.environ.get('PLOTTING_BENCH_DIR', os.path.join(tempfile.gettempdir(), 'plotting_bench'))
+    os.makedirs(path, exist_ok=True)
+
+    return path
+
+def _generate(n_rows, seed):
+    """
+    Columns of a catalogue chunk
+        mag: magnitudes with a power-law number count up to a limit (~24.5)
+        z: photometric redshifts (log-normal), size: half-light radii (log-normal, arcsec)
+        e1, e2: ellipticities (Gaussian, |e| < 1), weight: shear weights, mag_err: magnitude errors
+    """
+
+    rng = np.random.default_rng(seed)
+
+    mag = 24.5 - rng.exponential(1.5, n_rows)
+    z = rng.lognormal(np.log(0.7), 0.5, n_rows)
+    size = rng.lognormal(np.log(0.5), 0.4, n_rows)
+    e1 = np.clip(rng.normal(0, 0.25, n_rows), -0.99, 0.99)
+    e2 = np.clip(rng.normal(0, 0.25, n_rows), -0.99, 0.99)
+    weight = 1. / (0.25**2 + rng.uniform(0.001, 0.05, n_rows))
+    mag_err = 0.02 * 10**(0.2 * (mag - 20.))
+
+    return dict(mag=mag, z=z, size=size, e1=e1, e2=e2, weight=weight, mag_err=mag_err)
+
+def make_catalogue(n_rows, seed=0):
+    """
+    Catalogue of n_rows galaxies (dictionary of columns)
+        small catalogues are generated in memory,
+        large ones are generated chunk by chunk into .npy files (once) and memory-mapped
+    """
+
+    if n_rows < ON_DISK_SIZE:
+        return _generate(n_rows, seed)
+
+    prefix = os.path.join(catalogue_dir(), f'cat_{n_rows}_{seed}')
+    paths = {col: f'{prefix}_{col}.npy' for col in COLUMNS}
+    if not all(os.path.isfile(path) for path in paths.values()):
+        files = {col: np.lib.format.open_memmap(f'{path}.tmp', mode='w+', dtype=np.float64, shape=(n_rows,))
+                    for col, path in paths.items()}
+        for i_chunk, i_start in enumerate(range(0, n_rows, GENERATE_CHUNK)):
+            chunk = _generate(min(GENERATE_CHUNK, n_rows - i_start), seed + i_chunk)
+            for col, data in chunk.items():
+                files[col][i_start:i_start+len(data)] = data
+        for col, path in paths.items():
+            files[col].flush()
+            del files[col]
+            os.replace(f'{path}.tmp', path)
+
+    return {col: np.load(path, mmap_mode='r') for col, path in paths.items()}
+
+def make_catalogue_file(n_rows, seed=0):
+    """
+    Catalogue of n_rows galaxies as one .npy structured array on disk (written once)
+        returns the path, the columns are read as (path, column)
+    """
+
+    path = os.path.join(catalogue_dir(), f'table_{n_rows}_{seed}.npy')
+    if not os.path.isfile(path):
+        dtype = np.dtype([(col, np.float64) for col in COLUMNS])
+        table = np.lib.format.open_memmap(f'{path}.tmp', mode='w+', dtype=dtype, shape=(n_rows,))
+        for i_chunk, i_start in enumerate(range(0, n_rows, GENERATE_CHUNK)):
+            chunk = _generate(min(GENERATE_CHUNK, n_rows - i_start), seed + i_chunk)
+            for col, data in chunk.items():
+                table[col][i_start:i_start+len(data)] = data
+        table.flush()
+        del table
+        os.replace(f'{path}.tmp', path)
+
+    return path
+
+def binned_series(x_val, y_val, n_bins, XRANGE):
+    """
+    Mean and error of y in bins of x (the usual input of the error-bar plots)
+    """
+
+    edges = np.linspace(XRANGE[0], XRANGE[1], n_bins+1)
+    counts = np.histogram(x_val, bins=edges)[0]
+    sums = np.histogram(x_val, bins=edges, weights=y_val)[0]
+    sums2 = np.histogram(x_val, bins=edges, weights=np.square(y_val))[0]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / counts
+        err = np.sqrt(np.maximum(sums2 / counts - mean**2, 0) / counts)
+
+    return 0.5 * (edges[1:] + edges[:-1]), mean, err
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 20:21:10
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 20:21:10
+
+### shared set-up of the rendering benchmarks
+
+import io
+import os
+import shutil
+import tempfile
+import contextlib
+
+from .catalogues import make_catalogue
+
+# number of data points in each figure (all panels together)
+N_POINTS = [10**3, 10**4, 10**5, 10**6, 10**7, 10**8]
+FORMATS = ['png', 'pdf']
+
+class _RenderBenchmark:
+    """
+    Time, peak memory and output size of one plotting function
+        prepare builds the inputs from self.cat, render draws and saves the figure to self.outpath
+        inputs above max_points are skipped (marker plots that cannot reach 1e8 points)
+    """
+
+    params = [N_POINTS, FORMATS]
+    param_names = ['n_points', 'fig_format']
+    timeout = 1800
+    max_points = N_POINTS[-1]
+
+    def setup(self, n_points, fig_format):
+
+        if n_points > self.max_points:
+            raise NotImplementedError(f'more than {self.max_points} points')
+
+        self.cat = make_catalogue(n_points)
+        self.outdir = tempfile.mkdtemp(prefix='plotting_bench_')
+        self.outpath = os.path.join(self.outdir, f'figure.{fig_format}')
+        self.prepare(n_points)
+
+    def teardown(self, n_points, fig_format):
+
+        if hasattr(self, 'outdir'):
+            shutil.rmtree(self.outdir, ignore_errors=True)
+
+    def prepare(self, n_points):
+        pass
+
+    def render(self):
+        raise NotImplementedError
+
+    def _render(self):
+
+        # without the 'saved as' messages
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.render()
+
+    def time_render(self, n_points, fig_format):
+        self._render()
+
+    def peakmem_render(self, n_points, fig_format):
+        self._render()
+
+    def track_output_size(self, n_points, fig_format):
+        self._render()
+        return os.path.getsize(self.outpath) / 1024.
+
+    track_output_size.unit = 'kB'
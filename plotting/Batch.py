@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 18:31:40
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 18:31:40
+
+### render many figures in a pool of worker processes
+
+__all__ = ["render_batch"]
+
+import os
+import io
+import time
+import logging
+import traceback
+import functools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from .Stats import record_render_stats
+
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=None)
+def _batch_functions():
+    """
+    Public plotting functions of HistPlot, LinePlot and HistLinePlot by name
+    """
+
+    from . import HistPlot, LinePlot, HistLinePlot
+
+    funcs = {}
+    for module in [HistPlot, LinePlot, HistLinePlot]:
+        for name in module.__all__:
+            funcs[name] = getattr(module, name)
+
+    return funcs
+
+def _init_worker(tex_cache_dir=None):
+    """
+    Set up matplotlib once per worker process (Agg backend, plotting modules imported)
+    """
+
+    import matplotlib
+    matplotlib.use('agg')
+    _batch_functions()
+
+    if tex_cache_dir is not None:
+        from .TexCache import set_tex_cache_dir
+        set_tex_cache_dir(tex_cache_dir)
+
+def _parse_spec(spec):
+    """
+    (function name, kwargs) of one job
+        a (name, kwargs) pair or a dictionary with 'func' and 'kwargs'
+    """
+
+    if isinstance(spec, dict):
+        return spec['func'], spec.get('kwargs', {})
+
+    return spec[0], spec[1]
+
+def _run_job(spec, quiet=True):
+    """
+    Render one job, errors are returned rather than raised
+    """
+
+    func_name, kwargs = _parse_spec(spec)
+    res = dict(func=func_name, outpath=kwargs.get('outpath'), status='ok', error=None, pid=os.getpid())
+
+    t_start = time.perf_counter()
+    with record_render_stats() as stats:
+        try:
+            func = _batch_functions()[func_name]
+            if quiet:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    func(**kwargs)
+            else:
+                func(**kwargs)
+        except Exception:
+            res['status'] = 'error'
+            res['error'] = traceback.format_exc()
+    res['time'] = time.perf_counter() - t_start
+    res['stats'] = stats[0].as_dict() if stats else None
+
+    return res
+
+def render_batch(specs, n_workers=None, quiet=True, tex_cache_dir=None):
+    """
+    Render a list of figures, in a pool of worker processes
+
+    Parameters
+    ----------
+    specs : list of (name, kwargs) or {'func': name, 'kwargs': kwargs}
+        name: any public function of HistPlot, LinePlot or HistLinePlot
+        kwargs: all its arguments by name (including outpath)
+
+    n_workers : int, default: None
+        number of worker processes (each one sets up Agg and matplotlib once)
+        None or 1: in this process
+
+    quiet : bool, default: True
+        silence the 'saved as' messages of the functions
+
+    tex_cache_dir : str, default: None
+        directory of the compiled LaTeX labels shared by the workers (see set_tex_cache_dir),
+        in this process it is used for the batch only (the previous directory is restored)
+        None: the matplotlib cache directory
+
+    Returns
+    -------
+    results : list of dict (same order as specs)
+        func, outpath, status ('ok' or 'error'), error (traceback or None),
+        time (seconds spent on the job), pid (the worker process),
+        stats (RenderStats.as_dict of the render, None if it failed before starting)
+    """
+
+    for spec in specs:
+        func_name, _ = _parse_spec(spec)
+        if func_name not in _batch_functions():
+            raise Exception(f'Unsupported function for render_batch: {func_name}')
+
+    t_start = time.perf_counter()
+    if (n_workers is None) or (n_workers <= 1):
+        previous_dir = None
+        if tex_cache_dir is not None:
+            from .TexCache import set_tex_cache_dir
+            previous_dir = set_tex_cache_dir(tex_cache_dir)
+        try:
+            results = [_run_job(spec, quiet=quiet) for spec in specs]
+        finally:
+            # only used by this batch
+            if previous_dir is not None:
+                set_tex_cache_dir(previous_dir)
+    else:
+        results = [None] * len(specs)
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                initargs=(tex_cache_dir,)) as executor:
+            futures = [executor.submit(_run_job, spec, quiet) for spec in specs]
+            for i_job, future in enumerate(futures):
+                try:
+                    results[i_job] = future.result()
+                except Exception:
+                    # the job could not be sent to or run by a worker (unpicklable inputs, killed worker)
+                    func_name, kwargs = _parse_spec(specs[i_job])
+                    results[i_job] = dict(func=func_name, outpath=kwargs.get('outpath'),
+                                        status='error', error=traceback.format_exc(), pid=None, time=None)
+
+    N_failed = sum(res['status'] != 'ok' for res in results)
+    logger.info(f'{len(results)} figures rendered in {time.perf_counter() - t_start:.1f} s ({N_failed} failed)')
+
+    return results
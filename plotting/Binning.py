@@ -0,0 +1,874 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 16:40:12
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 16:40:12
+
+### histogram binning outside of matplotlib
+
+__all__ = ["compute_hist", "compute_hist_batch", "compute_hist2d", "compute_binned_stat2d"]
+
+import os
+import re
+import mmap
+import logging
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# default number of values read at once from on-disk catalogues
+CHUNK_SIZE = 2**22
+# number of values processed at once by the binning kernels (fits in the CPU cache)
+BLOCK_SIZE = 2**16
+
+# FITS files are made of blocks of 2880 bytes (headers of 36 cards of 80 characters)
+FITS_BLOCK = 2880
+FITS_EXTENSIONS = ('.fits', '.fit', '.fts')
+# numpy types of the FITS binary table formats (big-endian)
+_FITS_TYPES = {'L': 'i1', 'X': 'u1', 'B': 'u1', 'I': '>i2', 'J': '>i4', 'K': '>i8', 'A': 'S1',
+                'E': '>f4', 'D': '>f8', 'C': '>c8', 'M': '>c16', 'P': '>i4', 'Q': '>i8'}
+
+def _is_file_column(para):
+    """
+    Whether the input is (path, column): one column of a .npy structured array or of a FITS binary table
+    """
+
+    return (isinstance(para, tuple) and (len(para) == 2)
+            and isinstance(para[0], (str, os.PathLike)) and isinstance(para[1], str))
+
+def _is_streamed(para):
+    """
+    Whether the input is a file path, a file column or an iterator of chunks,
+        instead of an in-memory array
+    """
+
+    return isinstance(para, (str, os.PathLike, Iterator)) or _is_file_column(para)
+
+def _read_fits_header(file):
+    """
+    Cards of the next FITS header (keyword -> value), the file is left at the start of the data
+    """
+
+    cards = {}
+    while True:
+        block = file.read(FITS_BLOCK)
+        if len(block) < FITS_BLOCK:
+            raise Exception(f'Truncated FITS header in {file.name}')
+        for i_card in range(0, FITS_BLOCK, 80):
+            card = block[i_card:i_card+80].decode('ascii', errors='replace')
+            keyword = card[:8].strip()
+            if keyword == 'END':
+                return cards
+            if card[8:10] != '= ':
+                continue
+            value = card[10:].strip()
+            if value.startswith("'"):
+                # quotes within strings are doubled
+                value = re.match(r"'((?:[^']|'')*)'", value).group(1).replace("''", "'").rstrip()
+            else:
+                value = value.split('/')[0].strip()
+            cards[keyword] = value
+
+def _open_fits_column(path, column):
+    """
+    One column of the first binary table of a FITS file, memory-mapped (big-endian values)
+        only the headers are read, the rows are read from the mapped pages when used
+    """
+
+    with open(path, 'rb') as file:
+        while True:
+            cards = _read_fits_header(file)
+            if cards.get('XTENSION') == 'BINTABLE':
+                data_start = file.tell()
+                break
+            # skip the data of the primary HDU and of other extensions
+            n_axis = int(cards.get('NAXIS', 0))
+            n_values = int(np.prod([int(cards[f'NAXIS{i}']) for i in range(1, n_axis+1)])) if n_axis > 0 else 0
+            n_bytes = abs(int(cards['BITPIX'])) // 8 * int(cards.get('GCOUNT', 1)) * (int(cards.get('PCOUNT', 0)) + n_values)
+            file.seek(-(-n_bytes // FITS_BLOCK) * FITS_BLOCK, os.SEEK_CUR)
+            if not file.read(1):
+                raise Exception(f'No binary table in {path}')
+            file.seek(-1, os.SEEK_CUR)
+
+    fields = []
+    i_column = None
+    for i_field in range(1, int(cards['TFIELDS'])+1):
+        name = cards.get(f'TTYPE{i_field}', f'col{i_field}')
+        repeat, code = re.match(r'\s*(\d*)([A-Z])', cards[f'TFORM{i_field}']).groups()
+        repeat = int(repeat) if repeat else 1
+        if code == 'A':
+            fields.append((name, f'S{repeat}'))
+        elif code == 'X':
+            fields.append((name, 'u1', (-(-repeat // 8),)))
+        elif code in ('P', 'Q'):
+            fields.append((name, _FITS_TYPES[code], (2,)))
+        else:
+            fields.append((name, _FITS_TYPES[code], (repeat,)) if repeat != 1 else (name, _FITS_TYPES[code]))
+        if (name == column) or ((i_column is None) and (name.lower() == column.lower())):
+            i_column = i_field
+
+    if i_column is None:
+        raise Exception(f'No column {column} in {path}')
+    if (float(cards.get(f'TSCAL{i_column}', 1)) != 1) or (float(cards.get(f'TZERO{i_column}', 0)) != 0):
+        raise Exception(f'Scaled FITS columns (TSCAL, TZERO) are not supported: {column} in {path}')
+    if len(fields[i_column-1]) == 3:
+        raise Exception(f'FITS column {column} in {path} is not a scalar column')
+
+    dtype = np.dtype(fields)
+    if dtype.itemsize != int(cards['NAXIS1']):
+        raise Exception(f'Unsupported FITS table format in {path}')
+
+    table = np.memmap(path, dtype=dtype, mode='r', offset=data_start, shape=(int(cards['NAXIS2']),))
+
+    return table[fields[i_column-1][0]]
+
+def _open_array(para):
+    """
+    Open the input as an array-like object without reading it into memory
+        .npy file paths: the memory-mapped array
+        (path, column): the memory-mapped column of a .npy structured array or of a FITS binary table
+    """
+
+    if _is_file_column(para):
+        path, column = os.fspath(para[0]), para[1]
+        if path.lower().endswith(FITS_EXTENSIONS):
+            return _open_fits_column(path, column)
+        if not path.endswith('.npy'):
+            raise Exception(f'Unsupported file format: {path}')
+        table = np.load(path, mmap_mode='r')
+        if table.dtype.names is None:
+            raise Exception(f'{path} has no columns (not a structured array)')
+        return table[column]
+
+    if isinstance(para, (str, os.PathLike)):
+        path = os.fspath(para)
+        if not path.endswith('.npy'):
+            raise Exception(f'Unsupported file format: {path}')
+        return np.load(path, mmap_mode='r')
+    return para
+
+def _release_pages(para, i_start, i_stop):
+    """
+    Drop the mapped pages of the rows [i_start, i_stop) of a read-only memory-mapped input
+        from the resident memory once they are binned (they are read again from the file if needed),
+        so that the resident memory stays bounded by the chunk size instead of growing with the file
+    """
+
+    if (not isinstance(para, np.memmap)) or (para.mode != 'r') or (para.ndim != 1):
+        return
+    i_stop = min(i_stop, len(para))
+    if (i_stop <= i_start) or (not hasattr(mmap, 'MADV_DONTNEED')) or (getattr(para, '_mmap', None) is None):
+        return
+
+    base = np.frombuffer(para._mmap, dtype=np.uint8).ctypes.data
+    start = para.ctypes.data - base + i_start * para.strides[0]
+    stop = para.ctypes.data - base + (i_stop - 1) * para.strides[0] + para.itemsize
+    start -= start % mmap.PAGESIZE
+    try:
+        para._mmap.madvise(mmap.MADV_DONTNEED, start, stop - start)
+    except (OSError, ValueError):
+        pass
+
+def _iter_chunks(*paras, chunk_size=None):
+    """
+    Iterate aligned chunks of several inputs
+        in-memory arrays, .npy file paths or file columns (memory-mapped) or iterators of chunks
+        the first iterator (if any) sets the chunks, None inputs are passed through
+        the pages of memory-mapped inputs are released once their chunk is binned
+    """
+
+    paras = [para if isinstance(para, Iterator) else _open_array(para) for para in paras]
+
+    i_lead = next((i for i, para in enumerate(paras) if isinstance(para, Iterator)), None)
+    if i_lead is not None:
+        i_start = 0
+        for lead_chunk in paras[i_lead]:
+            lead_chunk = np.asarray(lead_chunk)
+            chunks = []
+            for i, para in enumerate(paras):
+                if i == i_lead:
+                    chunks.append(lead_chunk)
+                elif para is None:
+                    chunks.append(None)
+                elif isinstance(para, Iterator):
+                    chunks.append(np.asarray(next(para)))
+                else:
+                    chunks.append(np.asarray(para[i_start:i_start+len(lead_chunk)]))
+            yield tuple(chunks)
+            for para in paras:
+                _release_pages(para, i_start, i_start+len(lead_chunk))
+            i_start += len(lead_chunk)
+        return
+
+    if (chunk_size is None) and any(isinstance(para, np.memmap) for para in paras):
+        chunk_size = CHUNK_SIZE
+    if chunk_size is None:
+        yield tuple(paras)
+        return
+
+    for i_start in range(0, len(paras[0]), chunk_size):
+        yield tuple((np.asarray(para[i_start:i_start+chunk_size]) if para is not None else None)
+                    for para in paras)
+        for para in paras:
+            _release_pages(para, i_start, i_start+chunk_size)
+
+def _hist_edges(nbins, XRANGE, xlog=False):
+    """
+    Bin edges used by the histogram functions
+        nbins is the number of edges (same as HistPlotFunc),
+        or the edges themselves (returned as they are)
+    """
+
+    if np.ndim(nbins) == 1:
+        return np.asarray(nbins, dtype=np.float64)
+
+    if XRANGE is None:
+        raise Exception('XRANGE cannot be None!')
+
+    if xlog:
+        return np.logspace(np.log10(XRANGE[0]), np.log10(XRANGE[1]), nbins)
+    else:
+        return np.linspace(XRANGE[0], XRANGE[1], nbins)
+
+def _uniform_bin_index(para, nbins, XRANGE, dtype=np.float64):
+    """
+    Bin indices of values on nbins uniform bins within XRANGE
+        the last bin includes the upper edge (same as numpy.histogram)
+        out-of-range and NaN values get the index nbins
+    """
+
+    para = np.asarray(para)
+    bin_min, bin_max = XRANGE
+    edges = np.linspace(bin_min, bin_max, nbins+1)
+
+    coord = np.subtract(para, bin_min, dtype=dtype)
+    coord *= dtype(nbins / (bin_max - bin_min))
+    with np.errstate(invalid='ignore'):
+        index = coord.astype(np.intp)
+    np.clip(index, 0, nbins-1, out=index)
+
+    # round-off at the edges (values exactly on an edge belong to the upper bin)
+    #   (arithmetic with boolean arrays is much faster than boolean indexing)
+    index -= (para < edges.take(index))
+    index += (para >= edges.take(index+1)) & (index != nbins-1)
+
+    np.putmask(index, ~((para >= bin_min) & (para <= bin_max)), nbins)
+
+    return index
+
+def _hist_bin_index(para, nbins, XRANGE, xlog=False):
+    """
+    Bin indices of values on the HistPlotFunc bins (nbins edges)
+        out-of-range, non-positive (xlog) and NaN values get the index nbins-1
+        nbins can also be the edges (arbitrary bins, located by binary search)
+    """
+
+    if np.ndim(nbins) == 1:
+        edges = np.asarray(nbins, dtype=np.float64)
+        # NaN values are sorted after the last edge
+        index = np.searchsorted(edges, para, side='right') - 1
+        np.putmask(index, para == edges[-1], len(edges)-2)
+        np.putmask(index, (index < 0) | (index > len(edges)-2), len(edges)-1)
+        return index
+
+    if not xlog:
+        return _uniform_bin_index(para, nbins-1, XRANGE)
+
+    # logarithmic bins are uniform in log10(x)
+    #   values are clamped around the range first, so that non-positive values
+    #   never reach log10 and everything out of the range is dropped in one go at the end
+    para = np.asarray(para)
+    edges = _hist_edges(nbins, XRANGE, xlog)
+    coord = np.fmin(np.fmax(para, edges[0]/2.), edges[-1]*2.)
+    np.log10(coord, out=coord)
+    coord -= np.log10(edges[0])
+    coord *= (nbins-1) / (np.log10(edges[-1]) - np.log10(edges[0]))
+    index = coord.astype(np.intp)
+    np.clip(index, 0, nbins-2, out=index)
+
+    # the bins are defined by the linear edges (same as numpy.histogram with logspace edges)
+    index -= (para < edges.take(index))
+    index += (para >= edges.take(index+1)) & (index != nbins-2)
+
+    np.putmask(index, ~((para >= edges[0]) & (para <= edges[-1])), nbins-1)
+
+    return index
+
+def _accumulate_hist(para, wg, nbins, XRANGE, xlog=False, sumw2=False):
+    """
+    (Weighted) number counts of one chunk on the HistPlotFunc bins
+        weighted counts are accumulated from the bin indices in blocks of BLOCK_SIZE values,
+        unweighted counts are left to the sort-based numpy.histogram, which is faster without weights
+        sumw2=True: returns (counts, sum of squared weights), both from the same bin indices
+    """
+
+    para = np.asarray(para).ravel()
+    edges = _hist_edges(nbins, XRANGE, xlog)
+    if wg is None:
+        counts = np.histogram(para, bins=edges)[0]
+        # unit weights
+        return (counts, counts.copy()) if sumw2 else counts
+    wg = np.asarray(wg).ravel()
+
+    # the last one collects out-of-range values
+    n_edges = len(edges)
+    counts = np.zeros(n_edges, dtype=np.float64)
+    counts_w2 = np.zeros(n_edges, dtype=np.float64) if sumw2 else None
+    for i_start in range(0, len(para), BLOCK_SIZE):
+        index = _hist_bin_index(para[i_start:i_start+BLOCK_SIZE], nbins, XRANGE, xlog)
+        wg_block = wg[i_start:i_start+BLOCK_SIZE]
+        counts += np.bincount(index, weights=wg_block, minlength=n_edges)
+        if sumw2:
+            counts_w2 += np.bincount(index, weights=np.square(wg_block), minlength=n_edges)
+
+    return (counts[:-1], counts_w2[:-1]) if sumw2 else counts[:-1]
+
+def compute_hist(para, nbins, XRANGE, wg=None, xlog=False, chunk_size=None, sumw2=False):
+    """
+    Bin one parameter in the same way as HistPlotFunc
+        returns (counts, edges), which can be passed to HistPlotFunc
+        and HistPlotFunc_subplots with prebinned=True
+
+    Parameters
+    ----------
+    para : array-like, path to a .npy file, (path, column) or iterator of array-like chunks
+        values to be binned
+        (path, column): one column of a .npy structured array or of a FITS binary table (first one)
+        files are memory-mapped and iterators are consumed chunk by chunk,
+        so the peak memory only depends on the chunk size
+
+    nbins : int or array-like
+        number of bin edges
+        or the bin edges themselves (e.g. QuantileSketch.edges), XRANGE and xlog are then ignored
+
+    XRANGE : [min, max]
+        range of the bins
+
+    wg : array-like, path to a .npy file, (path, column) or iterator of array-like chunks, default: None
+        weights of the values
+        iterators should yield chunks of the same lengths as para
+
+    xlog : bool, default: False
+        logarithmic bins
+
+    chunk_size : int, default: None
+        number of values binned at once
+        None: whole arrays in one go (CHUNK_SIZE for files)
+
+    sumw2 : bool, default: False
+        also accumulate the sum of squared weights in each bin (in the same pass),
+        sqrt(sumw2) is the statistical uncertainty of the counts
+
+    Returns
+    -------
+    counts : numpy array
+        (weighted) number counts in each bin
+
+    sumw2 : numpy array (only if sumw2=True)
+        sum of squared weights in each bin (the counts for unweighted values)
+
+    edges : numpy array
+        bin edges (len(counts) + 1)
+    """
+
+    edges = _hist_edges(nbins, XRANGE, xlog)
+
+    dtype = np.int64 if wg is None else np.float64
+    counts = np.zeros(len(edges)-1, dtype=dtype)
+    counts_w2 = np.zeros(len(edges)-1, dtype=dtype) if sumw2 else None
+    for para_chunk, wg_chunk in _iter_chunks(para, wg, chunk_size=chunk_size):
+        res = _accumulate_hist(para_chunk, wg_chunk, nbins, XRANGE, xlog, sumw2=sumw2)
+        if sumw2:
+            counts += res[0].astype(dtype, copy=False)
+            counts_w2 += res[1].astype(dtype, copy=False)
+        else:
+            counts += res.astype(dtype, copy=False)
+
+    if sumw2:
+        return counts, counts_w2, edges
+    return counts, edges
+
+def compute_hist_batch(paras, nbins, XRANGE, wgs=None, xlog=False):
+    """
+    Bin several parameters on the same bins
+        the bins are set up once and the parameters are accumulated
+        into one (len(paras), nbins-1) array without going through matplotlib
+
+    Parameters
+    ----------
+    paras : list of array-like
+        values to be binned
+
+    nbins : int or array-like
+        number of bin edges (or the bin edges themselves)
+
+    XRANGE : [min, max]
+        range of the bins
+
+    wgs : list of array-like or None, default: None
+        weights of the values
+
+    xlog : bool, default: False
+        logarithmic bins
+
+    Returns
+    -------
+    counts : numpy array of shape (len(paras), len(edges)-1)
+        (weighted) number counts of each parameter
+
+    edges : numpy array
+        bin edges
+    """
+
+    edges = _hist_edges(nbins, XRANGE, xlog)
+
+    weighted = (wgs is not None) and any(wg is not None for wg in wgs)
+    counts = np.zeros((len(paras), len(edges)-1), dtype=(np.float64 if weighted else np.int64))
+    for i_para, para in enumerate(paras):
+        wg = wgs[i_para] if wgs is not None else None
+        counts[i_para] = _accumulate_hist(para, wg, nbins, XRANGE, xlog)
+
+    return counts, edges
+
+def compute_hist2d(x_val, y_val, nbins, XRANGE=None, YRANGE=None, wg=None,
+                    count_dtype=np.float64, chunk_size=None):
+    """
+    2D histogram on uniform bins, same results as numpy.histogram2d
+        bin indices are computed directly from the uniform grid
+        and accumulated with a (weighted) bincount, block by block
+
+    Parameters
+    ----------
+    x_val, y_val : array-like, path to a .npy file, (path, column) or iterator of array-like chunks
+        values to be binned
+        (path, column): one column of a .npy structured array or of a FITS binary table (first one)
+
+    nbins : int or [int, int]
+        number of bins in each dimension
+
+    XRANGE, YRANGE : [min, max], default: None
+        range of the bins
+        None: the minimum and maximum of the values
+
+    wg : array-like, path to a .npy file, (path, column) or iterator of array-like chunks, default: None
+        weights of the values
+
+    count_dtype : numpy dtype, default: numpy.float64
+        dtype of the accumulated grid and of the intermediate bin coordinates
+        numpy.float32 halves the temporary memory
+
+    chunk_size : int, default: None
+        number of values binned at once
+        None: whole arrays in one go (CHUNK_SIZE for files)
+
+    Returns
+    -------
+    counts : numpy array of shape (nx, ny)
+        (weighted) number counts in each bin
+
+    xedges, yedges : numpy arrays
+        bin edges
+    """
+
+    if np.ndim(nbins) == 0:
+        nx, ny = nbins, nbins
+    else:
+        nx, ny = nbins
+
+    if (XRANGE is None) or (YRANGE is None):
+        if _is_streamed(x_val) or _is_streamed(y_val):
+            raise Exception('XRANGE and YRANGE are required for streamed inputs!')
+        if XRANGE is None:
+            XRANGE = [np.amin(x_val), np.amax(x_val)]
+        if YRANGE is None:
+            YRANGE = [np.amin(y_val), np.amax(y_val)]
+
+    # same as numpy for empty ranges
+    XRANGE = [XRANGE[0] - 0.5, XRANGE[1] + 0.5] if XRANGE[0] == XRANGE[1] else XRANGE
+    YRANGE = [YRANGE[0] - 0.5, YRANGE[1] + 0.5] if YRANGE[0] == YRANGE[1] else YRANGE
+
+    count_dtype = np.dtype(count_dtype).type
+    xedges = np.linspace(XRANGE[0], XRANGE[1], nx+1)
+    yedges = np.linspace(YRANGE[0], YRANGE[1], ny+1)
+
+    # the last one collects out-of-range values
+    counts = np.zeros(nx*ny+1, dtype=count_dtype)
+    for x_chunk, y_chunk, wg_chunk in _iter_chunks(x_val, y_val, wg, chunk_size=chunk_size):
+        x_chunk = np.asarray(x_chunk).ravel()
+        y_chunk = np.asarray(y_chunk).ravel()
+        if wg_chunk is not None:
+            wg_chunk = np.asarray(wg_chunk).ravel()
+
+        for i_start in range(0, len(x_chunk), BLOCK_SIZE):
+            ix = _uniform_bin_index(x_chunk[i_start:i_start+BLOCK_SIZE], nx, XRANGE, dtype=count_dtype)
+            iy = _uniform_bin_index(y_chunk[i_start:i_start+BLOCK_SIZE], ny, YRANGE, dtype=count_dtype)
+            index = ix * ny + iy
+            index[(ix == nx) | (iy == ny)] = nx*ny
+            wg_block = wg_chunk[i_start:i_start+BLOCK_SIZE] if wg_chunk is not None else None
+            counts += np.bincount(index, weights=wg_block, minlength=nx*ny+1).astype(count_dtype, copy=False)
+
+    return counts[:-1].reshape(nx, ny), xedges, yedges
+
+def _is_uniform_bins2d(nbins):
+    """
+    Whether 2D bins are numbers of uniform bins (int or [int, int]) rather than bin edges
+        (same interpretation as numpy.histogram2d)
+    """
+
+    if np.isscalar(nbins) or (isinstance(nbins, np.ndarray) and nbins.ndim == 0):
+        return True
+
+    return (len(nbins) == 2) and all(np.ndim(nbin) == 0 for nbin in nbins)
+
+def _grid_ranges(x_val, y_val, XRANGE=None, YRANGE=None, xlog=False, ylog=False):
+    """
+    Ranges of a uniform 2D grid (in log10 for xlog, ylog)
+        None: the minimum and maximum of the values (of the positive values for xlog, ylog)
+    """
+
+    bin_ranges = []
+    for para, RANGE, log in [(x_val, XRANGE, xlog), (y_val, YRANGE, ylog)]:
+        if RANGE is None:
+            para_tmp = para[para > 0] if log else para
+            RANGE = [np.nanmin(para_tmp), np.nanmax(para_tmp)]
+        if log:
+            RANGE = np.log10(RANGE)
+        bin_ranges.append([RANGE[0] - 0.5, RANGE[1] + 0.5] if RANGE[0] == RANGE[1] else list(RANGE))
+
+    return bin_ranges
+
+def _grid_cell_index(x_block, y_block, nx, ny, bin_ranges, xlog=False, ylog=False):
+    """
+    Flat cell indices (ix * ny + iy) of points on a uniform 2D grid
+        out-of-range, non-positive (xlog, ylog) and NaN points get the index nx*ny
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if xlog:
+            x_block = np.log10(x_block)
+        if ylog:
+            y_block = np.log10(y_block)
+    ix = _uniform_bin_index(x_block, nx, bin_ranges[0])
+    iy = _uniform_bin_index(y_block, ny, bin_ranges[1])
+    index = ix * ny + iy
+    index[(ix == nx) | (iy == ny)] = nx*ny
+
+    return index
+
+def compute_binned_stat2d(x_val, y_val, nbins, XRANGE=None, YRANGE=None, cval=None, statistic='count',
+                            xlog=False, ylog=False):
+    """
+    Number of points, or mean or median of their cval, in each cell of a 2D grid
+        uniform bins (uniform in log10 for xlog, ylog),
+        cell indices are computed directly from the grid block by block (same as compute_hist2d)
+
+    Parameters
+    ----------
+    x_val, y_val : array-like
+        point coordinates
+
+    nbins : int or [int, int]
+        number of bins in each dimension
+
+    XRANGE, YRANGE : [min, max], default: None
+        range of the bins
+        None: the minimum and maximum of the values (of the positive values for xlog, ylog)
+
+    cval : array-like, default: None
+        values of the points (required by 'mean' and 'median'), NaN values are ignored
+
+    statistic : {'count', 'mean', 'median'}, default: 'count'
+
+    xlog, ylog : bool, default: False
+        logarithmic bins
+
+    Returns
+    -------
+    grid : numpy array of shape (nx, ny)
+        statistic in each cell, NaN for empty cells
+
+    xedges, yedges : numpy arrays
+        bin edges
+    """
+
+    if statistic not in ('count', 'mean', 'median'):
+        raise Exception(f'Unsupported statistic value: {statistic}')
+    if (statistic != 'count') and (cval is None):
+        raise Exception(f'cval is required for statistic {statistic}!')
+
+    if np.ndim(nbins) == 0:
+        nx, ny = nbins, nbins
+    else:
+        nx, ny = nbins
+    N_cells = nx*ny
+
+    x_val = np.asarray(x_val).ravel()
+    y_val = np.asarray(y_val).ravel()
+    if cval is not None:
+        cval = np.asarray(cval, dtype=np.float64).ravel()
+
+    # bins are uniform in log10 for logarithmic axes
+    bin_ranges = _grid_ranges(x_val, y_val, XRANGE, YRANGE, xlog=xlog, ylog=ylog)
+    xedges = np.linspace(bin_ranges[0][0], bin_ranges[0][1], nx+1)
+    yedges = np.linspace(bin_ranges[1][0], bin_ranges[1][1], ny+1)
+    if xlog:
+        xedges = 10**xedges
+    if ylog:
+        yedges = 10**yedges
+
+    # the last one collects out-of-range (and NaN) points
+    counts = np.zeros(N_cells+1, dtype=np.float64)
+    sums = np.zeros(N_cells+1, dtype=np.float64)
+    index_list = []
+    for i_start in range(0, len(x_val), BLOCK_SIZE):
+        x_block = x_val[i_start:i_start+BLOCK_SIZE]
+        y_block = y_val[i_start:i_start+BLOCK_SIZE]
+        index = _grid_cell_index(x_block, y_block, nx, ny, bin_ranges, xlog=xlog, ylog=ylog)
+
+        c_block = None
+        if cval is not None:
+            c_block = cval[i_start:i_start+BLOCK_SIZE]
+            np.putmask(index, np.isnan(c_block), N_cells)
+
+        counts += np.bincount(index, minlength=N_cells+1)
+        if statistic == 'mean':
+            sums += np.bincount(index, weights=c_block, minlength=N_cells+1)
+        elif statistic == 'median':
+            index_list.append(index)
+    counts = counts[:-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if statistic == 'count':
+            grid = np.where(counts > 0, counts, np.nan)
+        elif statistic == 'mean':
+            grid = np.where(counts > 0, sums[:-1] / counts, np.nan)
+        else:
+            # values sorted by cell, then by value: each cell is a contiguous run
+            index = np.concatenate(index_list) if index_list else np.zeros(0, dtype=np.intp)
+            inside = index < N_cells
+            index, values = index[inside], cval[inside]
+            values = values[np.lexsort((values, index))]
+            N_points = counts.astype(np.intp)
+            starts = np.cumsum(N_points) - N_points
+            filled = N_points > 0
+            grid = np.full(N_cells, np.nan)
+            grid[filled] = 0.5 * (values[(starts + (N_points-1)//2)[filled]] + values[(starts + N_points//2)[filled]])
+
+    return grid.reshape(nx, ny), xedges, yedges
+
+def _decimate_index(x_val, y_val, nbins, XRANGE=None, YRANGE=None, xlog=False, ylog=False):
+    """
+    Indices (in increasing order) of the points kept when only one point is drawn per cell of a 2D grid
+        the last point of each cell is kept (it is the one drawn on top),
+        points outside of the grid (out-of-range, NaN, non-positive for xlog, ylog) are not drawn anyway
+    """
+
+    nx, ny = nbins
+
+    x_val = np.asarray(x_val).ravel()
+    y_val = np.asarray(y_val).ravel()
+    bin_ranges = _grid_ranges(x_val, y_val, XRANGE, YRANGE, xlog=xlog, ylog=ylog)
+
+    last = np.full(nx*ny, -1, dtype=np.intp)
+    for i_start in range(0, len(x_val), BLOCK_SIZE):
+        index = _grid_cell_index(x_val[i_start:i_start+BLOCK_SIZE], y_val[i_start:i_start+BLOCK_SIZE],
+                                nx, ny, bin_ranges, xlog=xlog, ylog=ylog)
+        inside = index < nx*ny
+        np.maximum.at(last, index[inside], np.flatnonzero(inside) + i_start)
+
+    return np.sort(last[last >= 0])
+
+def _minmax_index(x_val, y_val, ncols, XRANGE=None, xlog=False, ylog=False):
+    """
+    Indices of the points kept by min-max (M4) downsampling of a line with monotonic x
+        the first, last, minimum and maximum points of each of ncols uniform columns
+        (uniform in log10 for xlog) and the first point of each NaN gap are kept,
+        so that the line is drawn the same at one column per pixel
+    """
+
+    x_val = np.asarray(x_val, dtype=np.float64).ravel()
+    y_val = np.asarray(y_val, dtype=np.float64).ravel()
+    N_points = len(x_val)
+    if N_points <= 4*ncols:
+        return np.arange(N_points)
+
+    if XRANGE is None:
+        x_tmp = x_val[x_val > 0] if xlog else x_val
+        XRANGE = [np.nanmin(x_tmp), np.nanmax(x_tmp)]
+    bin_range = np.log10(XRANGE) if xlog else np.asarray(XRANGE, dtype=np.float64)
+    if bin_range[0] == bin_range[1]:
+        bin_range = [bin_range[0] - 0.5, bin_range[1] + 0.5]
+
+    # columns of consecutive points (out-of-range points form their own runs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cols = _uniform_bin_index(np.log10(x_val) if xlog else x_val, ncols, bin_range)
+    starts = np.flatnonzero(np.diff(cols)) + 1
+    starts = np.concatenate([[0], starts])
+    lengths = np.diff(np.append(starts, N_points))
+    run = np.repeat(np.arange(len(starts)), lengths)
+
+    # non-positive values are not drawn on logarithmic axes
+    y_tmp = np.where(y_val > 0, y_val, np.nan) if ylog else y_val
+    keep = [starts, starts + lengths - 1]
+    for reduce in (np.fmin, np.fmax):
+        extreme = reduce.reduceat(y_tmp, starts)
+        cand = np.flatnonzero(y_tmp == extreme[run])
+        keep.append(cand[np.flatnonzero(np.diff(run[cand], prepend=-1))])
+    nan = np.isnan(y_tmp)
+    keep.append(np.flatnonzero(nan[1:] & ~nan[:-1]) + 1)
+
+    return np.unique(np.concatenate(keep))
+
+def _lttb_index(x_val, y_val, n_out, xlog=False, ylog=False):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling of a line
+        finite (positive for xlog, ylog) points are split into n_out-2 buckets of equal size,
+        the point of each bucket making the largest triangle with the previous kept point
+        and the average of the next bucket is kept (areas in log10 for xlog, ylog)
+    """
+
+    x_val = np.asarray(x_val, dtype=np.float64).ravel()
+    y_val = np.asarray(y_val, dtype=np.float64).ravel()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_tmp = np.log10(x_val) if xlog else x_val
+        y_tmp = np.log10(y_val) if ylog else y_val
+    valid = np.flatnonzero(np.isfinite(x_tmp) & np.isfinite(y_tmp))
+    N_points = len(valid)
+    if (N_points <= n_out) or (n_out < 3):
+        return valid
+    x_tmp, y_tmp = x_tmp[valid], y_tmp[valid]
+
+    edges = np.linspace(1, N_points-1, n_out-1).astype(np.intp)
+    lengths = np.diff(edges)
+    mean_x = np.add.reduceat(x_tmp, edges[:-1]) / lengths
+    mean_y = np.add.reduceat(y_tmp, edges[:-1]) / lengths
+    # the last point closes the last bucket
+    mean_x = np.append(mean_x[1:], x_tmp[-1])
+    mean_y = np.append(mean_y[1:], y_tmp[-1])
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, N_points-1
+    i_prev = 0
+    for i_bucket in range(n_out-2):
+        lo, hi = edges[i_bucket], edges[i_bucket+1]
+        area = np.abs((x_tmp[i_prev] - mean_x[i_bucket]) * (y_tmp[lo:hi] - y_tmp[i_prev])
+                    - (x_tmp[i_prev] - x_tmp[lo:hi]) * (mean_y[i_bucket] - y_tmp[i_prev]))
+        i_prev = lo + np.argmax(area)
+        keep[i_bucket+1] = i_prev
+
+    return valid[keep]
+
+def _downsample_index(x_val, y_val, ncols, method='minmax', XRANGE=None, xlog=False, ylog=False):
+    """
+    Indices of the points kept by downsampling a long line to about ncols pixel columns
+        method: 'minmax' (M4, exact at one column per pixel) or 'lttb' (ncols points)
+        x should be monotonic, otherwise all points are kept
+    """
+
+    if method not in ('minmax', 'lttb'):
+        raise Exception(f'Unsupported downsample value: {method}')
+
+    x_val = np.asarray(x_val).ravel()
+    steps = np.diff(x_val)
+    if np.any(steps < 0) and np.any(steps > 0):
+        logger.warning('x values are not monotonic, the line is not downsampled!')
+        return np.arange(len(x_val))
+
+    if method == 'minmax':
+        return _minmax_index(x_val, y_val, ncols, XRANGE=XRANGE, xlog=xlog, ylog=ylog)
+
+    return _lttb_index(x_val, y_val, ncols, xlog=xlog, ylog=ylog)
+
+def _share_array(para, shms):
+    """
+    Describe an input so that a worker process can access it without pickling the data
+        file paths are passed as they are, arrays are copied once into shared memory
+        (the SharedMemory objects are appended to shms for the clean-up)
+    """
+
+    if (para is None) or isinstance(para, (str, os.PathLike)) or _is_file_column(para):
+        return para
+
+    para = np.asarray(para)
+    shm = shared_memory.SharedMemory(create=True, size=max(para.nbytes, 1))
+    shms.append(shm)
+    np.ndarray(para.shape, dtype=para.dtype, buffer=shm.buf)[...] = para
+
+    return ('shm', shm.name, para.shape, para.dtype.str)
+
+def _binning_worker(func, descs, kwargs):
+    """
+    Run one binning function in a worker process on shared inputs
+    """
+
+    shms = []
+    arrays = {}
+    for key, desc in descs.items():
+        if isinstance(desc, tuple) and (desc[0] == 'shm'):
+            shm = shared_memory.SharedMemory(name=desc[1])
+            shms.append(shm)
+            arrays[key] = np.ndarray(desc[2], dtype=desc[3], buffer=shm.buf)
+        else:
+            arrays[key] = desc
+
+    try:
+        res = func(**arrays, **kwargs)
+    finally:
+        del arrays
+        for shm in shms:
+            shm.close()
+
+    return res
+
+def _map_binning(func, tasks, n_workers=None, cache=None):
+    """
+    Run binning tasks [(inputs, kwargs), ...] as func(**inputs, **kwargs)
+        inputs are dictionaries of the (large) data arrays
+        n_workers > 1: in a process pool, with in-memory inputs shared through shared memory
+                       (tasks with iterators of chunks are run in this process)
+        cache: BinningCache, only the tasks not found in it are run (and then stored)
+        returns the results in the same order
+    """
+
+    if cache is not None:
+        keys = [cache.key(func, inputs, kwargs) for inputs, kwargs in tasks]
+        results = [cache.get(key) for key in keys]
+        i_missing = [i_task for i_task, res in enumerate(results) if res is None]
+        for i_task, res in zip(i_missing, _map_binning(func, [tasks[i_task] for i_task in i_missing], n_workers=n_workers)):
+            results[i_task] = res
+            if keys[i_task] is not None:
+                cache.put(keys[i_task], res)
+        return results
+
+    if (n_workers is None) or (n_workers <= 1):
+        return [func(**inputs, **kwargs) for inputs, kwargs in tasks]
+
+    results = [None] * len(tasks)
+    shms = []
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {}
+            for i_task, (inputs, kwargs) in enumerate(tasks):
+                if any(isinstance(para, Iterator) for para in inputs.values()):
+                    continue
+                descs = {key: _share_array(para, shms) for key, para in inputs.items()}
+                futures[i_task] = executor.submit(_binning_worker, func, descs, kwargs)
+
+            # iterators cannot be sent to other processes
+            for i_task, (inputs, kwargs) in enumerate(tasks):
+                if i_task not in futures:
+                    results[i_task] = func(**inputs, **kwargs)
+
+            for i_task, future in futures.items():
+                results[i_task] = future.result()
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    return results
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 17:05:31
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 17:05:31
+
+### cache of binning results (in memory and on disk)
+
+__all__ = ["BinningCache"]
+# examples need data, not run by pytest-doctestplus
+__doctest_skip__ = ["BinningCache"]
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+
+import numpy as np
+
+from .Binning import _is_file_column
+
+logger = logging.getLogger(__name__)
+
+# version of the cached results, part of every key
+#   (to be increased when the binning or the stored format changes, so that older on-disk results are not used)
+CACHE_VERSION = 1
+
+# number of 64-bit words combined at once by the content hash
+HASH_BLOCK = 2**16
+# fixed odd multipliers of the content hash (one per word of a block)
+_HASH_KEYS = np.random.default_rng(20261018).integers(0, 2**63, size=HASH_BLOCK, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+def _content_hash(para):
+    """
+    Fast hash of the content of an array
+        each block of 64-bit words is reduced to sum(word * key) modulo 2**64
+        (a multilinear hash, which changes with any single modified value),
+        the block sums are then hashed together with the dtype and shape
+        about 5 times faster than hashlib on the raw bytes
+        strided arrays are copied one block at a time (same hash as a contiguous copy)
+    """
+
+    para = np.asarray(para)
+    # a view for contiguous arrays, otherwise slices of para.flat are copies in C order
+    flat = para.reshape(-1) if para.flags.c_contiguous else para.flat
+
+    # blocks of whole elements and whole words (only the last one has a partial word)
+    itemsize = max(para.itemsize, 1)
+    step = np.lcm(itemsize, 8) // itemsize
+    block_size = max((HASH_BLOCK*8) // (itemsize*step), 1) * step
+
+    buf = np.empty(HASH_BLOCK, dtype=np.uint64)
+    sums = np.empty((para.size + block_size - 1) // block_size, dtype=np.uint64)
+    tail = b''
+    for i_block, i_start in enumerate(range(0, para.size, block_size)):
+        raw = np.ascontiguousarray(flat[i_start:i_start+block_size]).view(np.uint8)
+        n_words = len(raw) // 8
+        prod = buf[:n_words]
+        np.multiply(raw[:n_words*8].view(np.uint64), _HASH_KEYS[:n_words], out=prod)
+        sums[i_block] = prod.sum(dtype=np.uint64)
+        tail = raw[n_words*8:].tobytes()
+
+    digest = hashlib.sha1(f'{para.dtype.str}{para.shape}'.encode())
+    digest.update(sums.tobytes())
+    digest.update(tail)
+
+    return digest.hexdigest()
+
+def _input_key(para):
+    """
+    Key of one binning input
+        files (and file columns) are identified by their path, size and modification time (without reading them)
+        iterators cannot be identified (None)
+    """
+
+    if para is None:
+        return 'None'
+    if isinstance(para, Iterator):
+        return None
+    if _is_file_column(para):
+        return f'{_input_key(para[0])}:{para[1]}'
+    if isinstance(para, (str, os.PathLike)):
+        path = os.path.abspath(os.fspath(para))
+        stat = os.stat(path)
+        return f'file:{path}:{stat.st_size}:{stat.st_mtime_ns}'
+    return _content_hash(para)
+
+def _kwarg_key(val):
+    """
+    Stable representation of one binning parameter
+    """
+
+    if (val is None) or isinstance(val, (bool, str)):
+        return repr(val)
+    if isinstance(val, type):
+        return np.dtype(val).str
+    try:
+        return repr(np.asarray(val, dtype=float).tolist())
+    except (TypeError, ValueError):
+        return repr(val)
+
+class BinningCache:
+    """
+    LRU cache of binning results, keyed by the content of the inputs and the bin specification
+        results are kept in memory up to max_bytes, and optionally stored in cache_dir as .npz files,
+        so that re-rendering the same data with a different style skips the binning
+
+    Parameters
+    ----------
+    max_bytes : int, default: 2**28
+        size limit of the in-memory results (the least recently used ones are dropped first)
+
+    cache_dir : str, default: None
+        directory of the on-disk store (None: in memory only)
+
+    Examples
+    --------
+    >>> cache = BinningCache(cache_dir='./bin_cache')
+    >>> HistPlotFunc(outpath, paras, wgs, COLORs, LABELs, nbins, XRANGE, bin_cache=cache)
+    >>> cache.stats
+    """
+
+    def __init__(self, max_bytes=2**28, cache_dir=None):
+
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._results = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._stats = dict(hits=0, disk_hits=0, misses=0, uncached=0)
+
+    @property
+    def stats(self):
+        """
+        Hit/miss statistics
+            hits: found in memory, disk_hits: loaded from cache_dir,
+            misses: binned and stored, uncached: binned without caching (iterator inputs)
+        """
+
+        with self._lock:
+            return dict(self._stats, entries=len(self._results), nbytes=self._nbytes)
+
+    def clear(self, disk=False):
+        """
+        Drop the in-memory results (and the on-disk store if disk=True)
+        """
+
+        with self._lock:
+            self._results.clear()
+            self._nbytes = 0
+            for key in self._stats:
+                self._stats[key] = 0
+
+        if disk and (self.cache_dir is not None):
+            for file in os.listdir(self.cache_dir):
+                if file.endswith('.npz'):
+                    os.remove(os.path.join(self.cache_dir, file))
+
+    def key(self, func, inputs, kwargs):
+        """
+        Cache key of func(**inputs, **kwargs), None if the inputs cannot be identified
+        """
+
+        input_keys = {name: _input_key(para) for name, para in inputs.items()}
+        if any(input_key is None for input_key in input_keys.values()):
+            return None
+
+        digest = hashlib.sha1(f'{CACHE_VERSION}:{func.__name__}'.encode())
+        for name in sorted(input_keys):
+            digest.update(f'{name}={input_keys[name]};'.encode())
+        for name in sorted(kwargs):
+            digest.update(f'{name}={_kwarg_key(kwargs[name])};'.encode())
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Cached result (tuple of arrays) of a key, None if not cached
+            (counted as a miss, or as uncached for the None key of unidentified inputs)
+        """
+
+        if key is None:
+            with self._lock:
+                self._stats['uncached'] += 1
+            return None
+
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._stats['hits'] += 1
+                return tuple(arr.copy() for arr in self._results[key])
+
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f'{key}.npz')
+            if os.path.isfile(path):
+                with np.load(path) as data:
+                    res = tuple(data[f'arr_{i}'] for i in range(len(data.files)))
+                self._store(key, res)
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+                return tuple(arr.copy() for arr in res)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key, res):
+        """
+        Store a result (tuple of arrays) in memory and in cache_dir
+        """
+
+        res = tuple(np.array(arr) for arr in res)
+        self._store(key, res)
+
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f'{key}.npz')
+            # write then rename, so that readers never see a partial file
+            path_tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(path_tmp, 'wb') as file:
+                np.savez(file, *res)
+            os.replace(path_tmp, path)
+
+    def _store(self, key, res):
+        """
+        Add a result to the in-memory LRU and drop the oldest ones above max_bytes
+        """
+
+        nbytes = sum(arr.nbytes for arr in res)
+        with self._lock:
+            if key in self._results:
+                self._nbytes -= sum(arr.nbytes for arr in self._results.pop(key))
+            self._results[key] = res
+            self._nbytes += nbytes
+            while (self._nbytes > self.max_bytes) and (len(self._results) > 1):
+                _, res_old = self._results.popitem(last=False)
+                self._nbytes -= sum(arr.nbytes for arr in res_old)
+
+    def compute(self, func, inputs, kwargs):
+        """
+        func(**inputs, **kwargs) through the cache
+        """
+
+        key = self.key(func, inputs, kwargs)
+        res = self.get(key)
+        if res is None:
+            res = func(**inputs, **kwargs)
+            if key is not None:
+                self.put(key, res)
+
+        return res
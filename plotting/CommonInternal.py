@@ -5,11 +5,341 @@
 
 ### some internal functions used by main modules
 
+import os
+import numbers
 import functools
+import threading
+import contextlib
 
-import matplotlib.pyplot as plt
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.lines import Line2D
+from matplotlib.collections import Collection, QuadMesh
+from matplotlib.patches import Patch
 
-def _vhlines(vORh, lines, line_styles=None, line_colors=None, line_labels=None, line_widths=None, ax=plt):
+from .Binning import compute_hist, _is_streamed
+from .Stats import _mark_phase, _phase, _record_output, _active_recorder
+
+# style of all the figures, applied within _figure_context
+_BASE_RC = {
+    'xtick.direction': 'in',
+    'ytick.direction': 'in',
+    'xtick.top': True,
+    'ytick.right': True,
+    'font.family': 'serif',
+}
+
+class _BuildDrawLock:
+    """
+    rcParams are global to the process, and read while building and while drawing:
+        figures are built one at a time within their rcParams,
+        built figures sharing the same rcParams are drawn concurrently (the rcParams are set once for all of them),
+        builds are reentrant, and waiting builds go before new draws
+    """
+
+    def __init__(self):
+
+        self._condition = threading.Condition()
+        self._builder = None
+        self._depth = 0
+        self._N_builds_waiting = 0
+        self._N_draws = 0
+        self._draw_rc = None
+        self._draw_rc_context = None
+
+    @contextlib.contextmanager
+    def build(self):
+
+        thread = threading.get_ident()
+        with self._condition:
+            if self._builder != thread:
+                self._N_builds_waiting += 1
+                self._condition.wait_for(lambda: (self._builder is None) and (self._N_draws == 0))
+                self._N_builds_waiting -= 1
+                self._builder = thread
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._builder = None
+                    self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def draw(self, rc):
+
+        # drawn within a build of this thread
+        if self._builder == threading.get_ident():
+            with mpl.rc_context(rc=rc):
+                yield
+            return
+
+        with self._condition:
+            self._condition.wait_for(lambda: (self._builder is None) and (self._N_builds_waiting == 0)
+                                            and ((self._N_draws == 0) or (rc == self._draw_rc)))
+            if self._N_draws == 0:
+                self._draw_rc = rc
+                self._draw_rc_context = mpl.rc_context(rc=rc)
+                self._draw_rc_context.__enter__()
+            self._N_draws += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._N_draws -= 1
+                if self._N_draws == 0:
+                    self._draw_rc_context.__exit__(None, None, None)
+                    self._draw_rc = self._draw_rc_context = None
+                    self._condition.notify_all()
+
+_RC_LOCK = _BuildDrawLock()
+
+@contextlib.contextmanager
+def _figure_context(font_size=12, usetex=False, rc=None):
+    """
+    Scoped matplotlib settings for building one figure
+        the settings are restored when leaving, and other threads wait meanwhile,
+        the figure is drawn after leaving (see _finish_figure)
+
+    Parameters
+    ----------
+    font_size : float, default: 12
+
+    usetex : bool, default: False
+
+    rc : dict, default: None
+        other rcParams (overwriting the ones above)
+
+    Yields
+    ------
+        the full rcParams dictionary (to draw returned figures later with the same settings)
+    """
+
+    params = dict(_BASE_RC)
+    params['font.size'] = font_size
+    params['text.usetex'] = usetex
+    if rc is not None:
+        params.update(rc)
+
+    _mark_phase('wait')
+    with _RC_LOCK.build(), mpl.rc_context(rc=params):
+        _mark_phase('prepare')
+        yield params
+
+@contextlib.contextmanager
+def _draw_context(rc, exclusive=False):
+    """
+    Drawing a figure built within _figure_context
+        drawn within the rcParams it was built with, concurrently with the figures sharing them,
+        LaTeX figures (and exclusive=True) are drawn one at a time (LaTeX runs in the cache directory)
+    """
+
+    _mark_phase('wait')
+    if exclusive or rc['text.usetex']:
+        with _RC_LOCK.build(), mpl.rc_context(rc=rc):
+            yield
+    else:
+        with _RC_LOCK.draw(rc):
+            yield
+
+class _TimedFigure(Figure):
+    """
+    Figure with tight_layout timed as its own phase (used when the renders are recorded)
+    """
+
+    def tight_layout(self, *args, **kwargs):
+        with _phase('layout'):
+            return super().tight_layout(*args, **kwargs)
+
+def _new_figure(outpath, **fig_kw):
+    """
+    An empty figure
+        outpath='show': a pyplot figure (shown in a window)
+        otherwise: a standalone Figure with its own Agg canvas, unknown to pyplot
+
+    **fig_kw : passed to matplotlib.figure.Figure
+    """
+
+    _mark_phase('artists')
+    if _active_recorder() is not None:
+        fig_kw.setdefault('FigureClass', _TimedFigure)
+
+    if outpath == 'show':
+        import matplotlib.pyplot as plt
+        return plt.figure(**fig_kw)
+
+    fig = fig_kw.pop('FigureClass', Figure)(**fig_kw)
+    FigureCanvasAgg(fig)
+
+    return fig
+
+def _element_count(artist):
+    """
+    Number of data elements (points, segments or vertices) drawn by an artist
+    """
+
+    if isinstance(artist, Line2D):
+        return len(artist.get_xydata())
+    if isinstance(artist, QuadMesh):
+        return artist.get_coordinates().shape[0] * artist.get_coordinates().shape[1]
+    if isinstance(artist, Collection):
+        # one path (polygon or marker) or one path per element (segments)
+        paths = artist.get_paths()
+        N_vertices = len(paths[0].vertices) if len(paths) == 1 else len(paths)
+        return max(len(artist.get_offsets()), N_vertices)
+    if isinstance(artist, Patch):
+        return len(artist.get_path().vertices)
+
+    return 0
+
+def _rasterize_dense(fig, rasterize_threshold=100000):
+    """
+    Rasterize the data artists with more than rasterize_threshold elements,
+        axes, text and legends are kept as vectors
+        (only changes vector outputs, where the rasterized artists are drawn at the savefig dpi)
+
+    Parameters
+    ----------
+    fig : matplotlib Figure object
+
+    rasterize_threshold : int, default: 100000
+        None: nothing is changed, 0: all the data artists are rasterized
+
+    Returns
+    -------
+        None
+    """
+
+    if rasterize_threshold is None:
+        return
+
+    for ax in fig.axes:
+        for artist in [*ax.lines, *ax.collections, *ax.patches]:
+            artist.set_rasterized(_element_count(artist) > rasterize_threshold)
+
+def _finish_figure(fig, outpath, rc, message, dpi=300, fig_format=None, rasterize_threshold=100000, writer=None,
+                    **savefig_kw):
+    """
+    Show, save or return a figure built within _figure_context (called after leaving it)
+
+    Parameters
+    ----------
+    fig : matplotlib Figure object
+
+    outpath : str or None
+        'show': shown in a window
+        None: returned as it is (keeping rc for later drawing)
+        otherwise: saved to outpath
+
+    rc : dict
+        rcParams yielded by _figure_context
+
+    message : str
+        printed before outpath once saved
+
+    dpi : float, default: 300
+        resolution of raster outputs and of rasterized artists
+
+    fig_format : str, default: None
+        output format (png, pdf, svg, ...), from the outpath extension if None
+
+    rasterize_threshold : int, default: 100000
+        see _rasterize_dense
+
+    writer : AsyncWriter, default: None
+        drawn here and written by the writer thread
+
+    **savefig_kw : passed to matplotlib.figure.Figure.savefig
+
+    Returns
+    -------
+        fig if outpath is None, a Future with a writer, otherwise None
+    """
+
+    if _active_recorder() is not None:
+        artists = [artist for ax in fig.axes for artist in [*ax.lines, *ax.collections, *ax.patches, *ax.images]]
+        _record_output(n_artists=len(artists), n_elements=sum(_element_count(artist) for artist in artists))
+
+    if outpath is None:
+        fig._plotting_rc = rc
+        return fig
+
+    if outpath == 'show':
+        import matplotlib.pyplot as plt
+        with _draw_context(rc, exclusive=True):
+            _mark_phase('draw')
+            plt.show()
+            plt.close(fig)
+        return
+
+    _rasterize_dense(fig, rasterize_threshold)
+
+    # savefig draws the figure, then encodes it once drawn
+    with _draw_context(rc):
+        _mark_phase('draw')
+        cid = fig.canvas.mpl_connect('draw_event', lambda event: _mark_phase('encode'))
+        try:
+            if writer is not None:
+                return writer.submit(fig, outpath, message=message, dpi=dpi, fig_format=fig_format, **savefig_kw)
+            fig.savefig(outpath, dpi=dpi, format=fig_format, **savefig_kw)
+        finally:
+            fig.canvas.mpl_disconnect(cid)
+    if isinstance(outpath, str) and _active_recorder() is not None:
+        _record_output(output_bytes=os.path.getsize(outpath))
+    print(message, outpath)
+
+def _error_array(err, xvals):
+    """
+    Errors of one series as accepted by errorbar, arrays are used without copying
+        symmetric: a scalar or N_points values
+        asymmetric: (lower, upper) (each a scalar or N_points values), a 2xN_points array,
+                    an (N_points, 2) array, or N_points records with two fields
+        an array of 2 values is (lower, upper), also when N_points is 2
+
+    Parameters
+    ----------
+    err : None, float, array-like or structured array
+
+    xvals : array-like or float
+        positions of the series (N_points values, or a single point)
+
+    Returns
+    -------
+        None, a scalar, an array of shape (N_points,), or a view of shape (2, N_points) or (2, 1)
+    """
+
+    if err is None:
+        return None
+    N_points = len(xvals) if hasattr(xvals, '__len__') else 1
+
+    err = np.asarray(err)
+    if err.dtype.names is not None:
+        if len(err.dtype.names) != 2:
+            raise Exception(f'Error records need two fields (lower, upper), got {err.dtype.names}!')
+        # a view when both fields have the same type
+        err = structured_to_unstructured(err, copy=False)
+
+    if err.ndim == 0:
+        return err
+    if err.ndim == 1:
+        if len(err) == 2:
+            return err.reshape(2, 1)
+        if len(err) == N_points:
+            return err
+    elif err.ndim == 2:
+        if err.shape[0] == 2 and err.shape[1] in (1, N_points):
+            return err
+        if err.shape == (N_points, 2):
+            return err.T
+
+    raise Exception(f'Unsupported shape of errors {err.shape} for {N_points} points!')
+
+def _vhlines(vORh, lines, line_styles=None, line_colors=None, line_labels=None, line_widths=None, ax=None):
     """
     Add vertical or horizontal lines to the main plots
 
@@ -29,7 +359,7 @@ def _vhlines(vORh, lines, line_styles=None, line_colors=None, line_labels=None,
 
     line_widths : array-like of floats, default: 1
 
-    ax : matplotlib Axes object, default: matplotlib.pyplot
+    ax : matplotlib Axes object
 
     Returns
     -------
@@ -64,3 +394,311 @@ def _vhlines(vORh, lines, line_styles=None, line_colors=None, line_labels=None,
             ax.axhline(y=line, ls=line_style, label=line_label, color=line_color, linewidth=line_width)
         else:
             raise Exception(f'Unsupported vORh value: {vORh}')
+
+
+def _normalise_hist(counts, edges, DENSITY=False, cumulative=False, sumw2=None, total=None):
+    """
+    Density and cumulative transformations of pre-computed histogram counts,
+        same as matplotlib.pyplot.hist, propagated to the sum of squared weights
+
+    Parameters
+    ----------
+    counts : array-like of floats
+        (weighted) number counts in each bin
+
+    edges : array-like of floats
+        bin edges (len(counts) + 1)
+
+    DENSITY : bool, default: False
+        normalise the counts as in matplotlib.pyplot.hist
+
+    cumulative : bool or -1, default: False
+        cumulative counts as in matplotlib.pyplot.hist
+
+    sumw2 : array-like of floats, default: None
+        sum of squared weights in each bin (variance of the counts)
+
+    total : float, default: None
+        normalisation for DENSITY (the sum of the counts if None)
+
+    Returns
+    -------
+        (counts, sumw2) as float arrays (sumw2 is None if not provided)
+    """
+
+    counts = np.asarray(counts, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    if len(edges) != len(counts) + 1:
+        raise Exception(f'Inconsistent counts ({len(counts)}) and edges ({len(edges)})!')
+    if sumw2 is not None:
+        sumw2 = np.asarray(sumw2, dtype=float)
+
+    # bins are independent: the variance scales with the square of the normalisation
+    #   and cumulates in the same way as the counts
+    if DENSITY:
+        scale = 1. / (np.sum(counts) if total is None else total) / np.diff(edges)
+        counts = counts * scale
+        if sumw2 is not None:
+            sumw2 = sumw2 * scale**2
+
+    if cumulative:
+        if DENSITY:
+            counts = counts * np.diff(edges)
+            if sumw2 is not None:
+                sumw2 = sumw2 * np.diff(edges)**2
+        if cumulative < 0:
+            counts = np.cumsum(counts[::-1])[::-1]
+            if sumw2 is not None:
+                sumw2 = np.cumsum(sumw2[::-1])[::-1]
+        else:
+            counts = np.cumsum(counts)
+            if sumw2 is not None:
+                sumw2 = np.cumsum(sumw2)
+
+    return counts, sumw2
+
+def _stairs_hist(ax, counts, edges, DENSITY=False, cumulative=False, HISTTYPE='step', **kwargs):
+    """
+    Draw pre-computed histogram counts as a step patch
+
+    Parameters
+    ----------
+    ax : matplotlib Axes object
+
+    counts : array-like of floats
+        (weighted) number counts in each bin
+
+    edges : array-like of floats
+        bin edges (len(counts) + 1)
+
+    DENSITY : bool, default: False
+        normalise the counts as in matplotlib.pyplot.hist
+
+    cumulative : bool or -1, default: False
+        cumulative counts as in matplotlib.pyplot.hist
+
+    HISTTYPE : {'step', 'stepfilled', 'bar', 'barstacked'}, default: 'step'
+        only 'step' is drawn without filling
+
+    **kwargs : passed to matplotlib.axes.Axes.stairs
+
+    Returns
+    -------
+        matplotlib.patches.StepPatch
+    """
+
+    counts, _ = _normalise_hist(counts, edges, DENSITY=DENSITY, cumulative=cumulative)
+
+    return ax.stairs(counts, edges, fill=(HISTTYPE != 'step'), **kwargs)
+
+def _hist_errors(ax, counts, sumw2, edges, hist_errors='bar', xlog=False, color=None, alpha=None):
+    """
+    Draw the statistical uncertainties sqrt(sumw2) of (normalised) histogram counts
+
+    Parameters
+    ----------
+    ax : matplotlib Axes object
+
+    counts : array-like of floats
+        (normalised) counts in each bin
+
+    sumw2 : array-like of floats
+        (normalised) sum of squared weights in each bin
+
+    edges : array-like of floats
+        bin edges (len(counts) + 1)
+
+    hist_errors : {'bar', 'band'}, default: 'bar'
+        error bars at the bin centres or a shaded band between the edges
+
+    xlog : bool, default: False
+        logarithmic bins (error bars at the geometric centres)
+
+    color : color, default: None
+
+    alpha : float, default: None
+        transparency of the band (0.3 if None)
+
+    Returns
+    -------
+        matplotlib.container.ErrorbarContainer or matplotlib.patches.StepPatch
+    """
+
+    counts = np.asarray(counts, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    errors = np.sqrt(sumw2)
+
+    if hist_errors == 'bar':
+        if xlog:
+            centres = np.sqrt(edges[:-1] * edges[1:])
+        else:
+            centres = 0.5 * (edges[:-1] + edges[1:])
+        return ax.errorbar(centres, counts, yerr=errors, fmt='none', ecolor=color, alpha=alpha)
+    elif hist_errors == 'band':
+        return ax.stairs(counts + errors, edges, baseline=counts - errors, fill=True,
+                        color=color, alpha=(0.3 if alpha is None else alpha), lw=0)
+    else:
+        raise Exception(f'Unsupported hist_errors value: {hist_errors}')
+
+def _pcolormesh_hist2d(ax, counts, xedges, yedges, DENSITY=False, **kwargs):
+    """
+    Draw a pre-computed 2D histogram in the same way as matplotlib.pyplot.hist2d
+
+    Parameters
+    ----------
+    ax : matplotlib Axes object
+
+    counts : 2D array-like of floats, shape (len(xedges)-1, len(yedges)-1)
+        (weighted) number counts in each bin
+
+    xedges, yedges : array-like of floats
+        bin edges
+
+    DENSITY : bool, default: False
+        normalise the counts as in matplotlib.pyplot.hist2d
+
+    **kwargs : passed to matplotlib.axes.Axes.pcolormesh
+
+    Returns
+    -------
+        (counts, xedges, yedges, matplotlib.collections.QuadMesh)
+    """
+
+    counts = np.asarray(counts)
+    if DENSITY:
+        counts = counts / np.sum(counts) / np.outer(np.diff(xedges), np.diff(yedges))
+
+    mesh = ax.pcolormesh(xedges, yedges, counts.T, **kwargs)
+
+    return counts, xedges, yedges, mesh
+
+def _hist2d_norm(grids, count_scale=[None, None], count_log=False):
+    """
+    One colour normalisation for several 2D histograms
+
+    Parameters
+    ----------
+    grids : list of 2D array-like of floats
+        (weighted) number counts of all the panels
+
+    count_scale : [vmin, vmax], default: [None, None]
+        None: the minimum (positive minimum for count_log) or maximum of all the grids
+
+    count_log : bool, default: False
+        logarithmic colour scale
+
+    Returns
+    -------
+        matplotlib.colors.Normalize or matplotlib.colors.LogNorm
+    """
+
+    vmin, vmax = count_scale
+
+    if vmin is None:
+        if count_log:
+            positive = [np.amin(grid[grid > 0]) for grid in map(np.asarray, grids) if np.any(grid > 0)]
+            vmin = min(positive) if positive else None
+        else:
+            vmin = min(np.nanmin(grid) for grid in grids)
+    if vmax is None:
+        vmax = max(np.nanmax(grid) for grid in grids)
+
+    if count_log:
+        return mpl.colors.LogNorm(vmin=vmin, vmax=vmax)
+    else:
+        return mpl.colors.Normalize(vmin=vmin, vmax=vmax)
+
+def _is_single_para(paras):
+    """
+    Whether paras is one parameter (array of values, file, file column or iterator of chunks)
+        rather than a list of parameters (2D arrays are split into columns by the caller)
+    """
+
+    if _is_streamed(paras):
+        return True
+    if isinstance(paras, np.ndarray):
+        return paras.ndim <= 1
+    if isinstance(paras, (list, tuple)):
+        return (len(paras) == 0) or isinstance(paras[0], (numbers.Number, np.generic))
+    raise Exception(f'Unsupported input type {type(paras)} for the histogram!')
+
+def _prebinned_hist_inputs(paras, wgs, nbins, XRANGE, xlog=False, sumw2=False):
+    """
+    Bin one or several parameters with compute_hist and turn the counts into
+        matplotlib.pyplot.hist inputs (left bin edges weighted by the counts),
+        so that hist only draws while keeping its stacking, density and legend behaviour
+
+    Returns
+    -------
+        (x, weights, edges) to be passed as hist(x=x, weights=weights, bins=edges)
+        sumw2=True: (x, weights, sumw2, edges), with the sum of squared weights of each parameter
+    """
+
+    # 2D arrays are one parameter per column (as in matplotlib.pyplot.hist)
+    if isinstance(paras, np.ndarray) and (paras.ndim == 2):
+        paras = list(paras.T)
+    if isinstance(wgs, np.ndarray) and (wgs.ndim == 2):
+        wgs = list(wgs.T)
+
+    # one parameter or a list of parameters
+    if _is_single_para(paras):
+        res = compute_hist(paras, nbins, XRANGE, wg=wgs, xlog=xlog, sumw2=sumw2)
+        return (res[-1][:-1],) + res
+
+    counts_list = []
+    sumw2_list = []
+    for i_para, para in enumerate(paras):
+        wg = wgs[i_para] if wgs is not None else None
+        res = compute_hist(para, nbins, XRANGE, wg=wg, xlog=xlog, sumw2=sumw2)
+        counts_list.append(res[0])
+        if sumw2:
+            sumw2_list.append(res[1])
+        edges = res[-1]
+
+    if sumw2:
+        return [edges[:-1]] * len(counts_list), counts_list, sumw2_list, edges
+    return [edges[:-1]] * len(counts_list), counts_list, edges
+
+def _hist_errors_list(ax, counts_list, sumw2_list, edges, hist_errors='bar', DENSITY=False, cumulative=False,
+                        STACKED=False, xlog=False, COLORs=None):
+    """
+    Draw the uncertainties of one or several histograms drawn with matplotlib.pyplot.hist,
+        following its density, cumulative and stacking conventions
+        (stacked histograms get the uncertainties of the running sums)
+
+    Parameters
+    ----------
+    counts_list, sumw2_list : (list of) array-like of floats
+        sum of weights and of squared weights in each bin, for each parameter
+
+    edges : array-like of floats
+        bin edges
+
+    COLORs : (list of) colors, default: None
+
+    the rest : see _normalise_hist and _hist_errors
+
+    Returns
+    -------
+        None
+    """
+
+    # one parameter or a list of parameters
+    if np.ndim(counts_list[0]) == 0:
+        counts_list, sumw2_list, COLORs = [counts_list], [sumw2_list], [COLORs]
+
+    # matplotlib normalises the whole stack at once
+    total = np.sum([np.sum(counts) for counts in counts_list]) if (DENSITY and STACKED) else None
+
+    counts_top = 0.
+    sumw2_top = 0.
+    for i_para, counts in enumerate(counts_list):
+        if STACKED:
+            counts_top = counts_top + np.asarray(counts, dtype=float)
+            sumw2_top = sumw2_top + np.asarray(sumw2_list[i_para], dtype=float)
+        else:
+            counts_top, sumw2_top = counts, sumw2_list[i_para]
+        counts_norm, sumw2_norm = _normalise_hist(counts_top, edges,
+                                        DENSITY=DENSITY, cumulative=cumulative, sumw2=sumw2_top, total=total)
+        _hist_errors(ax, counts_norm, sumw2_norm, edges, hist_errors=hist_errors, xlog=xlog,
+                    color=(COLORs[i_para] if COLORs is not None else None))
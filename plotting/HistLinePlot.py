@@ -13,22 +13,16 @@ import logging
 
 import numpy as np
 
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-mpl.rcParams['xtick.direction'] = 'in'
-mpl.rcParams['ytick.direction'] = 'in'
-mpl.rcParams['xtick.top'] = True
-mpl.rcParams['ytick.right'] = True
-plt.rcParams['font.family'] = 'serif'
-
 from matplotlib.ticker import AutoMinorLocator, LogLocator
 from matplotlib.patches import Rectangle
 
-from .CommonInternal import _vhlines
+from .CommonInternal import _figure_context, _new_figure, _finish_figure
+from .CommonInternal import _vhlines, _error_array, _prebinned_hist_inputs, _hist_errors_list
+from .Stats import _instrumented
 
-logging.basicConfig(format='%(name)s : %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@_instrumented
 def HistErrorPlotFunc(outpath,
                 paras_hist, wgs_hist, COLORs_hist, 
                 xvals_error, yvals_error, COLORs_error,
@@ -48,20 +42,26 @@ def HistErrorPlotFunc(outpath,
                 ylog_hist=False, ylog_error=False, 
                 invertY_hist=False, invertY_error=False, 
                 loc_legend='best', frameon_legend=False,
-                font_size=12, usetex=False):
+                font_size=12, usetex=False,
+                hist_errors=None,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Histogram and line plot for multiple parameters
+        yerrs_error, xerrs_error: errors of each series (None: no error bars), symmetric (N values),
+                or lower and upper: (lower, upper), a 2xN array, an (N, 2) array or N records with two fields
+                (arrays are used as views, without copying)
+        hist_errors='bar' or 'band': sum of weights and of squared weights are accumulated in one pass
+                        and sqrt(sumw2) is drawn on the histogram as error bars or a shaded band,
+                        returns (res, hists): res is returned as without hist_errors
+                        (the figure with outpath=None, a Future of the write with a writer, None otherwise)
+                        and hists = [(counts, sumw2, edges), ...] for all histogram parameters
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     if DENSITY and (wgs_hist is not None):
         logger.warning('DENSITY and wgs are provided simultaneously!!!')
 
@@ -71,161 +71,172 @@ def HistErrorPlotFunc(outpath,
     rect_scatter = [left, bottom, width, height]
     rect_histx = [left, bottom + height + spacing, width, 0.14]
 
-    # start with a square Figure
-    fig = plt.figure(figsize=(8, 8))
-    ax = fig.add_axes(rect_scatter)
-    ax_hist = fig.add_axes(rect_histx, sharex=ax)
-
-    ### >>>>>>>>>> for histogram plots
-    if XRANGE is not None:
-        bin_min = XRANGE[0]
-        bin_max = XRANGE[1]
-    else:
-        bin_min = np.amin(paras_hist)
-        bin_max = np.amax(paras_hist)
-    if xlog:
-        logbins = np.logspace(np.log10(bin_min), np.log10(bin_max), nbins_hist)
-        ax_hist.hist(x=paras_hist, bins=logbins, cumulative=cumulative,
-                    density=DENSITY, weights=wgs_hist, 
-                    color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
-    else:
-        ax_hist.hist(x=paras_hist, bins=nbins_hist, cumulative=cumulative, 
-                    range=[bin_min, bin_max], density=DENSITY, 
-                    weights=wgs_hist, color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
-
-    if YRANGE_hist is not None:
-        ax_hist.set_ylim(YRANGE_hist[0], YRANGE_hist[1])
-
-    if ylog_hist:
-        ax_hist.set_yscale('log')
-
-    if ytick_min_label:
-        if ylog_hist:
-            ax_hist.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax_hist.yaxis.set_minor_locator(AutoMinorLocator())
-
-    if invertY_hist:
-        ax_hist.invert_yaxis()
-
-    ax_hist.set_ylabel(YLABEL_hist)
-
-    ax_hist.tick_params(labelbottom=False)
-
-    if (LABELs_hist is not None):
-        ax_hist.legend(frameon=frameon_legend, loc=loc_legend)
+    with _figure_context(font_size, usetex) as rc:
+        # start with a square Figure
+        fig = _new_figure(outpath, figsize=(8, 8))
+        ax = fig.add_axes(rect_scatter)
+        ax_hist = fig.add_axes(rect_histx, sharex=ax)
 
-    ### >>>>>>>>>> for error bar plots
-    for i, xvl in enumerate(xvals_error):
-        yvl = yvals_error[i]
-        if yerrs_error is not None:
-            yerr = yerrs_error[i]
-            if yerr is not None:
-                yerr = np.array(yerr)
-                yerr = np.vstack([yerr[0], yerr[1]])
+        ### >>>>>>>>>> for histogram plots
+        if XRANGE is not None:
+            bin_min = XRANGE[0]
+            bin_max = XRANGE[1]
         else:
-            yerr = None
-
-        if xerrs_error is not None:
-            xerr = xerrs_error[i]
-            if xerr is not None:
-                xerr = np.array(xerr)
-                xerr = np.vstack([xerr[0], xerr[1]])
+            bin_min = np.amin(paras_hist)
+            bin_max = np.amax(paras_hist)
+        hists = None
+        if hist_errors is not None:
+            # binned with compute_hist (nbins_hist edges for xlog, nbins_hist bins otherwise), hist only draws the counts
+            x_hist, counts_hist, sumw2_hist, bins_hist = _prebinned_hist_inputs(paras_hist, wgs_hist,
+                                                        (nbins_hist if xlog else nbins_hist+1), [bin_min, bin_max],
+                                                        xlog=xlog, sumw2=True)
+            ax_hist.hist(x=x_hist, bins=bins_hist, cumulative=cumulative,
+                        density=DENSITY, weights=counts_hist, 
+                        color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
+            _hist_errors_list(ax_hist, counts_hist, sumw2_hist, bins_hist, hist_errors=hist_errors,
+                            DENSITY=DENSITY, cumulative=cumulative, STACKED=STACKED, xlog=xlog, COLORs=COLORs_hist)
+            if np.ndim(counts_hist[0]) == 0:
+                hists = [(counts_hist, sumw2_hist, bins_hist)]
+            else:
+                hists = [(counts, sumw2_hist[i_para], bins_hist) for i_para, counts in enumerate(counts_hist)]
+        elif xlog:
+            # binned with the log10 path of compute_hist, hist only draws the counts
+            x_hist, counts_hist, logbins = _prebinned_hist_inputs(paras_hist, wgs_hist, nbins_hist, [bin_min, bin_max], xlog=True)
+            ax_hist.hist(x=x_hist, bins=logbins, cumulative=cumulative,
+                        density=DENSITY, weights=counts_hist, 
+                        color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
         else:
-            xerr = None
-
-        CR = COLORs_error[i]
+            ax_hist.hist(x=paras_hist, bins=nbins_hist, cumulative=cumulative, 
+                        range=[bin_min, bin_max], density=DENSITY, 
+                        weights=wgs_hist, color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
 
-        if LABELs_error is not None:
-            LAB = LABELs_error[i]
-        else:
-            LAB = None
-
-        if LINEs is not None:
-            LN = LINEs[i]
-        else:
-            LN = '--'
-        if LINEWs is not None:
-            LW = LINEWs[i]
-        else:
-            LW = 1
-
-        if POINTs is not None:
-            PI = POINTs[i]
-        else:
-            PI = 'o'
-        if POINTSs is not None:
-            MS = POINTSs[i]
-        else:
-            MS = 2
+        if YRANGE_hist is not None:
+            ax_hist.set_ylim(YRANGE_hist[0], YRANGE_hist[1])
 
-        if ERRORSIZEs is not None:
-            ERRORSIZE = ERRORSIZEs[i]
-        else:
-            ERRORSIZE = 2
+        if ylog_hist:
+            ax_hist.set_yscale('log')
+
+        if ytick_min_label:
+            if ylog_hist:
+                ax_hist.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax_hist.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if invertY_hist:
+            ax_hist.invert_yaxis()
+
+        ax_hist.set_ylabel(YLABEL_hist)
+
+        ax_hist.tick_params(labelbottom=False)
+
+        if (LABELs_hist is not None):
+            ax_hist.legend(frameon=frameon_legend, loc=loc_legend)
+
+        ### >>>>>>>>>> for error bar plots
+        for i, xvl in enumerate(xvals_error):
+            yvl = yvals_error[i]
+            if yerrs_error is not None:
+                yerr = _error_array(yerrs_error[i], xvl)
+            else:
+                yerr = None
+
+            if xerrs_error is not None:
+                xerr = _error_array(xerrs_error[i], xvl)
+            else:
+                xerr = None
+
+            CR = COLORs_error[i]
+
+            if LABELs_error is not None:
+                LAB = LABELs_error[i]
+            else:
+                LAB = None
+
+            if LINEs is not None:
+                LN = LINEs[i]
+            else:
+                LN = '--'
+            if LINEWs is not None:
+                LW = LINEWs[i]
+            else:
+                LW = 1
+
+            if POINTs is not None:
+                PI = POINTs[i]
+            else:
+                PI = 'o'
+            if POINTSs is not None:
+                MS = POINTSs[i]
+            else:
+                MS = 2
+
+            if ERRORSIZEs is not None:
+                ERRORSIZE = ERRORSIZEs[i]
+            else:
+                ERRORSIZE = 2
+
+            ax.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
+                color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
+
+        if YRANGE_error is not None:
+            ax.set_ylim(YRANGE_error[0], YRANGE_error[1])
 
-        ax.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
-            color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
+        if ylog_error:
+            ax.set_yscale('log')
 
-    if YRANGE_error is not None:
-        ax.set_ylim(YRANGE_error[0], YRANGE_error[1])
+        if ytick_min_label:
+            if ylog_error:
+                ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.yaxis.set_minor_locator(AutoMinorLocator())
 
-    if ylog_error:
-        ax.set_yscale('log')
+        if invertY_error:
+            ax.invert_yaxis()
 
-    if ytick_min_label:
-        if ylog_error:
-            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.yaxis.set_minor_locator(AutoMinorLocator())
+        ax.set_ylabel(YLABEL_error)
 
-    if invertY_error:
-        ax.invert_yaxis()
+        if (LABELs_error is not None):
+            ax.legend(frameon=frameon_legend, loc=loc_legend)
 
-    ax.set_ylabel(YLABEL_error)
+        ### >>>>>>>>>> common
+        if XRANGE is not None:
+            ax_hist.set_xlim(XRANGE[0], XRANGE[1])
 
-    if (LABELs_error is not None):
-        ax.legend(frameon=frameon_legend, loc=loc_legend)
+        if xlog:
+            ax_hist.set_xscale('log')
 
-    ### >>>>>>>>>> common
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
 
-    if xlog:
-        plt.xscale('log')
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
 
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+        if xtick_min_label:
+            if xlog:
+                ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.xaxis.set_minor_locator(AutoMinorLocator())
 
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+        if xtick_spe is not None:
+            ax_hist.set_xticks(xtick_spe[0], labels=xtick_spe[1])
 
-    if xtick_min_label:
-        if xlog:
-            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.xaxis.set_minor_locator(AutoMinorLocator())
+        if invertX:
+            ax_hist.invert_xaxis()
 
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
+        ax.set_xlabel(XLABEL)
+        if TITLE is not None:
+            ax_hist.set_title(TITLE)
 
-    if invertX:
-        plt.gca().invert_xaxis()
+    res = _finish_figure(fig, outpath, rc, "Histogram plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
 
-    ax.set_xlabel(XLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
+    if hist_errors is not None:
+        return res, hists
 
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Histogram plot saved as", outpath)
+    return res
 
 
+@_instrumented
 def HistTwinxErrorPlotFunc(outpath,
                 paras_hist, wgs_hist, COLORs_hist, 
                 xvals_error_left, yvals_error_left, COLORs_error_left,
@@ -248,20 +259,26 @@ def HistTwinxErrorPlotFunc(outpath,
                 ylog_hist=False, ylog_error_left=False, ylog_error_right=False,
                 invertY_hist=False, invertY_error_left=False, invertY_error_right=False, 
                 loc_legend='best', frameon_legend=False,
-                font_size=12, usetex=False):
+                font_size=12, usetex=False,
+                hist_errors=None,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Histogram and line plot for multiple parameters
+        yerrs_error_left/right, xerrs_error_left/right: errors of each series (None: no error bars), symmetric (N values),
+                or lower and upper: (lower, upper), a 2xN array, an (N, 2) array or N records with two fields
+                (arrays are used as views, without copying)
+        hist_errors='bar' or 'band': sum of weights and of squared weights are accumulated in one pass
+                        and sqrt(sumw2) is drawn on the histogram as error bars or a shaded band,
+                        returns (res, hists): res is returned as without hist_errors
+                        (the figure with outpath=None, a Future of the write with a writer, None otherwise)
+                        and hists = [(counts, sumw2, edges), ...] for all histogram parameters
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     if DENSITY and (wgs_hist is not None):
         logger.warning('DENSITY and wgs are provided simultaneously!!!')
 
@@ -271,230 +288,234 @@ def HistTwinxErrorPlotFunc(outpath,
     rect_scatter = [left, bottom, width, height]
     rect_histx = [left, bottom + height + spacing, width, 0.14]
 
-    # start with a square Figure
-    fig = plt.figure(figsize=(8, 8))
-    ax_left = fig.add_axes(rect_scatter)
-    ax_right = ax_left.twinx()
-    ax_hist = fig.add_axes(rect_histx, sharex=ax_left)
-
-    ### >>>>>>>>>> for histogram plots
-    if XRANGE is not None:
-        bin_min = XRANGE[0]
-        bin_max = XRANGE[1]
-    else:
-        bin_min = np.amin(paras_hist)
-        bin_max = np.amax(paras_hist)
-    if xlog:
-        logbins = np.logspace(np.log10(bin_min), np.log10(bin_max), nbins_hist)
-        ax_hist.hist(x=paras_hist, bins=logbins, cumulative=cumulative,
-                    density=DENSITY, weights=wgs_hist, 
-                    color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
-    else:
-        ax_hist.hist(x=paras_hist, bins=nbins_hist, cumulative=cumulative, 
-                    range=[bin_min, bin_max], density=DENSITY, 
-                    weights=wgs_hist, color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
-
-    if YRANGE_hist is not None:
-        ax_hist.set_ylim(YRANGE_hist[0], YRANGE_hist[1])
-
-    if ylog_hist:
-        ax_hist.set_yscale('log')
-
-    if ytick_min_label:
-        if ylog_hist:
-            ax_hist.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax_hist.yaxis.set_minor_locator(AutoMinorLocator())
-
-    if invertY_hist:
-        ax_hist.invert_yaxis()
-
-    ax_hist.set_ylabel(YLABEL_hist)
-
-    ax_hist.tick_params(labelbottom=False)
-
-    if (LABELs_hist is not None):
-        ax_hist.legend(frameon=frameon_legend, loc=loc_legend)
-
-    ### >>>>>>>>>> for error bar plots
-    ###### the left
-    for i, xvl in enumerate(xvals_error_left):
-        yvl = yvals_error_left[i]
-        if yerrs_error_left is not None:
-            yerr = yerrs_error_left[i]
-            if yerr is not None:
-                yerr = np.array(yerr)
-                yerr = np.vstack([yerr[0], yerr[1]])
+    with _figure_context(font_size, usetex) as rc:
+        # start with a square Figure
+        fig = _new_figure(outpath, figsize=(8, 8))
+        ax_left = fig.add_axes(rect_scatter)
+        ax_right = ax_left.twinx()
+        ax_hist = fig.add_axes(rect_histx, sharex=ax_left)
+
+        ### >>>>>>>>>> for histogram plots
+        if XRANGE is not None:
+            bin_min = XRANGE[0]
+            bin_max = XRANGE[1]
         else:
-            yerr = None
-
-        if xerrs_error_left is not None:
-            xerr = xerrs_error_left[i]
-            if xerr is not None:
-                xerr = np.array(xerr)
-                xerr = np.vstack([xerr[0], xerr[1]])
-        else:
-            xerr = None
-
-        CR = COLORs_error_left[i]
-
-        if LABELs_error_left is not None:
-            LAB = LABELs_error_left[i]
-        else:
-            LAB = None
-
-        if LINEs_left is not None:
-            LN = LINEs_left[i]
-        else:
-            LN = '--'
-        if LINEWs_left is not None:
-            LW = LINEWs_left[i]
-        else:
-            LW = 1
-
-        if POINTs_left is not None:
-            PI = POINTs_left[i]
+            bin_min = np.amin(paras_hist)
+            bin_max = np.amax(paras_hist)
+        hists = None
+        if hist_errors is not None:
+            # binned with compute_hist (nbins_hist edges for xlog, nbins_hist bins otherwise), hist only draws the counts
+            x_hist, counts_hist, sumw2_hist, bins_hist = _prebinned_hist_inputs(paras_hist, wgs_hist,
+                                                        (nbins_hist if xlog else nbins_hist+1), [bin_min, bin_max],
+                                                        xlog=xlog, sumw2=True)
+            ax_hist.hist(x=x_hist, bins=bins_hist, cumulative=cumulative,
+                        density=DENSITY, weights=counts_hist, 
+                        color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
+            _hist_errors_list(ax_hist, counts_hist, sumw2_hist, bins_hist, hist_errors=hist_errors,
+                            DENSITY=DENSITY, cumulative=cumulative, STACKED=STACKED, xlog=xlog, COLORs=COLORs_hist)
+            if np.ndim(counts_hist[0]) == 0:
+                hists = [(counts_hist, sumw2_hist, bins_hist)]
+            else:
+                hists = [(counts, sumw2_hist[i_para], bins_hist) for i_para, counts in enumerate(counts_hist)]
+        elif xlog:
+            # binned with the log10 path of compute_hist, hist only draws the counts
+            x_hist, counts_hist, logbins = _prebinned_hist_inputs(paras_hist, wgs_hist, nbins_hist, [bin_min, bin_max], xlog=True)
+            ax_hist.hist(x=x_hist, bins=logbins, cumulative=cumulative,
+                        density=DENSITY, weights=counts_hist, 
+                        color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
         else:
-            PI = 'o'
-        if POINTSs_left is not None:
-            MS = POINTSs_left[i]
-        else:
-            MS = 2
-
-        if ERRORSIZEs_left is not None:
-            ERRORSIZE = ERRORSIZEs_left[i]
-        else:
-            ERRORSIZE = 2
+            ax_hist.hist(x=paras_hist, bins=nbins_hist, cumulative=cumulative, 
+                        range=[bin_min, bin_max], density=DENSITY, 
+                        weights=wgs_hist, color=COLORs_hist, label=LABELs_hist, histtype=HISTTYPE, stacked=STACKED)
 
-        ax_left.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
-            color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
+        if YRANGE_hist is not None:
+            ax_hist.set_ylim(YRANGE_hist[0], YRANGE_hist[1])
 
-    if YRANGE_error_left is not None:
-        ax_left.set_ylim(YRANGE_error_left[0], YRANGE_error_left[1])
-
-    if ylog_error_left:
-        ax_left.set_yscale('log')
+        if ylog_hist:
+            ax_hist.set_yscale('log')
+
+        if ytick_min_label:
+            if ylog_hist:
+                ax_hist.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax_hist.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if invertY_hist:
+            ax_hist.invert_yaxis()
+
+        ax_hist.set_ylabel(YLABEL_hist)
+
+        ax_hist.tick_params(labelbottom=False)
+
+        if (LABELs_hist is not None):
+            ax_hist.legend(frameon=frameon_legend, loc=loc_legend)
+
+        ### >>>>>>>>>> for error bar plots
+        ###### the left
+        for i, xvl in enumerate(xvals_error_left):
+            yvl = yvals_error_left[i]
+            if yerrs_error_left is not None:
+                yerr = _error_array(yerrs_error_left[i], xvl)
+            else:
+                yerr = None
+
+            if xerrs_error_left is not None:
+                xerr = _error_array(xerrs_error_left[i], xvl)
+            else:
+                xerr = None
+
+            CR = COLORs_error_left[i]
+
+            if LABELs_error_left is not None:
+                LAB = LABELs_error_left[i]
+            else:
+                LAB = None
+
+            if LINEs_left is not None:
+                LN = LINEs_left[i]
+            else:
+                LN = '--'
+            if LINEWs_left is not None:
+                LW = LINEWs_left[i]
+            else:
+                LW = 1
+
+            if POINTs_left is not None:
+                PI = POINTs_left[i]
+            else:
+                PI = 'o'
+            if POINTSs_left is not None:
+                MS = POINTSs_left[i]
+            else:
+                MS = 2
+
+            if ERRORSIZEs_left is not None:
+                ERRORSIZE = ERRORSIZEs_left[i]
+            else:
+                ERRORSIZE = 2
+
+            ax_left.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
+                color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
+
+        if YRANGE_error_left is not None:
+            ax_left.set_ylim(YRANGE_error_left[0], YRANGE_error_left[1])
 
-    if ytick_min_label:
         if ylog_error_left:
-            ax_left.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax_left.yaxis.set_minor_locator(AutoMinorLocator())
-
-    if invertY_error_left:
-        ax_left.invert_yaxis()
-
-    ax_left.set_ylabel(YLABEL_error_left)
-
-    if (LABELs_error_left is not None):
-        ax_left.legend(frameon=frameon_legend, loc=loc_legend)
+            ax_left.set_yscale('log')
+
+        if ytick_min_label:
+            if ylog_error_left:
+                ax_left.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax_left.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if invertY_error_left:
+            ax_left.invert_yaxis()
+
+        ax_left.set_ylabel(YLABEL_error_left)
+
+        if (LABELs_error_left is not None):
+            ax_left.legend(frameon=frameon_legend, loc=loc_legend)
+
+        ###### the right
+        for i, xvl in enumerate(xvals_error_right):
+            yvl = yvals_error_right[i]
+            if yerrs_error_right is not None:
+                yerr = _error_array(yerrs_error_right[i], xvl)
+            else:
+                yerr = None
+
+            if xerrs_error_right is not None:
+                xerr = _error_array(xerrs_error_right[i], xvl)
+            else:
+                xerr = None
+
+            CR = COLORs_error_right[i]
+
+            if LABELs_error_right is not None:
+                LAB = LABELs_error_right[i]
+            else:
+                LAB = None
+
+            if LINEs_right is not None:
+                LN = LINEs_right[i]
+            else:
+                LN = '--'
+            if LINEWs_right is not None:
+                LW = LINEWs_right[i]
+            else:
+                LW = 1
+
+            if POINTs_right is not None:
+                PI = POINTs_right[i]
+            else:
+                PI = 'o'
+            if POINTSs_right is not None:
+                MS = POINTSs_right[i]
+            else:
+                MS = 2
+
+            if ERRORSIZEs_right is not None:
+                ERRORSIZE = ERRORSIZEs_right[i]
+            else:
+                ERRORSIZE = 2
+
+            ax_right.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
+                color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
+
+        if YRANGE_error_right is not None:
+            ax_right.set_ylim(YRANGE_error_right[0], YRANGE_error_right[1])
 
-    ###### the right
-    for i, xvl in enumerate(xvals_error_right):
-        yvl = yvals_error_right[i]
-        if yerrs_error_right is not None:
-            yerr = yerrs_error_right[i]
-            if yerr is not None:
-                yerr = np.array(yerr)
-                yerr = np.vstack([yerr[0], yerr[1]])
-        else:
-            yerr = None
+        if ylog_error_right:
+            ax_right.set_yscale('log')
 
-        if xerrs_error_right is not None:
-            xerr = xerrs_error_right[i]
-            if xerr is not None:
-                xerr = np.array(xerr)
-                xerr = np.vstack([xerr[0], xerr[1]])
-        else:
-            xerr = None
+        if ytick_min_label:
+            if ylog_error_right:
+                ax_right.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax_right.yaxis.set_minor_locator(AutoMinorLocator())
 
-        CR = COLORs_error_right[i]
+        if invertY_error_right:
+            ax_right.invert_yaxis()
 
-        if LABELs_error_right is not None:
-            LAB = LABELs_error_right[i]
-        else:
-            LAB = None
+        ax_right.set_ylabel(YLABEL_error_right)
 
-        if LINEs_right is not None:
-            LN = LINEs_right[i]
-        else:
-            LN = '--'
-        if LINEWs_right is not None:
-            LW = LINEWs_right[i]
-        else:
-            LW = 1
+        if (LABELs_error_right is not None):
+            ax_right.legend(frameon=frameon_legend, loc=loc_legend)
 
-        if POINTs_right is not None:
-            PI = POINTs_right[i]
-        else:
-            PI = 'o'
-        if POINTSs_right is not None:
-            MS = POINTSs_right[i]
-        else:
-            MS = 2
+        ### >>>>>>>>>> common
+        if XRANGE is not None:
+            ax_hist.set_xlim(XRANGE[0], XRANGE[1])
 
-        if ERRORSIZEs_right is not None:
-            ERRORSIZE = ERRORSIZEs_right[i]
-        else:
-            ERRORSIZE = 2
-
-        ax_right.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
-            color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
-
-    if YRANGE_error_right is not None:
-        ax_right.set_ylim(YRANGE_error_right[0], YRANGE_error_right[1])
-
-    if ylog_error_right:
-        ax_right.set_yscale('log')
+        if xlog:
+            ax_hist.set_xscale('log')
 
-    if ytick_min_label:
-        if ylog_error_right:
-            ax_right.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax_right.yaxis.set_minor_locator(AutoMinorLocator())
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax_left)
 
-    if invertY_error_right:
-        ax_right.invert_yaxis()
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax_left)
 
-    ax_right.set_ylabel(YLABEL_error_right)
+        if xtick_min_label:
+            if xlog:
+                ax_left.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax_left.xaxis.set_minor_locator(AutoMinorLocator())
 
-    if (LABELs_error_right is not None):
-        ax_right.legend(frameon=frameon_legend, loc=loc_legend)
+        if xtick_spe is not None:
+            ax_hist.set_xticks(xtick_spe[0], labels=xtick_spe[1])
 
-    ### >>>>>>>>>> common
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
+        if invertX:
+            ax_hist.invert_xaxis()
 
-    if xlog:
-        plt.xscale('log')
+        ax_left.set_xlabel(XLABEL)
+        if TITLE is not None:
+            ax_hist.set_title(TITLE)
 
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax_left)
+    res = _finish_figure(fig, outpath, rc, "Histogram plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
 
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax_left)
+    if hist_errors is not None:
+        return res, hists
 
-    if xtick_min_label:
-        if xlog:
-            ax_left.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax_left.xaxis.set_minor_locator(AutoMinorLocator())
-
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-
-    if invertX:
-        plt.gca().invert_xaxis()
-
-    ax_left.set_xlabel(XLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
-
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Histogram plot saved as", outpath)
+    return res
@@ -9,25 +9,24 @@ __all__ = ["HistPlotFunc", "Hist2DPlotFunc", "HistPlotFunc_subplots", "Hist2DPlo
 
 import math
 import logging
+from collections.abc import Iterator
 
 import numpy as np
 
 import matplotlib as mpl
-import matplotlib.pyplot as plt
-mpl.rcParams['xtick.direction'] = 'in'
-mpl.rcParams['ytick.direction'] = 'in'
-mpl.rcParams['xtick.top'] = True
-mpl.rcParams['ytick.right'] = True
-plt.rcParams['font.family'] = 'serif'
-
 from matplotlib.ticker import AutoMinorLocator, LogLocator
 from matplotlib.patches import Rectangle
 
-from .CommonInternal import _vhlines
+from .CommonInternal import _figure_context, _new_figure, _finish_figure
+from .CommonInternal import _vhlines, _stairs_hist, _normalise_hist, _hist_errors, _pcolormesh_hist2d, _hist2d_norm
+from .Binning import compute_hist, compute_hist_batch, compute_hist2d, _hist_edges, _is_streamed, _map_binning
+from .Binning import _is_uniform_bins2d
+from .Sketch import compute_sketch
+from .Stats import _instrumented
 
-logging.basicConfig(format='%(name)s : %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@_instrumented
 def HistPlotFunc(outpath,
                 paras, wgs, COLORs, LABELs,
                 nbins, XRANGE, YRANGE=None,
@@ -46,113 +45,213 @@ def HistPlotFunc(outpath,
                 LINEs=None, LINEWs=None,
                 TIGHT=False,
                 alpha=None,
-                HISTTYPE_list=None):
+                HISTTYPE_list=None,
+                prebinned=False,
+                chunk_size=None,
+                n_workers=None,
+                hist_errors=None,
+                bin_cache=None,
+                bins=None, auto_quantiles=[0.001, 0.999],
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Histogram plot for multiple parameters
+        outpath=None: the figure is returned without saving it (see FigureTemplate)
+        prebinned=True: each element of paras is (counts, edges) or (counts, sumw2, edges) from compute_hist,
+                        which is drawn directly without re-binning
+        paras (and wgs) elements can also be .npy file paths, (path, column) of .npy structured arrays
+                        or FITS binary tables, or iterators of chunks,
+                        which are accumulated chunk by chunk (chunk_size) with compute_hist
+        xlog=True: binned with the log10 path of compute_hist and drawn from the counts
+        n_workers > 1: parameters are binned in a pool of n_workers processes
+        hist_errors='bar' or 'band': sum of weights and of squared weights are accumulated in one pass
+                        and sqrt(sumw2) is drawn as error bars or a shaded band,
+                        returns (res, hists): res is returned as without hist_errors
+                        (the figure with outpath=None, a Future of the write with a writer, None otherwise)
+                        and hists = [(counts, sumw2, edges), ...] for all parameters
+                        (prebinned (counts, edges) are taken as unweighted: sumw2 = counts)
+        bin_cache: BinningCache, parameters binned before with the same bins are taken from it
+        bins='quantile': nbins edges with the same (weighted) number of values in each bin (within XRANGE)
+        bins=array-like: the bin edges (nbins is ignored)
+        XRANGE='auto': robust range between the auto_quantiles of all parameters
+                        (quantiles are estimated in one pass with a mergeable QuantileSketch,
+                        in parallel with n_workers, without sorting)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     if DENSITY and (wgs is not None):
         logger.warning('DENSITY and wgs are provided simultaneously!!!')
 
-    if XRANGE is None:
-        raise Exception('XRANGE cannot be None!')
-
-    if xlog:
-        bins = np.logspace(np.log10(XRANGE[0]), np.log10(XRANGE[1]), nbins)
+    if prebinned:
+        if wgs is not None:
+            logger.warning('wgs are ignored for prebinned histograms!!!')
+        if XRANGE is None:
+            XRANGE = [min(para[-1][0] for para in paras), max(para[-1][-1] for para in paras)]
     else:
-        bins = np.linspace(XRANGE[0], XRANGE[1], nbins)
-
-    fig, ax = plt.subplots(figsize=FIGSIZE)
-
-    for i_para, para in enumerate(paras):
-        LINE = LINEs[i_para] if LINEs is not None else None
-        LW = LINEWs[i_para] if LINEWs is not None else None
-        wg = wgs[i_para] if wgs is not None else None
-        LABEL = LABELs[i_para] if LABELs is not None else None
-        HISTTYPE = HISTTYPE_list[i_para] if HISTTYPE_list is not None else HISTTYPE
-
-        hist_kwargs = dict(
-            x=para, bins=bins, cumulative=cumulative,
-            range=XRANGE, density=DENSITY, weights=wg, 
-            color=COLORs[i_para], label=LABEL, 
-            histtype=HISTTYPE, stacked=STACKED,
-            alpha=alpha
-        )
-        if LINE is not None:
-            hist_kwargs['ls'] = LINE
-        if LW is not None:
-            hist_kwargs['lw'] = LW
-
-        _, _, handles = plt.hist(**hist_kwargs)
-
-    plt.xlim(XRANGE[0], XRANGE[1])
-    if YRANGE is not None:
-        plt.ylim(YRANGE[0], YRANGE[1])
-
-    if xlog:
-        plt.xscale('log')
-    if ylog:
-        plt.yscale('log')
-
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths)
-
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths)
-
-    if xtick_min_label:
+        # automatic range and/or equal-count bins from the quantiles of all parameters
+        if isinstance(bins, str) or isinstance(XRANGE, str):
+            if isinstance(bins, str) and (bins != 'quantile'):
+                raise Exception(f'Unsupported bins value: {bins}')
+            if isinstance(XRANGE, str) and (XRANGE != 'auto'):
+                raise Exception(f'Unsupported XRANGE value: {XRANGE}')
+            if any(isinstance(para, Iterator) for para in paras):
+                raise Exception('Iterators can only be read once, quantiles need arrays or files!')
+            sketches = _map_binning(compute_sketch,
+                                [(dict(para=para, wg=(wgs[i_para] if wgs is not None else None)),
+                                    dict(xlog=xlog, chunk_size=chunk_size))
+                                    for i_para, para in enumerate(paras)],
+                                n_workers=n_workers)
+            sketch = sketches[0]
+            for sketch_tmp in sketches[1:]:
+                sketch.merge(sketch_tmp)
+            if isinstance(XRANGE, str):
+                XRANGE = list(sketch.quantile(auto_quantiles))
+            if isinstance(bins, str):
+                nbins = sketch.edges(nbins, XRANGE)
+                if XRANGE is None:
+                    XRANGE = [nbins[0], nbins[-1]]
+        elif bins is not None:
+            nbins = np.asarray(bins, dtype=float)
+            if XRANGE is None:
+                XRANGE = [nbins[0], nbins[-1]]
+        bin_edges = _hist_edges(nbins, XRANGE, xlog)
+
+    # bin in worker processes (or through the cache), draw here
+    hist_parallel = None
+    if (not prebinned) and (((n_workers is not None) and (n_workers > 1)) or (bin_cache is not None)):
+        hist_parallel = _map_binning(compute_hist,
+                            [(dict(para=para, wg=(wgs[i_para] if wgs is not None else None)),
+                                dict(nbins=nbins, XRANGE=XRANGE, xlog=xlog, chunk_size=chunk_size,
+                                    sumw2=(hist_errors is not None)))
+                                for i_para, para in enumerate(paras)],
+                            n_workers=n_workers, cache=bin_cache)
+
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        ax = fig.subplots()
+
+        handles = []
+        hists = []
+        for i_para, para in enumerate(paras):
+            LINE = LINEs[i_para] if LINEs is not None else None
+            LW = LINEWs[i_para] if LINEWs is not None else None
+            wg = wgs[i_para] if wgs is not None else None
+            LABEL = LABELs[i_para] if LABELs is not None else None
+            HISTTYPE = HISTTYPE_list[i_para] if HISTTYPE_list is not None else HISTTYPE
+
+            sumw2 = None
+            if prebinned:
+                counts, edges = para[0], para[-1]
+                if hist_errors is not None:
+                    sumw2 = para[1] if len(para) == 3 else counts
+            elif hist_parallel is not None:
+                counts, edges = hist_parallel[i_para][0], hist_parallel[i_para][-1]
+                if hist_errors is not None:
+                    sumw2 = hist_parallel[i_para][1]
+            elif (hist_errors is not None) or xlog or _is_streamed(para) or _is_streamed(wg):
+                res = compute_hist(para, nbins, XRANGE, wg=wg, xlog=xlog, chunk_size=chunk_size,
+                                    sumw2=(hist_errors is not None))
+                counts, edges = res[0], res[-1]
+                if hist_errors is not None:
+                    sumw2 = res[1]
+            else:
+                counts = None
+
+            if counts is not None:
+                stairs_kwargs = dict(color=COLORs[i_para], label=LABEL, alpha=alpha)
+                if LINE is not None:
+                    stairs_kwargs['ls'] = LINE
+                if LW is not None:
+                    stairs_kwargs['lw'] = LW
+                handle = _stairs_hist(ax, counts, edges,
+                                    DENSITY=DENSITY, cumulative=cumulative, HISTTYPE=HISTTYPE,
+                                    **stairs_kwargs)
+                handles.append([handle])
+                if hist_errors is not None:
+                    hists.append((counts, sumw2, edges))
+                    counts_norm, sumw2_norm = _normalise_hist(counts, edges,
+                                                    DENSITY=DENSITY, cumulative=cumulative, sumw2=sumw2)
+                    _hist_errors(ax, counts_norm, sumw2_norm, edges, hist_errors=hist_errors, xlog=xlog,
+                                color=COLORs[i_para])
+                continue
+
+            hist_kwargs = dict(
+                x=para, bins=bin_edges, cumulative=cumulative,
+                range=XRANGE, density=DENSITY, weights=wg, 
+                color=COLORs[i_para], label=LABEL, 
+                histtype=HISTTYPE, stacked=STACKED,
+                alpha=alpha
+            )
+            if LINE is not None:
+                hist_kwargs['ls'] = LINE
+            if LW is not None:
+                hist_kwargs['lw'] = LW
+
+            _, _, handles = ax.hist(**hist_kwargs)
+
+        ax.set_xlim(XRANGE[0], XRANGE[1])
+        if YRANGE is not None:
+            ax.set_ylim(YRANGE[0], YRANGE[1])
+
         if xlog:
-            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.xaxis.set_minor_locator(AutoMinorLocator())
-    if ytick_min_label:
+            ax.set_xscale('log')
         if ylog:
-            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.yaxis.set_minor_locator(AutoMinorLocator())
+            ax.set_yscale('log')
 
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-    if ytick_spe is not None:
-        plt.yticks(ytick_spe[0], ytick_spe[1])
-
-    if (LABEL_position=='inSub') and (LABELs is not None):
-        plt.legend(frameon=False, loc=loc_legend)
-    elif (LABEL_position=='top') and (LABELs is not None):
-        legend_handles = []
-        for sublist in handles:
-            legend_handles.append(sublist[0])
-        fig.legend(legend_handles, LABELs, 
-                loc = 'center', ncol=LABEL_cols,
-                bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
-
-    plt.xlabel(XLABEL)
-    plt.ylabel(YLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
-
-    # avoid cutting in text
-    if TIGHT:
-        plt.tight_layout()
-
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Histogram plot saved as", outpath)
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
 
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+
+        if xtick_min_label:
+            if xlog:
+                ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.xaxis.set_minor_locator(AutoMinorLocator())
+        if ytick_min_label:
+            if ylog:
+                ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if xtick_spe is not None:
+            ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+        if ytick_spe is not None:
+            ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
+
+        if (LABEL_position=='inSub') and (LABELs is not None):
+            ax.legend(frameon=False, loc=loc_legend)
+        elif (LABEL_position=='top') and (LABELs is not None):
+            legend_handles = []
+            for sublist in handles:
+                legend_handles.append(sublist[0])
+            fig.legend(legend_handles, LABELs, 
+                    loc = 'center', ncol=LABEL_cols,
+                    bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
+
+        ax.set_xlabel(XLABEL)
+        ax.set_ylabel(YLABEL)
+        if TITLE is not None:
+            ax.set_title(TITLE)
+
+        # avoid cutting in text
+        if TIGHT:
+            fig.tight_layout()
+
+    res = _finish_figure(fig, outpath, rc, "Histogram plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
+
+    # res is the figure returned without saving with outpath=None (e.g. kept by FigureTemplate)
+    if hist_errors is not None:
+        return res, hists
+
+    return res
+
+@_instrumented
 def Hist2DPlotFunc(outpath,
                 x_val, y_val, wg,
                 nbins, XRANGE=None, YRANGE=None,
@@ -166,20 +265,25 @@ def Hist2DPlotFunc(outpath,
                 font_size=12, usetex=False, 
                 FIGSIZE=[6.4, 4.8],
                 TIGHT=False,
-                xlog=False, ylog=False):
+                xlog=False, ylog=False,
+                fast_binning=False, count_dtype=np.float64, chunk_size=None,
+                bin_cache=None,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     2D histogram plot
+        fast_binning=True: bin with compute_hist2d (uniform bins, optionally float32 and chunked)
+                            and draw the grid with pcolormesh
+        bin_cache: BinningCache, binned with compute_hist2d through the cache (implies fast_binning)
+        x_val, y_val, wg can also be .npy file paths or (path, column) of .npy structured arrays
+                        or FITS binary tables, binned chunk by chunk with compute_hist2d (implies fast_binning,
+                        XRANGE and YRANGE are required)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     if DENSITY and (wg is not None):
         logger.warning('DENSITY and wgs are provided simultaneously!!!')
 
@@ -188,60 +292,71 @@ def Hist2DPlotFunc(outpath,
     else:
         SRANGE = None
 
-    fig, ax = plt.subplots(figsize=FIGSIZE)
     if count_log:
         norm = mpl.colors.LogNorm(vmin=count_scale[0], vmax=count_scale[1])
     else:
         norm = mpl.colors.Normalize(vmin=count_scale[0], vmax=count_scale[1])
-    h = plt.hist2d(x_val, y_val, bins=nbins, range=SRANGE, density=DENSITY, weights=wg, norm=norm, cmap=COLOR_MAP)
-    cbar = plt.colorbar(h[3])
+    # files are binned chunk by chunk
+    if any(_is_streamed(val) for val in (x_val, y_val, wg)):
+        fast_binning = True
+    if fast_binning or (bin_cache is not None):
+        counts, xedges, yedges = _map_binning(compute_hist2d,
+                                    [(dict(x_val=x_val, y_val=y_val, wg=wg),
+                                        dict(nbins=nbins, XRANGE=XRANGE, YRANGE=YRANGE,
+                                            count_dtype=count_dtype, chunk_size=chunk_size))],
+                                    cache=bin_cache)[0]
+
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        ax = fig.subplots()
+
+        if fast_binning or (bin_cache is not None):
+            h = _pcolormesh_hist2d(ax, counts, xedges, yedges, DENSITY=DENSITY, norm=norm, cmap=COLOR_MAP)
+        else:
+            h = ax.hist2d(x_val, y_val, bins=nbins, range=SRANGE, density=DENSITY, weights=wg, norm=norm, cmap=COLOR_MAP)
+        cbar = fig.colorbar(h[3], ax=ax)
 
-    if xlog:
-        ax.set_xscale('log')
-    if ylog:
-        ax.set_yscale('log')
+        if xlog:
+            ax.set_xscale('log')
+        if ylog:
+            ax.set_yscale('log')
 
-    if CBAR_LABEL is not None:
-        cbar.ax.set_ylabel(CBAR_LABEL, rotation=270)
+        if CBAR_LABEL is not None:
+            cbar.ax.set_ylabel(CBAR_LABEL, rotation=270)
 
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
-    if YRANGE is not None:
-        plt.ylim(YRANGE[0], YRANGE[1])
+        if XRANGE is not None:
+            ax.set_xlim(XRANGE[0], XRANGE[1])
+        if YRANGE is not None:
+            ax.set_ylim(YRANGE[0], YRANGE[1])
 
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths)
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
 
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths)
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
 
-    if xtick_min_label:
-        ax.xaxis.set_minor_locator(AutoMinorLocator())
-    if ytick_min_label:
-        ax.yaxis.set_minor_locator(AutoMinorLocator())
+        if xtick_min_label:
+            ax.xaxis.set_minor_locator(AutoMinorLocator())
+        if ytick_min_label:
+            ax.yaxis.set_minor_locator(AutoMinorLocator())
 
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-    if ytick_spe is not None:
-        plt.yticks(ytick_spe[0], ytick_spe[1])
+        if xtick_spe is not None:
+            ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+        if ytick_spe is not None:
+            ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
 
-    plt.xlabel(XLABEL)
-    plt.ylabel(YLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
+        ax.set_xlabel(XLABEL)
+        ax.set_ylabel(YLABEL)
+        if TITLE is not None:
+            ax.set_title(TITLE)
 
-    if TIGHT:
-        plt.tight_layout()
+        if TIGHT:
+            fig.tight_layout()
 
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("2D histogram plot saved as", outpath)
+    return _finish_figure(fig, outpath, rc, "2D histogram plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
 
+@_instrumented
 def HistPlotFunc_subplots(outpath, N_plots,
                             paras_list, wgs_list, COLORs_list, LABELs_list,
                             nbins_list, XRANGE, YRANGE=None,
@@ -266,226 +381,297 @@ def HistPlotFunc_subplots(outpath, N_plots,
                             shareX=True,
                             shareY=True,
                             XRANGE_list=None,
-                            YRANGE_list=None):
+                            YRANGE_list=None,
+                            prebinned=False,
+                            chunk_size=None,
+                            batch_binning=False,
+                            n_workers=None,
+                            bin_cache=None,
+                            dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Histogram plot for multiple subplots
+        outpath=None: the figure is returned without saving it (see FigureTemplate)
+        prebinned=True: each element of paras_list[i] is (counts, edges) or (counts, sumw2, edges) from compute_hist,
+                        which is drawn directly without re-binning
+        paras (and wgs) elements can also be .npy file paths, (path, column) of .npy structured arrays
+                        or FITS binary tables, or iterators of chunks,
+                        which are accumulated chunk by chunk (chunk_size) with compute_hist
+        xlog=True: binned with the log10 path of compute_hist and drawn from the counts
+        batch_binning=True: all in-memory parameters sharing the same bins (XRANGE and a number of bins)
+                        are binned together with compute_hist_batch before drawing,
+                        panels without a range or with explicit bin edges are binned one by one
+        n_workers > 1: parameters are binned in a pool of n_workers processes before drawing
+        bin_cache: BinningCache, parameters binned before with the same bins are taken from it
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     N_rows = math.ceil(N_plots**0.5)
     N_cols = math.ceil(N_plots/N_rows)
-    fig, axs = plt.subplots(N_rows, N_cols, sharex=shareX, sharey=shareY, figsize=FIGSIZE)
-    if shareX and shareY:
-        fig.subplots_adjust(hspace=0)
-        fig.subplots_adjust(wspace=0)
 
     if DENSITY and (wgs_list is not None):
         logger.warning('DENSITY and wgs are provided simultaneously!!!')
 
-    i_plot = 0
-    for i_row in range(N_rows):
-        for i_col in range(N_cols):
-            if i_plot >= N_plots:
-                if N_rows == 1:
-                    axs[i_col].axis('off')
-                elif N_cols == 1:
-                    axs[i_row].axis('off')
-                else:
-                    axs[i_row, i_col].axis('off')
-            else:
-                if (N_rows==1) and (N_cols == 1):
-                    ax = axs
-                elif N_rows == 1:
-                    ax = axs[i_col]
-                elif N_cols == 1:
-                    ax = axs[i_row]
+    if prebinned:
+        if wgs_list is not None:
+            logger.warning('wgs are ignored for prebinned histograms!!!')
+        if (XRANGE is None) and (XRANGE_list is None):
+            XRANGE = [min(para[-1][0] for paras in paras_list for para in paras),
+                        max(para[-1][-1] for paras in paras_list for para in paras)]
+
+    # bin all parameters sharing the same bins in one go
+    hist_batch = {}
+    if (not prebinned) and (((n_workers is not None) and (n_workers > 1)) or (bin_cache is not None)):
+        keys = []
+        tasks = []
+        for i_plot in range(N_plots):
+            XRANGE_tmp = XRANGE_list[i_plot] if XRANGE_list is not None else XRANGE
+            wgs = wgs_list[i_plot] if wgs_list is not None else None
+            for i_val_tmp, para_tmp in enumerate(paras_list[i_plot]):
+                keys.append((i_plot, i_val_tmp))
+                tasks.append((dict(para=para_tmp, wg=(wgs[i_val_tmp] if wgs is not None else None)),
+                                dict(nbins=nbins_list[i_plot], XRANGE=XRANGE_tmp, xlog=xlog, chunk_size=chunk_size)))
+        hist_batch = dict(zip(keys, _map_binning(compute_hist, tasks, n_workers=n_workers, cache=bin_cache)))
+    elif batch_binning and (not prebinned):
+        groups = {}
+        for i_plot in range(N_plots):
+            XRANGE_tmp = XRANGE_list[i_plot] if XRANGE_list is not None else XRANGE
+            wgs = wgs_list[i_plot] if wgs_list is not None else None
+            for i_val_tmp, para_tmp in enumerate(paras_list[i_plot]):
+                wg = wgs[i_val_tmp] if wgs is not None else None
+                # without a range, or with explicit edges: binned one by one when drawn
+                if _is_streamed(para_tmp) or _is_streamed(wg) or (XRANGE_tmp is None) or (np.ndim(nbins_list[i_plot]) > 0):
+                    continue
+                key = (tuple(XRANGE_tmp), tuple(np.atleast_1d(nbins_list[i_plot])))
+                groups.setdefault(key, []).append((i_plot, i_val_tmp, para_tmp, wg))
+        for (XRANGE_tmp, (nbins,)), members in groups.items():
+            counts_batch, edges = compute_hist_batch([member[2] for member in members], nbins, list(XRANGE_tmp),
+                                                    wgs=[member[3] for member in members], xlog=xlog)
+            for member, counts in zip(members, counts_batch):
+                hist_batch[(member[0], member[1])] = (counts, edges)
+
+    XRANGE_all = XRANGE
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        axs = fig.subplots(N_rows, N_cols, sharex=shareX, sharey=shareY)
+        if shareX and shareY:
+            fig.subplots_adjust(hspace=0)
+            fig.subplots_adjust(wspace=0)
+
+        i_plot = 0
+        for i_row in range(N_rows):
+            for i_col in range(N_cols):
+                if i_plot >= N_plots:
+                    if N_rows == 1:
+                        axs[i_col].axis('off')
+                    elif N_cols == 1:
+                        axs[i_row].axis('off')
+                    else:
+                        axs[i_row, i_col].axis('off')
                 else:
-                    ax = axs[i_row, i_col]
+                    if (N_rows==1) and (N_cols == 1):
+                        ax = axs
+                    elif N_rows == 1:
+                        ax = axs[i_col]
+                    elif N_cols == 1:
+                        ax = axs[i_row]
+                    else:
+                        ax = axs[i_row, i_col]
 
-                paras = paras_list[i_plot]
-                COLORs = COLORs_list[i_plot]
-                if LABELs_list is not None:
-                    LABELs = LABELs_list[i_plot]
-                else:
-                    LABELs = None
+                    paras = paras_list[i_plot]
+                    COLORs = COLORs_list[i_plot]
+                    if LABELs_list is not None:
+                        LABELs = LABELs_list[i_plot]
+                    else:
+                        LABELs = None
 
-                if XRANGE_list is not None:
-                    XRANGE = XRANGE_list[i_plot]
+                    XRANGE = XRANGE_list[i_plot] if XRANGE_list is not None else XRANGE_all
 
-                if YRANGE_list is not None:
-                    YRANGE = YRANGE_list[i_plot]
+                    if YRANGE_list is not None:
+                        YRANGE = YRANGE_list[i_plot]
 
-                if HISTTYPEs_list is not None:
-                    HISTTYPEs = HISTTYPEs_list[i_plot]
-                else:
-                    HISTTYPEs = None
+                    if HISTTYPEs_list is not None:
+                        HISTTYPEs = HISTTYPEs_list[i_plot]
+                    else:
+                        HISTTYPEs = None
 
-                if LINEs_list is not None:
-                    LINEs = LINEs_list[i_plot]
-                else:
-                    LINEs = None
+                    if LINEs_list is not None:
+                        LINEs = LINEs_list[i_plot]
+                    else:
+                        LINEs = None
 
-                if LINEWs_list is not None:
-                    LINEWs = LINEWs_list[i_plot]
-                else:
-                    LINEWs = None
+                    if LINEWs_list is not None:
+                        LINEWs = LINEWs_list[i_plot]
+                    else:
+                        LINEWs = None
+
+                    nbins = nbins_list[i_plot] if nbins_list is not None else None
+                    # range of explicit bin edges
+                    if (XRANGE is None) and (not prebinned) and (np.ndim(nbins) > 0):
+                        XRANGE = [nbins[0], nbins[-1]]
+                    if wgs_list is not None:
+                        wgs = wgs_list[i_plot]
+                    else:
+                        wgs = None
+
+                    try:
+                        vlines = vlines_list[i_plot]
+                    except TypeError:
+                        vlines = None
+                    try:
+                        vline_styles = vline_styles_list[i_plot]
+                    except TypeError:
+                        vline_styles = None
+                    try:
+                        vline_colors = vline_colors_list[i_plot]
+                    except TypeError:
+                        vline_colors = None
+                    try:
+                        vline_labels = vline_labels_list[i_plot]
+                    except TypeError:
+                        vline_labels = None
+                    try:
+                        vline_widths = vline_widths_list[i_plot]
+                    except TypeError:
+                        vline_widths = None
+
+                    try:
+                        hlines = hlines_list[i_plot]
+                    except TypeError:
+                        hlines = None
+                    try:
+                        hline_styles = hline_styles_list[i_plot]
+                    except TypeError:
+                        hline_styles = None
+                    try:
+                        hline_colors = hline_colors_list[i_plot]
+                    except TypeError:
+                        hline_colors = None
+                    try:
+                        hline_labels = hline_labels_list[i_plot]
+                    except TypeError:
+                        hline_labels = None
+                    try:
+                        hline_widths = hline_widths_list[i_plot]
+                    except TypeError:
+                        hline_widths = None
+
+                    if not prebinned:
+                        bins = _hist_edges(nbins, XRANGE, xlog)
+
+                    for i_val_tmp, para_tmp in enumerate(paras):
+                        LINE = LINEs[i_val_tmp] if LINEs is not None else None
+                        LW = LINEWs[i_val_tmp] if LINEWs is not None else None
+                        wg = wgs[i_val_tmp] if wgs is not None else None
+                        LABEL = LABELs[i_val_tmp] if LABELs is not None else None
+                        HISTTYPE = HISTTYPEs[i_val_tmp] if HISTTYPEs is not None else HISTTYPE
+
+                        if prebinned:
+                            counts, edges = para_tmp[0], para_tmp[-1]
+                        elif (i_plot, i_val_tmp) in hist_batch:
+                            counts, edges = hist_batch[(i_plot, i_val_tmp)]
+                        elif xlog or _is_streamed(para_tmp) or _is_streamed(wg):
+                            counts, edges = compute_hist(para_tmp, nbins, XRANGE, wg=wg, xlog=xlog, chunk_size=chunk_size)
+                        else:
+                            counts = None
+
+                        if counts is not None:
+                            stairs_kwargs = dict(color=COLORs[i_val_tmp], label=LABEL)
+                            if LINE is not None:
+                                stairs_kwargs['ls'] = LINE
+                            if LW is not None:
+                                stairs_kwargs['lw'] = LW
+                            _stairs_hist(ax, counts, edges,
+                                        DENSITY=DENSITY, HISTTYPE=HISTTYPE,
+                                        **stairs_kwargs)
+                            continue
+
+                        hist_kwargs = dict(
+                            x=para_tmp,
+                            bins=bins,
+                            range=XRANGE,
+                            density=DENSITY,
+                            weights=wg,
+                            color=COLORs[i_val_tmp],
+                            label=LABEL,
+                            histtype=HISTTYPE,
+                            stacked=STACKED,
+                        )
+                        if LINE is not None:
+                            hist_kwargs['ls'] = LINE
+                        if LW is not None:
+                            hist_kwargs['lw'] = LW
+
+                        ax.hist(**hist_kwargs)
+
+                    if (LABEL_position=='inSub') and (i_plot == LABEL_position_SUBid) and (LABELs is not None):
+                        ax.legend(frameon=True, loc=loc_legend)
+
+                    if subLABEL_list is not None:
+                        LABEL = subLABEL_list[i_plot]
+                        ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes)
+
+                    ax.set_xlim(XRANGE[0], XRANGE[1])
+                    if YRANGE is not None:
+                        ax.set_ylim(YRANGE[0], YRANGE[1])
 
-                nbins = nbins_list[i_plot]
-                if wgs_list is not None:
-                    wgs = wgs_list[i_plot]
-                else:
-                    wgs = None
-
-                try:
-                    vlines = vlines_list[i_plot]
-                except TypeError:
-                    vlines = None
-                try:
-                    vline_styles = vline_styles_list[i_plot]
-                except TypeError:
-                    vline_styles = None
-                try:
-                    vline_colors = vline_colors_list[i_plot]
-                except TypeError:
-                    vline_colors = None
-                try:
-                    vline_labels = vline_labels_list[i_plot]
-                except TypeError:
-                    vline_labels = None
-                try:
-                    vline_widths = vline_widths_list[i_plot]
-                except TypeError:
-                    vline_widths = None
-
-                try:
-                    hlines = hlines_list[i_plot]
-                except TypeError:
-                    hlines = None
-                try:
-                    hline_styles = hline_styles_list[i_plot]
-                except TypeError:
-                    hline_styles = None
-                try:
-                    hline_colors = hline_colors_list[i_plot]
-                except TypeError:
-                    hline_colors = None
-                try:
-                    hline_labels = hline_labels_list[i_plot]
-                except TypeError:
-                    hline_labels = None
-                try:
-                    hline_widths = hline_widths_list[i_plot]
-                except TypeError:
-                    hline_widths = None
-
-                if xlog:
-                    bins = np.logspace(np.log10(XRANGE[0]), np.log10(XRANGE[1]), nbins)
-                else:
-                    bins = np.linspace(XRANGE[0], XRANGE[1], nbins)
-
-                for i_val_tmp, para_tmp in enumerate(paras):
-                    LINE = LINEs[i_val_tmp] if LINEs is not None else None
-                    LW = LINEWs[i_val_tmp] if LINEWs is not None else None
-                    wg = wgs[i_val_tmp] if wgs is not None else None
-                    LABEL = LABELs[i_val_tmp] if LABELs is not None else None
-                    HISTTYPE = HISTTYPEs[i_val_tmp] if HISTTYPEs is not None else HISTTYPE
-
-                    hist_kwargs = dict(
-                        x=para_tmp,
-                        bins=bins,
-                        range=XRANGE,
-                        density=DENSITY,
-                        weights=wg,
-                        color=COLORs[i_val_tmp],
-                        label=LABEL,
-                        histtype=HISTTYPE,
-                        stacked=STACKED,
-                    )
-                    if LINE is not None:
-                        hist_kwargs['ls'] = LINE
-                    if LW is not None:
-                        hist_kwargs['lw'] = LW
-
-                    ax.hist(**hist_kwargs)
-
-                if (LABEL_position=='inSub') and (i_plot == LABEL_position_SUBid) and (LABELs is not None):
-                    ax.legend(frameon=True, loc=loc_legend)
-
-                if subLABEL_list is not None:
-                    LABEL = subLABEL_list[i_plot]
-                    ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes)
-
-                ax.set_xlim(XRANGE[0], XRANGE[1])
-                if YRANGE is not None:
-                    ax.set_ylim(YRANGE[0], YRANGE[1])
-
-                if xlog:
-                    ax.set_xscale('log')
-                if ylog:
-                    ax.set_yscale('log')
-
-                if vlines is not None:
-                    _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
-
-                if hlines is not None:
-                    _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
-
-                if xtick_min_label:
                     if xlog:
-                        ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-                    else:
-                        ax.xaxis.set_minor_locator(AutoMinorLocator())
-                if ytick_min_label:
+                        ax.set_xscale('log')
                     if ylog:
-                        ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-                    else:
-                        ax.yaxis.set_minor_locator(AutoMinorLocator())
+                        ax.set_yscale('log')
 
-                if xtick_spe is not None:
-                    plt.xticks(xtick_spe[0], xtick_spe[1])
-                if ytick_spe is not None:
-                    plt.yticks(ytick_spe[0], ytick_spe[1])
+                    if vlines is not None:
+                        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
 
-            i_plot +=1
+                    if hlines is not None:
+                        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
 
-    fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
-    fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
+                    if xtick_min_label:
+                        if xlog:
+                            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+                        else:
+                            ax.xaxis.set_minor_locator(AutoMinorLocator())
+                    if ytick_min_label:
+                        if ylog:
+                            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+                        else:
+                            ax.yaxis.set_minor_locator(AutoMinorLocator())
 
-    if (LABEL_position=='right') and (LABELs is not None):
-        handles = [Rectangle((0,0),1,1,color='white', ec=c) for c in COLORs]
-        fig.legend(handles, LABELs, 
-                loc = 'upper right',
-                bbox_to_anchor=(0.92, 0.35), fancybox=True, shadow=True)
+                    if xtick_spe is not None:
+                        ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+                    if ytick_spe is not None:
+                        ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
 
-    if (LABEL_position=='top') and (LABELs is not None):
-        handles = [Rectangle((0,0),1,1,color='white', ec=c) for c in COLORs]
-        fig.legend(handles, LABELs, 
-                loc = 'center', ncol=LABEL_cols,
-                bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
+                i_plot +=1
 
-    if TITLE is not None:
-        fig.text(0.5, 0.90, TITLE, ha='center')
+        fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
+        fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
 
-    if TIGHT:
-        plt.tight_layout()
+        if (LABEL_position=='right') and (LABELs is not None):
+            handles = [Rectangle((0,0),1,1,color='white', ec=c) for c in COLORs]
+            fig.legend(handles, LABELs, 
+                    loc = 'upper right',
+                    bbox_to_anchor=(0.92, 0.35), fancybox=True, shadow=True)
 
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Histogram plot saved as", outpath)
+        if (LABEL_position=='top') and (LABELs is not None):
+            handles = [Rectangle((0,0),1,1,color='white', ec=c) for c in COLORs]
+            fig.legend(handles, LABELs, 
+                    loc = 'center', ncol=LABEL_cols,
+                    bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
+
+        if TITLE is not None:
+            fig.text(0.5, 0.90, TITLE, ha='center')
+
+        if TIGHT:
+            fig.tight_layout()
 
+    return _finish_figure(fig, outpath, rc, "Histogram plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
+
+@_instrumented
 def Hist2DPlotFunc_subplots(outpath, N_plots,
                             x_val_list, y_val_list, wg_list,
                             nbins_list, XRANGE=None, YRANGE=None,
@@ -499,25 +685,27 @@ def Hist2DPlotFunc_subplots(outpath, N_plots,
                             hlines=None, hline_styles=None, hline_colors=None, hline_labels=None, hline_widths=None,
                             font_size=12, usetex=False, 
                             FIGSIZE=[6.4, 4.8],
-                            TIGHT=False):
+                            TIGHT=False,
+                            n_workers=None,
+                            bin_cache=None,
+                            dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Histogram plot for multiple subplots
+        all panels are binned with compute_hist2d first and drawn with one shared colour scale
+        (count_scale entries set to None are taken from all the panels)
+        nbins_list entries with bin edges (non-uniform bins) are binned with numpy.histogram2d instead,
+        which needs in-memory arrays
+        n_workers > 1: panels are binned in a pool of n_workers processes
+        bin_cache: BinningCache, panels binned before with the same bins are taken from it
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     N_rows = math.ceil(N_plots**0.5)
     N_cols = math.ceil(N_plots/N_rows)
-    fig, axs = plt.subplots(N_rows, N_cols, sharex=True, sharey=True, figsize=FIGSIZE)
-    fig.subplots_adjust(hspace=0)
-    fig.subplots_adjust(wspace=0)
 
     if DENSITY and (wg_list is not None):
         logger.warning('DENSITY and wgs are provided simultaneously!!!')
@@ -527,85 +715,100 @@ def Hist2DPlotFunc_subplots(outpath, N_plots,
     else:
         SRANGE = None
 
-    i_plot = 0
-    for i_row in range(N_rows):
-        for i_col in range(N_cols):
-            if i_plot >= N_plots:
-                if N_rows == 1:
-                    axs[i_col].axis('off')
-                elif N_cols == 1:
-                    axs[i_row].axis('off')
-                else:
-                    axs[i_row, i_col].axis('off')
-            else:
-                if (N_rows==1) and (N_cols == 1):
-                    ax = axs
-                elif N_rows == 1:
-                    ax = axs[i_col]
-                elif N_cols == 1:
-                    ax = axs[i_row]
-                else:
-                    ax = axs[i_row, i_col]
+    # bin all panels first: uniform bins with compute_hist2d (in worker processes if required),
+    #   bin edges with numpy.histogram2d
+    i_uniform = [i_plot for i_plot in range(N_plots) if _is_uniform_bins2d(nbins_list[i_plot])]
+    hists = [None] * N_plots
+    for i_plot, res in zip(i_uniform, _map_binning(compute_hist2d,
+                            [(dict(x_val=x_val_list[i_plot], y_val=y_val_list[i_plot],
+                                    wg=(wg_list[i_plot] if wg_list is not None else None)),
+                                dict(nbins=nbins_list[i_plot],
+                                    XRANGE=(SRANGE[0] if SRANGE is not None else None),
+                                    YRANGE=(SRANGE[1] if SRANGE is not None else None)))
+                                for i_plot in i_uniform],
+                            n_workers=n_workers, cache=bin_cache)):
+        hists[i_plot] = res
+    for i_plot in range(N_plots):
+        if hists[i_plot] is not None:
+            continue
+        inputs = [x_val_list[i_plot], y_val_list[i_plot], (wg_list[i_plot] if wg_list is not None else None)]
+        if any(_is_streamed(val) for val in inputs):
+            raise Exception('Bin edges need in-memory arrays (files and iterators are binned on uniform bins)!')
+        hists[i_plot] = np.histogram2d(inputs[0], inputs[1], bins=nbins_list[i_plot], range=SRANGE, weights=inputs[2])
+    if DENSITY:
+        hists = [(counts / np.sum(counts) / np.outer(np.diff(xedges), np.diff(yedges)), xedges, yedges)
+                    for counts, xedges, yedges in hists]
+
+    # one colour scale for all panels
+    norm = _hist2d_norm([counts for counts, _, _ in hists], count_scale=count_scale, count_log=count_log)
+
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        axs = fig.subplots(N_rows, N_cols, sharex=True, sharey=True)
+        fig.subplots_adjust(hspace=0)
+        fig.subplots_adjust(wspace=0)
 
-                x_val = x_val_list[i_plot]
-                y_val = y_val_list[i_plot]
-                nbins = nbins_list[i_plot]
-                if wg_list is not None:
-                    wg = wg_list[i_plot]
+        i_plot = 0
+        for i_row in range(N_rows):
+            for i_col in range(N_cols):
+                if i_plot >= N_plots:
+                    if N_rows == 1:
+                        axs[i_col].axis('off')
+                    elif N_cols == 1:
+                        axs[i_row].axis('off')
+                    else:
+                        axs[i_row, i_col].axis('off')
                 else:
-                    wg = None
+                    if (N_rows==1) and (N_cols == 1):
+                        ax = axs
+                    elif N_rows == 1:
+                        ax = axs[i_col]
+                    elif N_cols == 1:
+                        ax = axs[i_row]
+                    else:
+                        ax = axs[i_row, i_col]
 
-                if count_log:
-                    norm = mpl.colors.LogNorm(vmin=count_scale[0], vmax=count_scale[1])
-                else:
-                    norm = mpl.colors.Normalize(vmin=count_scale[0], vmax=count_scale[1])
-                h = ax.hist2d(x_val, y_val, bins=nbins, range=SRANGE, density=DENSITY, weights=wg, norm=norm, cmap=COLOR_MAP)
+                    h = _pcolormesh_hist2d(ax, *hists[i_plot], norm=norm, cmap=COLOR_MAP)
     
-                if subLABEL_list is not None:
-                    LABEL = subLABEL_list[i_plot]
-                    ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes)
+                    if subLABEL_list is not None:
+                        LABEL = subLABEL_list[i_plot]
+                        ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes)
 
-                if XRANGE is not None:
-                    ax.set_xlim(XRANGE[0], XRANGE[1])
-                if YRANGE is not None:
-                    ax.set_ylim(YRANGE[0], YRANGE[1])
+                    if XRANGE is not None:
+                        ax.set_xlim(XRANGE[0], XRANGE[1])
+                    if YRANGE is not None:
+                        ax.set_ylim(YRANGE[0], YRANGE[1])
 
-                if vlines is not None:
-                    _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+                    if vlines is not None:
+                        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
 
-                if hlines is not None:
-                    _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+                    if hlines is not None:
+                        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
 
-                if xtick_min_label:
-                    ax.xaxis.set_minor_locator(AutoMinorLocator())
-                if ytick_min_label:
-                    ax.yaxis.set_minor_locator(AutoMinorLocator())
+                    if xtick_min_label:
+                        ax.xaxis.set_minor_locator(AutoMinorLocator())
+                    if ytick_min_label:
+                        ax.yaxis.set_minor_locator(AutoMinorLocator())
 
-                if xtick_spe is not None:
-                    plt.xticks(xtick_spe[0], xtick_spe[1])
-                if ytick_spe is not None:
-                    plt.yticks(ytick_spe[0], ytick_spe[1])
+                    if xtick_spe is not None:
+                        ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+                    if ytick_spe is not None:
+                        ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
 
-            i_plot +=1
+                i_plot +=1
 
-    fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
-    fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
+        fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
+        fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
 
-    if TITLE is not None:
-        fig.text(0.5, 0.90, TITLE, ha='center')
+        if TITLE is not None:
+            fig.text(0.5, 0.90, TITLE, ha='center')
 
-    cbar = fig.colorbar(h[3], ax=axs, location='right')
-    if CBAR_LABEL is not None:
-        cbar.ax.set_ylabel(CBAR_LABEL, rotation=270)
+        cbar = fig.colorbar(h[3], ax=axs, location='right')
+        if CBAR_LABEL is not None:
+            cbar.ax.set_ylabel(CBAR_LABEL, rotation=270)
 
-    if TIGHT:
-        plt.tight_layout()
+        if TIGHT:
+            fig.tight_layout()
 
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("2D histogram plot saved as", outpath)
\ No newline at end of file
+    return _finish_figure(fig, outpath, rc, "2D histogram plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
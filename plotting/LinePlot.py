@@ -13,20 +13,25 @@ import logging
 
 import numpy as np
 import matplotlib as mpl
-import matplotlib.pyplot as plt
-mpl.rcParams['xtick.direction'] = 'in'
-mpl.rcParams['ytick.direction'] = 'in'
-mpl.rcParams['xtick.top'] = True
-mpl.rcParams['ytick.right'] = True
-plt.rcParams['font.family'] = 'serif'
-
 from matplotlib.ticker import AutoMinorLocator, LogLocator, NullFormatter, NullLocator
 
-from .CommonInternal import _vhlines
+from .CommonInternal import _vhlines, _error_array, _figure_context, _new_figure, _finish_figure
+from .Binning import compute_binned_stat2d, _decimate_index, _downsample_index
+from .Stats import _instrumented
 
-logging.basicConfig(format='%(name)s : %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _decimate_bins(FIGSIZE, dpi, decimate):
+    """
+    Grid used to decimate points: one cell per pixel of the figure (or per decimate pixels)
+        the axes are smaller than the figure, so cells are never larger than the requested size
+    """
+
+    pixel = 1. if decimate is True else float(decimate)
+
+    return [max(int(FIGSIZE[0]*dpi/pixel), 1), max(int(FIGSIZE[1]*dpi/pixel), 1)]
+
+@_instrumented
 def LinePlotFunc(outpath,
                 xvals, yvals,
                 COLORs, LABELs=None, LINEs=None, LINEWs=None, POINTs=None, POINTSs=None, fillstyles=None,
@@ -39,113 +44,125 @@ def LinePlotFunc(outpath,
                 loc_legend='best', legend_frame=False,
                 font_size=12, usetex=False,
                 FIGSIZE=[6.4, 4.8],
-                texPacks=None):
+                texPacks=None,
+                decimate=False, downsample=None,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Line plot for multiple parameters
+        outpath=None: the figure is returned without saving it (see FigureTemplate)
+        decimate: for series drawn as markers only (LINEs '' or 'none'),
+                    only the last point falling in each pixel of the figure (at FIGSIZE and dpi) is drawn
+                    (a number: cells of that many pixels, e.g. a fraction of the marker size, for fewer points)
+        downsample: None, 'minmax' or 'lttb', for long series drawn with a line (x monotonic)
+                    'minmax': first, last, min and max points of each pixel column of the figure (drawn the same)
+                    'lttb': one point per pixel column chosen by Largest-Triangle-Three-Buckets (NaN gaps are not kept)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-    if texPacks is not None:
-        for texPack in texPacks:
-            plt.rcParams['text.latex.preamble']=texPack
+    # tex packages
+    tex_rc = {'text.latex.preamble': '\n'.join(texPacks)} if texPacks is not None else None
 
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
+    with _figure_context(font_size, usetex, rc=tex_rc) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        ax = fig.subplots()
 
-    fig, ax = plt.subplots(figsize=FIGSIZE)
-    for i, xvl in enumerate(xvals):
-        yvl = yvals[i]
+        for i, xvl in enumerate(xvals):
+            yvl = yvals[i]
 
-        CR = COLORs[i]
+            CR = COLORs[i]
 
-        if LABELs is not None:
-            LAB = LABELs[i]
-        else:
-            LAB = None
-
-        if LINEs is not None:
-            LN = LINEs[i]
-        else:
-            LN = '--'
-        if LINEWs is not None:
-            LW = LINEWs[i]
-        else:
-            LW = 1
-
-        if POINTs is not None:
-            PI = POINTs[i]
-        else:
-            PI = 'o'
-        if POINTSs is not None:
-            MS = POINTSs[i]
-        else:
-            MS = 2
-        if fillstyles is not None:
-            fillstyle = fillstyles[i]
-        else:
-            fillstyle = 'full'
+            if LABELs is not None:
+                LAB = LABELs[i]
+            else:
+                LAB = None
 
-        plt.plot(xvl, yvl, color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, fillstyle=fillstyle)
+            if LINEs is not None:
+                LN = LINEs[i]
+            else:
+                LN = '--'
+            if LINEWs is not None:
+                LW = LINEWs[i]
+            else:
+                LW = 1
 
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
-    if YRANGE is not None:
-        plt.ylim(YRANGE[0], YRANGE[1])
+            if POINTs is not None:
+                PI = POINTs[i]
+            else:
+                PI = 'o'
+            if POINTSs is not None:
+                MS = POINTSs[i]
+            else:
+                MS = 2
+            if fillstyles is not None:
+                fillstyle = fillstyles[i]
+            else:
+                fillstyle = 'full'
 
-    if xlog:
-        plt.xscale('log')
-    if ylog:
-        plt.yscale('log')
+            if decimate and (LN in ['', ' ', 'none', 'None']):
+                keep = _decimate_index(xvl, yvl, _decimate_bins(FIGSIZE, dpi, decimate), XRANGE, YRANGE,
+                                    xlog=xlog, ylog=ylog)
+                xvl, yvl = np.asarray(xvl).ravel()[keep], np.asarray(yvl).ravel()[keep]
+            elif (downsample is not None) and (LN not in ['', ' ', 'none', 'None']):
+                keep = _downsample_index(xvl, yvl, _decimate_bins(FIGSIZE, dpi, True)[0], method=downsample,
+                                    XRANGE=XRANGE, xlog=xlog, ylog=ylog)
+                xvl, yvl = np.asarray(xvl).ravel()[keep], np.asarray(yvl).ravel()[keep]
 
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths)
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths)
+            ax.plot(xvl, yvl, color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, fillstyle=fillstyle)
 
-    if LABELs is not None:
-        plt.legend(frameon=legend_frame, loc=loc_legend)
+        if XRANGE is not None:
+            ax.set_xlim(XRANGE[0], XRANGE[1])
+        if YRANGE is not None:
+            ax.set_ylim(YRANGE[0], YRANGE[1])
 
-    if xtick_min_label:
         if xlog:
-            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.xaxis.set_minor_locator(AutoMinorLocator())
-    if ytick_min_label:
+            ax.set_xscale('log')
         if ylog:
-            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.yaxis.set_minor_locator(AutoMinorLocator())
-
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-    if ytick_spe is not None:
-        plt.yticks(ytick_spe[0], ytick_spe[1])
-
-    if invertX:
-        plt.gca().invert_xaxis()
-    if invertY:
-        plt.gca().invert_yaxis()
-
-    plt.xlabel(XLABEL)
-    plt.ylabel(YLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
-
-    plt.tight_layout()
-
-    if outpath=='show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Line plot saved as", outpath)
+            ax.set_yscale('log')
+
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+
+        if LABELs is not None:
+            ax.legend(frameon=legend_frame, loc=loc_legend)
+
+        if xtick_min_label:
+            if xlog:
+                ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.xaxis.set_minor_locator(AutoMinorLocator())
+        if ytick_min_label:
+            if ylog:
+                ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if xtick_spe is not None:
+            ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+        if ytick_spe is not None:
+            ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
 
+        if invertX:
+            ax.invert_xaxis()
+        if invertY:
+            ax.invert_yaxis()
+
+        ax.set_xlabel(XLABEL)
+        ax.set_ylabel(YLABEL)
+        if TITLE is not None:
+            ax.set_title(TITLE)
+
+        fig.tight_layout()
+
+    return _finish_figure(fig, outpath, rc, "Line plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
+
+@_instrumented
 def LinePlotFunc_subplots(outpath, N_plots,
                             xvals_list, yvals_list,
                             COLORs_list, LABELs_list=None, LINEs_list=None, LINEWs_list=None, POINTs_list=None, POINTSs_list=None, fillstyles_list=None,
@@ -161,190 +178,195 @@ def LinePlotFunc_subplots(outpath, N_plots,
                             LABEL_position='inSub', LABEL_position_SUBid=0,
                             LABEL_cols=1,
                             FIGSIZE=[6.4, 4.8],
-                            TIGHT=False):
+                            TIGHT=False,
+                            downsample=None,
+                            dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Line plot for multiple subplots
+        outpath=None: the figure is returned without saving it (see FigureTemplate)
+        downsample: None, 'minmax' or 'lttb', for long series drawn with a line (x monotonic)
+                    'minmax': first, last, min and max points of each pixel column of the figure (drawn the same)
+                    'lttb': one point per pixel column chosen by Largest-Triangle-Three-Buckets (NaN gaps are not kept)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
     N_rows = math.ceil(N_plots**0.5)
     N_cols = math.ceil(N_plots/N_rows)
-    fig, axs = plt.subplots(N_rows, N_cols, sharex=True, sharey=True, figsize=FIGSIZE)
-    fig.subplots_adjust(hspace=0)
-    fig.subplots_adjust(wspace=0)
-
-    i_plot = 0
-    handles = []
-    for i_row in range(N_rows):
-        for i_col in range(N_cols):
-            if i_plot >= N_plots:
-                if N_rows == 1:
-                    axs[i_col].axis('off')
-                elif N_cols == 1:
-                    axs[i_row].axis('off')
-                else:
-                    axs[i_row, i_col].axis('off')
-            else:
-                if (N_rows==1) and (N_cols == 1):
-                    ax = axs
-                elif N_rows == 1:
-                    ax = axs[i_col]
-                elif N_cols == 1:
-                    ax = axs[i_row]
-                else:
-                    ax = axs[i_row, i_col]
-
-                xvals = xvals_list[i_plot]
-                yvals = yvals_list[i_plot]
-
-                COLORs = COLORs_list[i_plot]
 
-                if LABELs_list is not None:
-                    LABELs = LABELs_list[i_plot]
-                else:
-                    LABELs = None
-
-                if LINEs_list is not None:
-                    LINEs = LINEs_list[i_plot]
-                else:
-                    LINEs = None
-                if LINEWs_list is not None:
-                    LINEWs = LINEWs_list[i_plot]
-                else:
-                    LINEWs = None
-
-                if POINTs_list is not None:
-                    POINTs = POINTs_list[i_plot]
-                else:
-                    POINTs = None
-                if POINTSs_list is not None:
-                    POINTSs = POINTSs_list[i_plot]
-                else:
-                    POINTSs = None
-                if fillstyles_list is not None:
-                    fillstyles = fillstyles_list[i_plot]
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        axs = fig.subplots(N_rows, N_cols, sharex=True, sharey=True)
+        fig.subplots_adjust(hspace=0)
+        fig.subplots_adjust(wspace=0)
+
+        i_plot = 0
+        handles = []
+        for i_row in range(N_rows):
+            for i_col in range(N_cols):
+                if i_plot >= N_plots:
+                    if N_rows == 1:
+                        axs[i_col].axis('off')
+                    elif N_cols == 1:
+                        axs[i_row].axis('off')
+                    else:
+                        axs[i_row, i_col].axis('off')
                 else:
-                    fillstyles = None
+                    if (N_rows==1) and (N_cols == 1):
+                        ax = axs
+                    elif N_rows == 1:
+                        ax = axs[i_col]
+                    elif N_cols == 1:
+                        ax = axs[i_row]
+                    else:
+                        ax = axs[i_row, i_col]
 
-                for i, xvl in enumerate(xvals):
-                    yvl = yvals[i]
+                    xvals = xvals_list[i_plot]
+                    yvals = yvals_list[i_plot]
 
-                    CR = COLORs[i]
+                    COLORs = COLORs_list[i_plot]
 
-                    if LABELs is not None:
-                        LAB = LABELs[i]
+                    if LABELs_list is not None:
+                        LABELs = LABELs_list[i_plot]
                     else:
-                        LAB = None
+                        LABELs = None
 
-                    if LINEs is not None:
-                        LN = LINEs[i]
+                    if LINEs_list is not None:
+                        LINEs = LINEs_list[i_plot]
                     else:
-                        LN = '--'
-                    if LINEWs is not None:
-                        LW = LINEWs[i]
+                        LINEs = None
+                    if LINEWs_list is not None:
+                        LINEWs = LINEWs_list[i_plot]
                     else:
-                        LW = 1
+                        LINEWs = None
 
-                    if POINTs is not None:
-                        PI = POINTs[i]
+                    if POINTs_list is not None:
+                        POINTs = POINTs_list[i_plot]
                     else:
-                        PI = 'o'
-                    if POINTSs is not None:
-                        MS = POINTSs[i]
+                        POINTs = None
+                    if POINTSs_list is not None:
+                        POINTSs = POINTSs_list[i_plot]
                     else:
-                        MS = 2
-                    if fillstyles is not None:
-                        fillstyle = fillstyles[i]
+                        POINTSs = None
+                    if fillstyles_list is not None:
+                        fillstyles = fillstyles_list[i_plot]
                     else:
-                        fillstyle = 'full'
+                        fillstyles = None
+
+                    for i, xvl in enumerate(xvals):
+                        yvl = yvals[i]
 
-                    tmp = ax.plot(xvl, yvl, color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, fillstyle=fillstyle)
-                    if (LABEL_position!='inSub') and (i_plot==0):
-                        handles.append(tmp[0])
-                    del tmp
+                        CR = COLORs[i]
+
+                        if LABELs is not None:
+                            LAB = LABELs[i]
+                        else:
+                            LAB = None
+
+                        if LINEs is not None:
+                            LN = LINEs[i]
+                        else:
+                            LN = '--'
+                        if LINEWs is not None:
+                            LW = LINEWs[i]
+                        else:
+                            LW = 1
+
+                        if POINTs is not None:
+                            PI = POINTs[i]
+                        else:
+                            PI = 'o'
+                        if POINTSs is not None:
+                            MS = POINTSs[i]
+                        else:
+                            MS = 2
+                        if fillstyles is not None:
+                            fillstyle = fillstyles[i]
+                        else:
+                            fillstyle = 'full'
 
-                if (LABEL_position=='inSub') and (LABELs is not None) and (i_plot == LABEL_position_SUBid):
-                    ax.legend(frameon=legend_frame, loc=loc_legend)
+                        if (downsample is not None) and (LN not in ['', ' ', 'none', 'None']):
+                            keep = _downsample_index(xvl, yvl, _decimate_bins(FIGSIZE, dpi, True)[0], method=downsample,
+                                                XRANGE=XRANGE, xlog=xlog, ylog=ylog)
+                            xvl, yvl = np.asarray(xvl).ravel()[keep], np.asarray(yvl).ravel()[keep]
 
-                if subLABEL_list is not None:
-                    LABEL = subLABEL_list[i_plot]
-                    ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes)
+                        tmp = ax.plot(xvl, yvl, color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, fillstyle=fillstyle)
+                        if (LABEL_position!='inSub') and (i_plot==0):
+                            handles.append(tmp[0])
+                        del tmp
 
-                if XRANGE is not None:
-                    ax.set_xlim(XRANGE[0], XRANGE[1])
-                if YRANGE is not None:
-                    ax.set_ylim(YRANGE[0], YRANGE[1])
+                    if (LABEL_position=='inSub') and (LABELs is not None) and (i_plot == LABEL_position_SUBid):
+                        ax.legend(frameon=legend_frame, loc=loc_legend)
 
-                if xlog:
-                    ax.set_xscale('log')
-                    ax.xaxis.set_minor_formatter(NullFormatter())
-                if ylog:
-                    ax.set_yscale('log')
+                    if subLABEL_list is not None:
+                        LABEL = subLABEL_list[i_plot]
+                        ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes)
 
-                if vlines is not None:
-                    _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
-                if hlines is not None:
-                    _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+                    if XRANGE is not None:
+                        ax.set_xlim(XRANGE[0], XRANGE[1])
+                    if YRANGE is not None:
+                        ax.set_ylim(YRANGE[0], YRANGE[1])
 
-                if xtick_min_label:
                     if xlog:
-                        ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-                    else:
-                        ax.xaxis.set_minor_locator(AutoMinorLocator())
-                if ytick_min_label:
+                        ax.set_xscale('log')
+                        ax.xaxis.set_minor_formatter(NullFormatter())
                     if ylog:
-                        ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-                    else:
-                        ax.yaxis.set_minor_locator(AutoMinorLocator())
+                        ax.set_yscale('log')
 
-                if xtick_spe is not None:
-                    plt.xticks(xtick_spe[0], xtick_spe[1])
-                if ytick_spe is not None:
-                    plt.yticks(ytick_spe[0], ytick_spe[1])
+                    if vlines is not None:
+                        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+                    if hlines is not None:
+                        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
 
-                if invertY:
-                    plt.gca().invert_yaxis()
-                if invertX:
-                    plt.gca().invert_xaxis()
+                    if xtick_min_label:
+                        if xlog:
+                            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+                        else:
+                            ax.xaxis.set_minor_locator(AutoMinorLocator())
+                    if ytick_min_label:
+                        if ylog:
+                            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+                        else:
+                            ax.yaxis.set_minor_locator(AutoMinorLocator())
 
-            i_plot +=1
+                    if xtick_spe is not None:
+                        ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+                    if ytick_spe is not None:
+                        ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
 
-    fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
-    fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
+                    if invertY:
+                        ax.yaxis.set_inverted(True)
+                    if invertX:
+                        ax.xaxis.set_inverted(True)
 
-    if TITLE is not None:
-        fig.text(0.5, 0.90, TITLE, ha='center')
+                i_plot +=1
 
-    if (LABEL_position=='right') and (LABELs is not None):
-        fig.legend(handles, LABELs, 
-                loc = 'upper right',
-                bbox_to_anchor=(0.92, 0.35), fancybox=True, shadow=True)
+        fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
+        fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
+
+        if TITLE is not None:
+            fig.text(0.5, 0.90, TITLE, ha='center')
 
-    if (LABEL_position=='top') and (LABELs is not None):
-        fig.legend(handles, LABELs, 
-                loc = 'center', ncol=LABEL_cols,
-                bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
+        if (LABEL_position=='right') and (LABELs is not None):
+            fig.legend(handles, LABELs, 
+                    loc = 'upper right',
+                    bbox_to_anchor=(0.92, 0.35), fancybox=True, shadow=True)
 
-    if TIGHT:
-        plt.tight_layout()
+        if (LABEL_position=='top') and (LABELs is not None):
+            fig.legend(handles, LABELs, 
+                    loc = 'center', ncol=LABEL_cols,
+                    bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
 
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Line plot saved as", outpath)
+        if TIGHT:
+            fig.tight_layout()
 
+    return _finish_figure(fig, outpath, rc, "Line plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
+
+@_instrumented
 def ErrorPlotFunc(outpath,
                 xvals, yvals, yerrs,
                 COLORs, LABELs=None, LINEs=None, LINEWs=None, POINTs=None, POINTSs=None, ERRORSIZEs=None,
@@ -363,148 +385,142 @@ def ErrorPlotFunc(outpath,
                 alpha_list = None, zorder_list = None,
                 FIGSIZE=[6.4, 4.8],
                 transparent=False,
-                font_size_label=None):
+                font_size_label=None,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Errorbar plot for multiple parameters
+        yerrs, xerrs: errors of each series (None: no error bars), symmetric (N values),
+                or lower and upper: (lower, upper), a 2xN array, an (N, 2) array or N records with two fields
+                (arrays are used as views, without copying)
+        outpath=None: the figure is returned without saving it (see FigureTemplate)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
     if font_size_label is None:
         font_size_label = font_size
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
-    fig, ax = plt.subplots(figsize=FIGSIZE)
-    for i, xvl in enumerate(xvals):
-        yvl = yvals[i]
-        if yerrs is not None:
-            yerr = yerrs[i]
-            if yerr is not None:
-                yerr = np.array(yerr)
-                yerr = np.vstack([yerr[0], yerr[1]])
-        else:
-            yerr = None
-
-        if xerrs is not None:
-            xerr = xerrs[i]
-            if xerr is not None:
-                xerr = np.array(xerr)
-                xerr = np.vstack([xerr[0], xerr[1]])
-        else:
-            xerr = None
 
-        CR = COLORs[i]
-
-        if alpha_list is not None:
-            alpha = alpha_list[i]
-        else:
-            alpha = None
-        if zorder_list is not None:
-            zorder = zorder_list[i]
-        else:
-            zorder = i + 1
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        ax = fig.subplots()
 
-        if LABELs is not None:
-            LAB = LABELs[i]
-        else:
-            LAB = None
+        for i, xvl in enumerate(xvals):
+            yvl = yvals[i]
+            if yerrs is not None:
+                yerr = _error_array(yerrs[i], xvl)
+            else:
+                yerr = None
 
-        if LINEs is not None:
-            LN = LINEs[i]
-        else:
-            LN = '--'
-        if LINEWs is not None:
-            LW = LINEWs[i]
-        else:
-            LW = 1
+            if xerrs is not None:
+                xerr = _error_array(xerrs[i], xvl)
+            else:
+                xerr = None
 
-        if POINTs is not None:
-            PI = POINTs[i]
-        else:
-            PI = 'o'
-        if POINTSs is not None:
-            MS = POINTSs[i]
-        else:
-            MS = 2
+            CR = COLORs[i]
 
-        if ERRORSIZEs is not None:
-            ERRORSIZE = ERRORSIZEs[i]
-        else:
-            ERRORSIZE = 2
+            if alpha_list is not None:
+                alpha = alpha_list[i]
+            else:
+                alpha = None
+            if zorder_list is not None:
+                zorder = zorder_list[i]
+            else:
+                zorder = i + 1
 
-        ax.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
-            color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE,
-            alpha=alpha,
-            zorder=zorder)
+            if LABELs is not None:
+                LAB = LABELs[i]
+            else:
+                LAB = None
 
-    if fill_between_xs is not None:
-        for i_fill, fill_between_x in enumerate(fill_between_xs):
-            ax.fill_between(fill_between_x, 
-                        fill_between_yLows[i_fill], fill_between_yHighs[i_fill],
-                        alpha=fill_between_alphas[i_fill],
-                        color=fill_between_COLORs[i_fill])
+            if LINEs is not None:
+                LN = LINEs[i]
+            else:
+                LN = '--'
+            if LINEWs is not None:
+                LW = LINEWs[i]
+            else:
+                LW = 1
 
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
-    if YRANGE is not None:
-        plt.ylim(YRANGE[0], YRANGE[1])
+            if POINTs is not None:
+                PI = POINTs[i]
+            else:
+                PI = 'o'
+            if POINTSs is not None:
+                MS = POINTSs[i]
+            else:
+                MS = 2
 
-    if xlog:
-        plt.xscale('log')
-    if ylog:
-        plt.yscale('log')
+            if ERRORSIZEs is not None:
+                ERRORSIZE = ERRORSIZEs[i]
+            else:
+                ERRORSIZE = 2
 
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths)
+            ax.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
+                color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE,
+                alpha=alpha,
+                zorder=zorder)
 
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths)
+        if fill_between_xs is not None:
+            for i_fill, fill_between_x in enumerate(fill_between_xs):
+                ax.fill_between(fill_between_x, 
+                            fill_between_yLows[i_fill], fill_between_yHighs[i_fill],
+                            alpha=fill_between_alphas[i_fill],
+                            color=fill_between_COLORs[i_fill])
 
-    if LABELs is not None:
-        plt.legend(frameon=legend_frame, framealpha=frame_alpha, loc=loc_legend, fontsize=font_size_label)
+        if XRANGE is not None:
+            ax.set_xlim(XRANGE[0], XRANGE[1])
+        if YRANGE is not None:
+            ax.set_ylim(YRANGE[0], YRANGE[1])
 
-    if xtick_min_label:
         if xlog:
-            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.xaxis.set_minor_locator(AutoMinorLocator())
-    if ytick_min_label:
+            ax.set_xscale('log')
         if ylog:
-            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            ax.yaxis.set_minor_locator(AutoMinorLocator())
-
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-    if ytick_spe is not None:
-        plt.yticks(ytick_spe[0], ytick_spe[1])
-
-    if invertX:
-        plt.gca().invert_xaxis()
-    if invertY:
-        plt.gca().invert_yaxis()
-
-    plt.xlabel(XLABEL)
-    plt.ylabel(YLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
-
-    plt.tight_layout()
-
-    if outpath=='show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300, transparent=transparent)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Errorbar plot saved in", outpath)
+            ax.set_yscale('log')
+
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+
+        if LABELs is not None:
+            ax.legend(frameon=legend_frame, framealpha=frame_alpha, loc=loc_legend, fontsize=font_size_label)
+
+        if xtick_min_label:
+            if xlog:
+                ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.xaxis.set_minor_locator(AutoMinorLocator())
+        if ytick_min_label:
+            if ylog:
+                ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if xtick_spe is not None:
+            ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+        if ytick_spe is not None:
+            ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
+
+        if invertX:
+            ax.invert_xaxis()
+        if invertY:
+            ax.invert_yaxis()
+
+        ax.set_xlabel(XLABEL)
+        ax.set_ylabel(YLABEL)
+        if TITLE is not None:
+            ax.set_title(TITLE)
 
+        fig.tight_layout()
+
+    return _finish_figure(fig, outpath, rc, "Errorbar plot saved in",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer, transparent=transparent)
+
+@_instrumented
 def ErrorPlotFunc_subplots(outpath, N_plots,
                             xvals_list, yvals_list, yerrs_list,
                             COLORs_list, LABELs_list=None, LINEs_list=None, LINEWs_list=None, POINTs_list=None, POINTSs_list=None, ERRORSIZEs_list=None,
@@ -531,256 +547,245 @@ def ErrorPlotFunc_subplots(outpath, N_plots,
                             no_xticklabels_list=None,
                             no_yticklabels_list=None, 
                             font_type="serif",
-                            xerrs_list=None):
+                            xerrs_list=None,
+                            dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Errorbar plot for multiple subplots
+        yerrs_list, xerrs_list: errors of each series (per subplot) (None: no error bars), symmetric (N values),
+                or lower and upper: (lower, upper), a 2xN array, an (N, 2) array or N records with two fields
+                (arrays are used as views, without copying)
+        outpath=None: the figure is returned without saving it (see FigureTemplate)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-    # the font
-    plt.rcParams['font.family'] = font_type
-
     if N_rows is None:
         N_rows = math.ceil(N_plots**0.5)
         N_cols = math.ceil(N_plots/N_rows)
-    fig, axs = plt.subplots(N_rows, N_cols, sharex=sharex, sharey=sharey, figsize=FIGSIZE)
-    fig.subplots_adjust(hspace=0)
-    fig.subplots_adjust(wspace=0)
-
-    if TIGHT:
-        # for x,y label
-        fig.add_subplot(111, frameon=False)
-        # hide tick and tick label of the big axes
-        plt.tick_params(labelcolor='none', top=False, bottom=False, left=False, right=False)
-        plt.grid(False)
-        # plt.xlabel(XLABEL)
-        # plt.ylabel(YLABEL)
-        if TITLE is not None:
-            plt.title(TITLE)
-
-    i_plot = 0
-    handles = []
-    for i_row in range(N_rows):
-        for i_col in range(N_cols):
-            if i_plot >= N_plots:
-                if N_rows == 1:
-                    axs[i_col].axis('off')
-                elif N_cols == 1:
-                    axs[i_row].axis('off')
-                else:
-                    axs[i_row, i_col].axis('off')
-            else:
-                if (N_rows==1) and (N_cols == 1):
-                    ax = axs
-                elif N_rows == 1:
-                    ax = axs[i_col]
-                elif N_cols == 1:
-                    ax = axs[i_row]
-                else:
-                    ax = axs[i_row, i_col]
-
-                xvals = xvals_list[i_plot]
-                yvals = yvals_list[i_plot]
-                if yerrs_list is not None:
-                    yerrs = yerrs_list[i_plot]
-                else:
-                    yerrs = None
-                if xerrs_list is not None:
-                    xerrs = xerrs_list[i_plot]
-                else:
-                    xerrs = None
-
-                COLORs = COLORs_list[i_plot]
-
-                if LABELs_list is not None:
-                    LABELs = LABELs_list[i_plot]
-                else:
-                    LABELs = None
 
-                if LINEs_list is not None:
-                    LINEs = LINEs_list[i_plot]
-                else:
-                    LINEs = None
-                if LINEWs_list is not None:
-                    LINEWs = LINEWs_list[i_plot]
+    with _figure_context(font_size, usetex, rc={'font.family': font_type}) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        axs = fig.subplots(N_rows, N_cols, sharex=sharex, sharey=sharey)
+        fig.subplots_adjust(hspace=0)
+        fig.subplots_adjust(wspace=0)
+
+        if TIGHT:
+            # for x,y label
+            ax_big = fig.add_subplot(111, frameon=False)
+            # hide tick and tick label of the big axes
+            ax_big.tick_params(labelcolor='none', top=False, bottom=False, left=False, right=False)
+            ax_big.grid(False)
+            # plt.xlabel(XLABEL)
+            # plt.ylabel(YLABEL)
+            if TITLE is not None:
+                ax_big.set_title(TITLE)
+
+        i_plot = 0
+        handles = []
+        for i_row in range(N_rows):
+            for i_col in range(N_cols):
+                if i_plot >= N_plots:
+                    if N_rows == 1:
+                        axs[i_col].axis('off')
+                    elif N_cols == 1:
+                        axs[i_row].axis('off')
+                    else:
+                        axs[i_row, i_col].axis('off')
                 else:
-                    LINEWs = None
+                    if (N_rows==1) and (N_cols == 1):
+                        ax = axs
+                    elif N_rows == 1:
+                        ax = axs[i_col]
+                    elif N_cols == 1:
+                        ax = axs[i_row]
+                    else:
+                        ax = axs[i_row, i_col]
 
-                if POINTs_list is not None:
-                    POINTs = POINTs_list[i_plot]
-                else:
-                    POINTs = None
-                if POINTSs_list is not None:
-                    POINTSs = POINTSs_list[i_plot]
-                else:
-                    POINTSs = None
-                if ERRORSIZEs_list is not None:
-                    ERRORSIZEs = ERRORSIZEs_list[i_plot]
-                else:
-                    ERRORSIZEs = None
-
-                for i, xvl in enumerate(xvals):
-                    yvl = yvals[i]
-                    if yerrs is not None:
-                        if yerrs[i] is not None:
-                            yerr = np.array(yerrs[i])
-                            yerr = np.vstack([yerr[0], yerr[1]])
-                        else:
-                            yerr = None
+                    xvals = xvals_list[i_plot]
+                    yvals = yvals_list[i_plot]
+                    if yerrs_list is not None:
+                        yerrs = yerrs_list[i_plot]
                     else:
-                        yerr = None
-                    if xerrs is not None:
-                        if xerrs[i] is not None:
-                            xerr = np.array(xerrs[i])
-                            xerr = np.vstack([xerr[0], xerr[1]])
-                        else:
-                            xerr = None
+                        yerrs = None
+                    if xerrs_list is not None:
+                        xerrs = xerrs_list[i_plot]
                     else:
-                        xerr = None
+                        xerrs = None
 
-                    CR = COLORs[i]
+                    COLORs = COLORs_list[i_plot]
 
-                    if LABELs is not None:
-                        LAB = LABELs[i]
+                    if LABELs_list is not None:
+                        LABELs = LABELs_list[i_plot]
                     else:
-                        LAB = None
+                        LABELs = None
 
-                    if LINEs is not None:
-                        LN = LINEs[i]
+                    if LINEs_list is not None:
+                        LINEs = LINEs_list[i_plot]
                     else:
-                        LN = '--'
-                    if LINEWs is not None:
-                        LW = LINEWs[i]
+                        LINEs = None
+                    if LINEWs_list is not None:
+                        LINEWs = LINEWs_list[i_plot]
                     else:
-                        LW = 1
+                        LINEWs = None
 
-                    if POINTs is not None:
-                        PI = POINTs[i]
+                    if POINTs_list is not None:
+                        POINTs = POINTs_list[i_plot]
                     else:
-                        PI = 'o'
-                    if POINTSs is not None:
-                        MS = POINTSs[i]
+                        POINTs = None
+                    if POINTSs_list is not None:
+                        POINTSs = POINTSs_list[i_plot]
                     else:
-                        MS = 2
-
-                    if ERRORSIZEs is not None:
-                        ERRORSIZE = ERRORSIZEs[i]
+                        POINTSs = None
+                    if ERRORSIZEs_list is not None:
+                        ERRORSIZEs = ERRORSIZEs_list[i_plot]
                     else:
-                        ERRORSIZE = 2
-
-                    tmp = ax.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
-                    if (LABEL_position!='inSub') and (i_plot==0):
-                        handles.append(tmp)
-                    del tmp
-
-                if (LABEL_position=='inSub') and (LABELs is not None) and (i_plot == LABEL_position_SUBid):
-                    ax.legend(frameon=legend_frame, loc=loc_legend)
-
-                if fill_between_xs_list is not None:
-                    fill_between_xs = fill_between_xs_list[i_plot]
-                    fill_between_yLows = fill_between_yLows_list[i_plot]
-                    fill_between_yHighs = fill_between_yHighs_list[i_plot]
-                    fill_between_COLORs = fill_between_COLORs_list[i_plot]
-                    fill_between_alphas = fill_between_alphas_list[i_plot]
-                    for i_fill, fill_between_x in enumerate(fill_between_xs):
-                        ax.fill_between(fill_between_x, 
-                                    fill_between_yLows[i_fill], fill_between_yHighs[i_fill],
-                                    alpha=fill_between_alphas[i_fill],
-                                    color=fill_between_COLORs[i_fill])
-
-                if subLABEL_list is not None:
-                    LABEL = subLABEL_list[i_plot]
-                    ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes,
-                        bbox=subLABEL_bbox)
-
-                if XRANGE is not None:
-                    ax.set_xlim(XRANGE[0], XRANGE[1])
-                if YRANGE is not None:
-                    ax.set_ylim(YRANGE[0], YRANGE[1])
-
-                if YRANGE_list is not None:
-                    ax.set_ylim(YRANGE_list[i_plot][0], YRANGE_list[i_plot][1])
-
-                if YLABEL_list is not None:
-                    ax.set_ylabel(YLABEL_list[i_plot])
-
-                if vlines is not None:
-                    _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
-                if hlines is not None:
-                    _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
-
-                if xlog:
-                    ax.set_xscale('log')
-                    ax.xaxis.set_minor_formatter(NullFormatter())
-                if ylog:
-                    ax.set_yscale('log')
-
-                if xtick_min_label:
+                        ERRORSIZEs = None
+
+                    for i, xvl in enumerate(xvals):
+                        yvl = yvals[i]
+                        if yerrs is not None:
+                            yerr = _error_array(yerrs[i], xvl)
+                        else:
+                            yerr = None
+                        if xerrs is not None:
+                            xerr = _error_array(xerrs[i], xvl)
+                        else:
+                            xerr = None
+
+                        CR = COLORs[i]
+
+                        if LABELs is not None:
+                            LAB = LABELs[i]
+                        else:
+                            LAB = None
+
+                        if LINEs is not None:
+                            LN = LINEs[i]
+                        else:
+                            LN = '--'
+                        if LINEWs is not None:
+                            LW = LINEWs[i]
+                        else:
+                            LW = 1
+
+                        if POINTs is not None:
+                            PI = POINTs[i]
+                        else:
+                            PI = 'o'
+                        if POINTSs is not None:
+                            MS = POINTSs[i]
+                        else:
+                            MS = 2
+
+                        if ERRORSIZEs is not None:
+                            ERRORSIZE = ERRORSIZEs[i]
+                        else:
+                            ERRORSIZE = 2
+
+                        tmp = ax.errorbar(xvl, yvl, xerr=xerr, yerr=yerr, color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE)
+                        if (LABEL_position!='inSub') and (i_plot==0):
+                            handles.append(tmp)
+                        del tmp
+
+                    if (LABEL_position=='inSub') and (LABELs is not None) and (i_plot == LABEL_position_SUBid):
+                        ax.legend(frameon=legend_frame, loc=loc_legend)
+
+                    if fill_between_xs_list is not None:
+                        fill_between_xs = fill_between_xs_list[i_plot]
+                        fill_between_yLows = fill_between_yLows_list[i_plot]
+                        fill_between_yHighs = fill_between_yHighs_list[i_plot]
+                        fill_between_COLORs = fill_between_COLORs_list[i_plot]
+                        fill_between_alphas = fill_between_alphas_list[i_plot]
+                        for i_fill, fill_between_x in enumerate(fill_between_xs):
+                            ax.fill_between(fill_between_x, 
+                                        fill_between_yLows[i_fill], fill_between_yHighs[i_fill],
+                                        alpha=fill_between_alphas[i_fill],
+                                        color=fill_between_COLORs[i_fill])
+
+                    if subLABEL_list is not None:
+                        LABEL = subLABEL_list[i_plot]
+                        ax.text(subLABEL_locX, subLABEL_locY, LABEL, transform=ax.transAxes,
+                            bbox=subLABEL_bbox)
+
+                    if XRANGE is not None:
+                        ax.set_xlim(XRANGE[0], XRANGE[1])
+                    if YRANGE is not None:
+                        ax.set_ylim(YRANGE[0], YRANGE[1])
+
+                    if YRANGE_list is not None:
+                        ax.set_ylim(YRANGE_list[i_plot][0], YRANGE_list[i_plot][1])
+
+                    if YLABEL_list is not None:
+                        ax.set_ylabel(YLABEL_list[i_plot])
+
+                    if vlines is not None:
+                        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+                    if hlines is not None:
+                        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+
                     if xlog:
-                        ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-                    else:
-                        ax.xaxis.set_minor_locator(AutoMinorLocator())
-                if ytick_min_label:
+                        ax.set_xscale('log')
+                        ax.xaxis.set_minor_formatter(NullFormatter())
                     if ylog:
-                        ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-                    else:
-                        ax.yaxis.set_minor_locator(AutoMinorLocator())
+                        ax.set_yscale('log')
 
-                if xtick_spe is not None:
-                    ax.set_xticks(xtick_spe[0])
-                    ax.set_xticklabels(xtick_spe[1])
-                if ytick_spe is not None:
-                    ax.set_yticks(ytick_spe[0])
-                    ax.set_yticklabels(ytick_spe[1])
+                    if xtick_min_label:
+                        if xlog:
+                            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+                        else:
+                            ax.xaxis.set_minor_locator(AutoMinorLocator())
+                    if ytick_min_label:
+                        if ylog:
+                            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+                        else:
+                            ax.yaxis.set_minor_locator(AutoMinorLocator())
 
-                if (no_xticklabels_list is not None) and (no_xticklabels_list[i_plot]):
-                    ax.set_xticklabels([])
+                    if xtick_spe is not None:
+                        ax.set_xticks(xtick_spe[0])
+                        ax.set_xticklabels(xtick_spe[1])
+                    if ytick_spe is not None:
+                        ax.set_yticks(ytick_spe[0])
+                        ax.set_yticklabels(ytick_spe[1])
 
-                if (no_yticklabels_list is not None) and (no_yticklabels_list[i_plot]):
-                    ax.set_yticklabels([])
+                    if (no_xticklabels_list is not None) and (no_xticklabels_list[i_plot]):
+                        ax.set_xticklabels([])
 
-                if invertY:
-                    plt.gca().invert_yaxis()
-                if invertX:
-                    plt.gca().invert_xaxis()
+                    if (no_yticklabels_list is not None) and (no_yticklabels_list[i_plot]):
+                        ax.set_yticklabels([])
 
-            i_plot +=1
+                    if invertY:
+                        ax.yaxis.set_inverted(True)
+                    if invertX:
+                        ax.xaxis.set_inverted(True)
 
-    fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
-    fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
+                i_plot +=1
 
-    if TITLE is not None:
-        fig.text(0.5, 0.90, TITLE, ha='center')
+        fig.text(0.5, 0.01, XLABEL, ha='center', va='bottom')
+        fig.text(0.01, 0.5, YLABEL, ha='left', va='center', rotation='vertical')
+
+        if TITLE is not None:
+            fig.text(0.5, 0.90, TITLE, ha='center')
 
-    if (LABEL_position=='right') and (LABELs is not None):
-        fig.legend(handles, LABELs, 
-                loc = 'upper right',
-                bbox_to_anchor=(0.92, 0.35), fancybox=True, shadow=True)
+        if (LABEL_position=='right') and (LABELs is not None):
+            fig.legend(handles, LABELs, 
+                    loc = 'upper right',
+                    bbox_to_anchor=(0.92, 0.35), fancybox=True, shadow=True)
 
-    if (LABEL_position=='top') and (LABELs is not None):
-        fig.legend(handles, LABELs, 
-                loc = 'center', ncol=LABEL_cols,
-                bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
+        if (LABEL_position=='top') and (LABELs is not None):
+            fig.legend(handles, LABELs, 
+                    loc = 'center', ncol=LABEL_cols,
+                    bbox_to_anchor=(0.5, 0.95), fancybox=True, shadow=True)
 
-    if TIGHT:
-        plt.tight_layout()
+        if TIGHT:
+            fig.tight_layout()
 
-    if outpath == 'show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Errorbar plot saved as", outpath)
+    return _finish_figure(fig, outpath, rc, "Errorbar plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
 
+@_instrumented
 def ScatterPlotFunc(outpath,
                 xval, yval, POINT=None, POINTS=None, alpha=None,
                 cval=None, cmap=None, cmin=None, cmax=None, clog=False,
@@ -794,89 +799,118 @@ def ScatterPlotFunc(outpath,
                 loc_legend='best', legend_frame=False,
                 font_size=12, usetex=False,
                 FIGSIZE=[6.4, 4.8],
-                texPacks=None):
+                texPacks=None,
+                aggregate=None, aggregate_bins=None, decimate=False,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     scatter plot with colourful points
         only support for one set of parameters
         for multi sets of parameters use LinePlotFunc
+        aggregate: None (one marker per point) or 'count', 'mean', 'median' (of cval)
+                    points are binned on a grid of cells, drawn as an image coloured by the statistic,
+                    so that the drawing time does not depend on the number of points (empty cells are blank)
+        aggregate_bins: int or [nx, ny] cells of the grid (None: one cell per pixel of the axes at dpi)
+        decimate: only the last point falling in each pixel of the figure (at FIGSIZE and dpi) is drawn,
+                    which looks the same for opaque markers (per-point cval, POINTS, alpha are kept with their points)
+                    (a number: cells of that many pixels, e.g. a fraction of the marker size, for fewer points)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-    if texPacks is not None:
-        for texPack in texPacks:
-            plt.rcParams['text.latex.preamble']=texPack
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
-    fig, ax = plt.subplots(figsize=FIGSIZE)
-
-    if clog:
-        norm = mpl.colors.LogNorm(vmin=cmin, vmax=cmax)
-    else:
-        norm = mpl.colors.Normalize(vmin=cmin, vmax=cmax)
-    plt.scatter(xval, yval, s=POINTS, c=cval, marker=POINT,
-                cmap=cmap, norm=norm, alpha=alpha)
-
-    if cval is not None:
-        plt.colorbar(location=bar_loc, orientation=bar_ori, ticks=bar_tick, label=bar_label)
-
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
-    if YRANGE is not None:
-        plt.ylim(YRANGE[0], YRANGE[1])
-
-    if xlog:
-        plt.xscale('log')
-    if ylog:
-        plt.yscale('log')
-
-    if vlines is not None:
-        _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths)
-    if hlines is not None:
-        _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths)
-
-    if xtick_min_label:
-        if xlog:
-            ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+    # tex packages
+    tex_rc = {'text.latex.preamble': '\n'.join(texPacks)} if texPacks is not None else None
+
+    if decimate and (aggregate is None):
+        N_points = np.size(xval)
+        keep = _decimate_index(xval, yval, _decimate_bins(FIGSIZE, dpi, decimate), XRANGE, YRANGE,
+                            xlog=xlog, ylog=ylog)
+        xval, yval = np.asarray(xval).ravel()[keep], np.asarray(yval).ravel()[keep]
+        # per-point properties follow their points
+        if (cval is not None) and (np.size(cval) == N_points):
+            cval = np.asarray(cval).ravel()[keep]
+        if (POINTS is not None) and (np.size(POINTS) == N_points):
+            POINTS = np.asarray(POINTS).ravel()[keep]
+        if (alpha is not None) and (np.size(alpha) == N_points):
+            alpha = np.asarray(alpha).ravel()[keep]
+
+    with _figure_context(font_size, usetex, rc=tex_rc) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        ax = fig.subplots()
+
+        if clog:
+            norm = mpl.colors.LogNorm(vmin=cmin, vmax=cmax)
         else:
-            ax.xaxis.set_minor_locator(AutoMinorLocator())
-    if ytick_min_label:
-        if ylog:
-            ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            norm = mpl.colors.Normalize(vmin=cmin, vmax=cmax)
+        if aggregate is None:
+            sc = ax.scatter(xval, yval, s=POINTS, c=cval, marker=POINT,
+                        cmap=cmap, norm=norm, alpha=alpha)
         else:
-            ax.yaxis.set_minor_locator(AutoMinorLocator())
-
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-    if ytick_spe is not None:
-        plt.yticks(ytick_spe[0], ytick_spe[1])
-
-    if invertX:
-        plt.gca().invert_xaxis()
-    if invertY:
-        plt.gca().invert_yaxis()
-
-    plt.xlabel(XLABEL)
-    plt.ylabel(YLABEL)
-    if TITLE is not None:
-        plt.title(TITLE)
-
-    plt.tight_layout()
-
-    if outpath=='show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Scatter plot saved as", outpath)
+            if aggregate_bins is None:
+                bbox = ax.get_position()
+                aggregate_bins = [max(int(bbox.width*FIGSIZE[0]*dpi), 1), max(int(bbox.height*FIGSIZE[1]*dpi), 1)]
+            grid, xedges, yedges = compute_binned_stat2d(xval, yval, aggregate_bins, XRANGE, YRANGE,
+                                    cval=(cval if aggregate != 'count' else None), statistic=aggregate,
+                                    xlog=xlog, ylog=ylog)
+            # images are stretched linearly, so cells on logarithmic axes are drawn as a mesh
+            if xlog or ylog:
+                sc = ax.pcolormesh(xedges, yedges, grid.T, cmap=cmap, norm=norm, alpha=alpha)
+            else:
+                sc = ax.imshow(grid.T, origin='lower', extent=(xedges[0], xedges[-1], yedges[0], yedges[-1]),
+                            aspect='auto', interpolation='nearest', cmap=cmap, norm=norm, alpha=alpha)
+
+        if (cval is not None) or (aggregate is not None):
+            fig.colorbar(sc, ax=ax, location=bar_loc, orientation=bar_ori, ticks=bar_tick, label=bar_label)
 
+        if XRANGE is not None:
+            ax.set_xlim(XRANGE[0], XRANGE[1])
+        if YRANGE is not None:
+            ax.set_ylim(YRANGE[0], YRANGE[1])
+
+        if xlog:
+            ax.set_xscale('log')
+        if ylog:
+            ax.set_yscale('log')
+
+        if vlines is not None:
+            _vhlines('v', vlines, line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths, ax=ax)
+        if hlines is not None:
+            _vhlines('h', hlines, line_styles=hline_styles, line_colors=hline_colors, line_labels=hline_labels, line_widths=hline_widths, ax=ax)
+
+        if xtick_min_label:
+            if xlog:
+                ax.xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.xaxis.set_minor_locator(AutoMinorLocator())
+        if ytick_min_label:
+            if ylog:
+                ax.yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                ax.yaxis.set_minor_locator(AutoMinorLocator())
+
+        if xtick_spe is not None:
+            ax.set_xticks(xtick_spe[0], labels=xtick_spe[1])
+        if ytick_spe is not None:
+            ax.set_yticks(ytick_spe[0], labels=ytick_spe[1])
+
+        if invertX:
+            ax.invert_xaxis()
+        if invertY:
+            ax.invert_yaxis()
+
+        ax.set_xlabel(XLABEL)
+        ax.set_ylabel(YLABEL)
+        if TITLE is not None:
+            ax.set_title(TITLE)
+
+        fig.tight_layout()
+
+    return _finish_figure(fig, outpath, rc, "Scatter plot saved as",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer)
+
+@_instrumented
 def ErrorPlotFunc_2sub_shareX(outpath,
                 xvals_u, yvals_u, yerrs_u,
                 xvals_d, yvals_d, yerrs_d,
@@ -907,264 +941,249 @@ def ErrorPlotFunc_2sub_shareX(outpath,
                 alpha_list_d = None, zorder_list_d = None,
                 FIGSIZE=[6.4, 4.8],
                 transparent=False,
-                font_size_label=None):
+                font_size_label=None,
+                dpi=300, fig_format=None, rasterize_threshold=100000, writer=None):
     """
     Errorbar plot for multiple parameters
+        yerrs_u, yerrs_d, xerrs_u, xerrs_d: errors of each series (None: no error bars), symmetric (N values),
+                or lower and upper: (lower, upper), a 2xN array, an (N, 2) array or N records with two fields
+                (arrays are used as views, without copying)
+        dpi, fig_format: resolution and format of the saved figure (format from the outpath extension if None)
+        rasterize_threshold: data artists with more elements (points, segments, vertices) are rasterized,
+                        so that vector outputs (pdf, svg) do not grow with the data (None: never rasterized)
+        writer: AsyncWriter, the figure is drawn here and written by its background thread
+                (a Future of the write is returned)
     """
 
-    # font size
-    plt.rc('font', size=font_size)
     if font_size_label is None:
         font_size_label = font_size
-    # tex
-    plt.rcParams["text.usetex"] = usetex
-
-    if outpath != 'show':
-        backend_orig = plt.get_backend()
-        plt.switch_backend("agg")
-
-    # two subplots with ratio: 3:1
-    fig, axs = plt.subplots(2, 1, figsize=FIGSIZE, gridspec_kw={'height_ratios': [3, 1]})
-
-    # the upper plot
-    for i, xvl in enumerate(xvals_u):
-        yvl = yvals_u[i]
-        if yerrs_u is not None:
-            yerr = yerrs_u[i]
-            if yerr is not None:
-                yerr = np.array(yerr)
-                yerr = np.vstack([yerr[0], yerr[1]])
-        else:
-            yerr = None
 
-        if xerrs_u is not None:
-            xerr = xerrs_u[i]
-            if xerr is not None:
-                xerr = np.array(xerr)
-                xerr = np.vstack([xerr[0], xerr[1]])
-        else:
-            xerr = None
+    with _figure_context(font_size, usetex) as rc:
+        fig = _new_figure(outpath, figsize=FIGSIZE)
+        # two subplots with ratio: 3:1
+        axs = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]})
 
-        CR = COLORs_u[i]
+        # the upper plot
+        for i, xvl in enumerate(xvals_u):
+            yvl = yvals_u[i]
+            if yerrs_u is not None:
+                yerr = _error_array(yerrs_u[i], xvl)
+            else:
+                yerr = None
 
-        if alpha_list_u is not None:
-            alpha = alpha_list_u[i]
-        else:
-            alpha = None
-        if zorder_list_u is not None:
-            zorder = zorder_list_u[i]
-        else:
-            zorder = i + 1
+            if xerrs_u is not None:
+                xerr = _error_array(xerrs_u[i], xvl)
+            else:
+                xerr = None
 
-        if LABELs_u is not None:
-            LAB = LABELs_u[i]
-        else:
-            LAB = None
+            CR = COLORs_u[i]
 
-        if LINEs_u is not None:
-            LN = LINEs_u[i]
-        else:
-            LN = '--'
-        if LINEWs_u is not None:
-            LW = LINEWs_u[i]
-        else:
-            LW = 1
+            if alpha_list_u is not None:
+                alpha = alpha_list_u[i]
+            else:
+                alpha = None
+            if zorder_list_u is not None:
+                zorder = zorder_list_u[i]
+            else:
+                zorder = i + 1
 
-        if POINTs_u is not None:
-            PI = POINTs_u[i]
-        else:
-            PI = 'o'
-        if POINTSs_u is not None:
-            MS = POINTSs_u[i]
-        else:
-            MS = 2
+            if LABELs_u is not None:
+                LAB = LABELs_u[i]
+            else:
+                LAB = None
 
-        if ERRORSIZEs_u is not None:
-            ERRORSIZE = ERRORSIZEs_u[i]
-        else:
-            ERRORSIZE = 2
+            if LINEs_u is not None:
+                LN = LINEs_u[i]
+            else:
+                LN = '--'
+            if LINEWs_u is not None:
+                LW = LINEWs_u[i]
+            else:
+                LW = 1
 
-        axs[0].errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
-            color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE,
-            alpha=alpha,
-            zorder=zorder)
+            if POINTs_u is not None:
+                PI = POINTs_u[i]
+            else:
+                PI = 'o'
+            if POINTSs_u is not None:
+                MS = POINTSs_u[i]
+            else:
+                MS = 2
 
-    if fill_between_xs_u is not None:
-        for i_fill, fill_between_x in enumerate(fill_between_xs_u):
-            axs[0].fill_between(fill_between_x, 
-                        fill_between_yLows_u[i_fill], fill_between_yHighs_u[i_fill],
-                        alpha=fill_between_alphas_u[i_fill],
-                        color=fill_between_COLORs_u[i_fill])
+            if ERRORSIZEs_u is not None:
+                ERRORSIZE = ERRORSIZEs_u[i]
+            else:
+                ERRORSIZE = 2
 
-    if YRANGE_u is not None:
-        axs[0].set_ylim(YRANGE_u[0], YRANGE_u[1])
+            axs[0].errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
+                color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE,
+                alpha=alpha,
+                zorder=zorder)
 
-    if ylog_u:
-        axs[0].set_yscale('log')
+        if fill_between_xs_u is not None:
+            for i_fill, fill_between_x in enumerate(fill_between_xs_u):
+                axs[0].fill_between(fill_between_x, 
+                            fill_between_yLows_u[i_fill], fill_between_yHighs_u[i_fill],
+                            alpha=fill_between_alphas_u[i_fill],
+                            color=fill_between_COLORs_u[i_fill])
 
-    if vlines is not None:
-        _vhlines('v', vlines, 
-                line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths,
-                ax=axs[0])
+        if YRANGE_u is not None:
+            axs[0].set_ylim(YRANGE_u[0], YRANGE_u[1])
 
-    if hlines_u is not None:
-        _vhlines('h', hlines_u, 
-                line_styles=hline_styles_u, line_colors=hline_colors_u, line_labels=hline_labels_u, line_widths=hline_widths_u,
-                ax=axs[0])
+        if ylog_u:
+            axs[0].set_yscale('log')
 
-    if LABELs_u is not None:
-        axs[0].legend(frameon=legend_frame_u, framealpha=frame_alpha_u,
-                      loc=loc_legend_u, fontsize=font_size_label)
+        if vlines is not None:
+            _vhlines('v', vlines, 
+                    line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths,
+                    ax=axs[0])
 
-    if ytick_min_label_u:
-        if ylog_u:
-            axs[0].yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            axs[0].yaxis.set_minor_locator(AutoMinorLocator())
-
-    if ytick_spe_u is not None:
-        axs[0].set_yticks(ytick_spe_u[0], ytick_spe_u[1])
-
-    if invertY_u:
-        axs[0].invert_yaxis()
-
-    axs[0].set_ylabel(YLABEL_u)
-    if TITLE is not None:
-        axs[0].set_title(TITLE)
-
-    # the lower plot
-    for i, xvl in enumerate(xvals_d):
-        yvl = yvals_d[i]
-        if yerrs_d is not None:
-            yerr = yerrs_d[i]
-            if yerr is not None:
-                yerr = np.array(yerr)
-                yerr = np.vstack([yerr[0], yerr[1]])
-        else:
-            yerr = None
+        if hlines_u is not None:
+            _vhlines('h', hlines_u, 
+                    line_styles=hline_styles_u, line_colors=hline_colors_u, line_labels=hline_labels_u, line_widths=hline_widths_u,
+                    ax=axs[0])
 
-        if xerrs_d is not None:
-            xerr = xerrs_d[i]
-            if xerr is not None:
-                xerr = np.array(xerr)
-                xerr = np.vstack([xerr[0], xerr[1]])
-        else:
-            xerr = None
+        if LABELs_u is not None:
+            axs[0].legend(frameon=legend_frame_u, framealpha=frame_alpha_u,
+                          loc=loc_legend_u, fontsize=font_size_label)
 
-        CR = COLORs_d[i]
+        if ytick_min_label_u:
+            if ylog_u:
+                axs[0].yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                axs[0].yaxis.set_minor_locator(AutoMinorLocator())
 
-        if alpha_list_d is not None:
-            alpha = alpha_list_d[i]
-        else:
-            alpha = None
-        if zorder_list_d is not None:
-            zorder = zorder_list_d[i]
-        else:
-            zorder = i + 1
+        if ytick_spe_u is not None:
+            axs[0].set_yticks(ytick_spe_u[0], ytick_spe_u[1])
 
-        if LABELs_d is not None:
-            LAB = LABELs_d[i]
-        else:
-            LAB = None
+        if invertY_u:
+            axs[0].invert_yaxis()
 
-        if LINEs_d is not None:
-            LN = LINEs_d[i]
-        else:
-            LN = '--'
-        if LINEWs_d is not None:
-            LW = LINEWs_d[i]
-        else:
-            LW = 1
+        axs[0].set_ylabel(YLABEL_u)
+        if TITLE is not None:
+            axs[0].set_title(TITLE)
 
-        if POINTs_d is not None:
-            PI = POINTs_d[i]
-        else:
-            PI = 'o'
-        if POINTSs_d is not None:
-            MS = POINTSs_d[i]
-        else:
-            MS = 2
+        # the lower plot
+        for i, xvl in enumerate(xvals_d):
+            yvl = yvals_d[i]
+            if yerrs_d is not None:
+                yerr = _error_array(yerrs_d[i], xvl)
+            else:
+                yerr = None
 
-        if ERRORSIZEs_d is not None:
-            ERRORSIZE = ERRORSIZEs_d[i]
-        else:
-            ERRORSIZE = 2
+            if xerrs_d is not None:
+                xerr = _error_array(xerrs_d[i], xvl)
+            else:
+                xerr = None
 
-        axs[1].errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
-            color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE,
-            alpha=alpha,
-            zorder=zorder)
+            CR = COLORs_d[i]
 
-    if fill_between_xs_d is not None:
-        for i_fill, fill_between_x in enumerate(fill_between_xs_d):
-            axs[1].fill_between(fill_between_x, 
-                        fill_between_yLows_d[i_fill], fill_between_yHighs_d[i_fill],
-                        alpha=fill_between_alphas_d[i_fill],
-                        color=fill_between_COLORs_d[i_fill])
+            if alpha_list_d is not None:
+                alpha = alpha_list_d[i]
+            else:
+                alpha = None
+            if zorder_list_d is not None:
+                zorder = zorder_list_d[i]
+            else:
+                zorder = i + 1
 
-    if YRANGE_d is not None:
-        axs[1].set_ylim(YRANGE_d[0], YRANGE_d[1])
+            if LABELs_d is not None:
+                LAB = LABELs_d[i]
+            else:
+                LAB = None
 
-    if ylog_d:
-        axs[1].set_yscale('log')
+            if LINEs_d is not None:
+                LN = LINEs_d[i]
+            else:
+                LN = '--'
+            if LINEWs_d is not None:
+                LW = LINEWs_d[i]
+            else:
+                LW = 1
 
-    if vlines is not None:
-        _vhlines('v', vlines, 
-                 line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths,
-                 ax=axs[1])
+            if POINTs_d is not None:
+                PI = POINTs_d[i]
+            else:
+                PI = 'o'
+            if POINTSs_d is not None:
+                MS = POINTSs_d[i]
+            else:
+                MS = 2
+
+            if ERRORSIZEs_d is not None:
+                ERRORSIZE = ERRORSIZEs_d[i]
+            else:
+                ERRORSIZE = 2
 
-    if hlines_d is not None:
-        _vhlines('h', hlines_d, 
-                line_styles=hline_styles_d, line_colors=hline_colors_d, line_labels=hline_labels_d, line_widths=hline_widths_d,
-                ax=axs[1])
+            axs[1].errorbar(xvl, yvl, xerr=xerr, yerr=yerr, 
+                color=CR, label=LAB, linestyle=LN, linewidth=LW, marker=PI, markersize=MS, capsize=ERRORSIZE,
+                alpha=alpha,
+                zorder=zorder)
 
-    if LABELs_d is not None:
-        axs[1].legend(frameon=legend_frame_d, framealpha=frame_alpha_d,
-                      loc=loc_legend_d, fontsize=font_size_label)
+        if fill_between_xs_d is not None:
+            for i_fill, fill_between_x in enumerate(fill_between_xs_d):
+                axs[1].fill_between(fill_between_x, 
+                            fill_between_yLows_d[i_fill], fill_between_yHighs_d[i_fill],
+                            alpha=fill_between_alphas_d[i_fill],
+                            color=fill_between_COLORs_d[i_fill])
+
+        if YRANGE_d is not None:
+            axs[1].set_ylim(YRANGE_d[0], YRANGE_d[1])
 
-    if ytick_min_label_d:
         if ylog_d:
-            axs[1].yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            axs[1].yaxis.set_minor_locator(AutoMinorLocator())
-
-    if ytick_spe_d is not None:
-        axs[1].set_yticks(ytick_spe_d[0], ytick_spe_d[1])
-
-    if invertY_d:
-        axs[1].invert_yaxis()
-
-    axs[1].set_ylabel(YLABEL_d)
-
-    # share the x
-    axs[0].get_shared_x_axes().join(axs[0], axs[1])
-    # Hide top x-tick labels 
-    axs[0].tick_params(labelbottom=False)
-    # x axis info
-    if XRANGE is not None:
-        plt.xlim(XRANGE[0], XRANGE[1])
-    if xlog:
-        plt.xscale('log')
-    if xtick_min_label:
+            axs[1].set_yscale('log')
+
+        if vlines is not None:
+            _vhlines('v', vlines, 
+                     line_styles=vline_styles, line_colors=vline_colors, line_labels=vline_labels, line_widths=vline_widths,
+                     ax=axs[1])
+
+        if hlines_d is not None:
+            _vhlines('h', hlines_d, 
+                    line_styles=hline_styles_d, line_colors=hline_colors_d, line_labels=hline_labels_d, line_widths=hline_widths_d,
+                    ax=axs[1])
+
+        if LABELs_d is not None:
+            axs[1].legend(frameon=legend_frame_d, framealpha=frame_alpha_d,
+                          loc=loc_legend_d, fontsize=font_size_label)
+
+        if ytick_min_label_d:
+            if ylog_d:
+                axs[1].yaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                axs[1].yaxis.set_minor_locator(AutoMinorLocator())
+
+        if ytick_spe_d is not None:
+            axs[1].set_yticks(ytick_spe_d[0], ytick_spe_d[1])
+
+        if invertY_d:
+            axs[1].invert_yaxis()
+
+        axs[1].set_ylabel(YLABEL_d)
+
+        # share the x
+        axs[1].sharex(axs[0])
+        # Hide top x-tick labels 
+        axs[0].tick_params(which='both', labelbottom=False)
+        # x axis info
+        if XRANGE is not None:
+            axs[1].set_xlim(XRANGE[0], XRANGE[1])
         if xlog:
-            axs[0].xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
-        else:
-            axs[0].xaxis.set_minor_locator(AutoMinorLocator())
-    if xtick_spe is not None:
-        plt.xticks(xtick_spe[0], xtick_spe[1])
-    if invertX:
-        plt.gca().invert_xaxis()
-
-    axs[1].set_xlabel(XLABEL)
-
-    plt.tight_layout()
-
-    if outpath=='show':
-        plt.show()
-        plt.close()
-    else:
-        plt.savefig(outpath, dpi=300, transparent=transparent)
-        plt.close()
-        plt.switch_backend(backend_orig)
-        print("Errorbar plot saved in", outpath)
+            axs[1].set_xscale('log')
+        if xtick_min_label:
+            if xlog:
+                axs[0].xaxis.set_minor_locator(LogLocator(base=10.0, subs=None, numticks=10))
+            else:
+                axs[0].xaxis.set_minor_locator(AutoMinorLocator())
+        if xtick_spe is not None:
+            axs[1].set_xticks(xtick_spe[0], labels=xtick_spe[1])
+        if invertX:
+            axs[1].invert_xaxis()
+
+        axs[1].set_xlabel(XLABEL)
+
+        fig.tight_layout()
+
+    return _finish_figure(fig, outpath, rc, "Errorbar plot saved in",
+            dpi=dpi, fig_format=fig_format, rasterize_threshold=rasterize_threshold, writer=writer, transparent=transparent)
 
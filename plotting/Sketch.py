@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 17:32:47
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 17:32:47
+
+### streaming quantile estimates for automatic bins
+
+__all__ = ["QuantileSketch", "compute_sketch"]
+# examples need data, not run by pytest-doctestplus
+__doctest_skip__ = ["QuantileSketch"]
+
+import logging
+
+import numpy as np
+
+from .Binning import _iter_chunks, BLOCK_SIZE
+
+logger = logging.getLogger(__name__)
+
+class _BucketStore:
+    """
+    Dense (weighted) counts of consecutive integer bucket keys, growing as needed
+    """
+
+    def __init__(self):
+
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.float64)
+
+    def _extend(self, key_min, key_max):
+
+        if len(self.counts) == 0:
+            self.offset = key_min
+            self.counts = np.zeros(key_max - key_min + 1, dtype=np.float64)
+            return
+
+        offset = min(self.offset, key_min)
+        size = max(self.offset + len(self.counts), key_max + 1) - offset
+        if (offset != self.offset) or (size != len(self.counts)):
+            counts = np.zeros(size, dtype=np.float64)
+            counts[self.offset-offset:self.offset-offset+len(self.counts)] = self.counts
+            self.offset, self.counts = offset, counts
+
+    def add(self, keys, weights=None):
+
+        if len(keys) == 0:
+            return
+        key_min, key_max = int(keys.min()), int(keys.max())
+        self._extend(key_min, key_max)
+        self.counts[key_min-self.offset:key_max-self.offset+1] += np.bincount(keys - key_min, weights=weights,
+                                                                        minlength=key_max-key_min+1)
+
+    def merge(self, other):
+
+        if len(other.counts) == 0:
+            return
+        self._extend(other.offset, other.offset + len(other.counts) - 1)
+        self.counts[other.offset-self.offset:other.offset-self.offset+len(other.counts)] += other.counts
+
+    def keys(self):
+
+        return np.arange(self.offset, self.offset + len(self.counts))
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with a relative accuracy guarantee (DDSketch)
+        values are counted in logarithmic buckets of |x| (one pass, no sorting),
+        sketches of different chunks or processes are combined with merge,
+        and quantiles are accurate to relative_accuracy * |x|
+
+    Parameters
+    ----------
+    relative_accuracy : float, default: 0.005
+        relative accuracy of the quantiles
+
+    Examples
+    --------
+    >>> sketch = QuantileSketch()
+    >>> for chunk in chunks:
+    ...     sketch.update(chunk)
+    >>> sketch.quantile([0.01, 0.5, 0.99])
+    """
+
+    def __init__(self, relative_accuracy=0.005):
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1. + relative_accuracy) / (1. - relative_accuracy)
+        self._inv_log_gamma = 1. / np.log(self.gamma)
+        # smaller values go to the zero bucket
+        self._min_value = np.finfo(np.float64).tiny * self.gamma
+
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()
+        self.zero_count = 0.
+        self.count = 0.
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _keys(self, values):
+
+        keys = np.log(values)
+        keys *= self._inv_log_gamma
+        np.ceil(keys, out=keys)
+        return keys.astype(np.int64)
+
+    def update(self, values, weights=None):
+        """
+        Add values (and their weights) to the sketch, NaN values are ignored
+        """
+
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64).ravel()
+
+        for i_start in range(0, len(values), BLOCK_SIZE):
+            block = values[i_start:i_start+BLOCK_SIZE]
+            wg_block = weights[i_start:i_start+BLOCK_SIZE] if weights is not None else None
+
+            valid = ~np.isnan(block)
+            if not np.all(valid):
+                block = block[valid]
+                if wg_block is not None:
+                    wg_block = wg_block[valid]
+            if len(block) == 0:
+                continue
+
+            self.min = min(self.min, block.min())
+            self.max = max(self.max, block.max())
+            self.count += (len(block) if wg_block is None else np.sum(wg_block))
+
+            positive = block > self._min_value
+            negative = block < -self._min_value
+            self._positive.add(self._keys(block[positive]),
+                                weights=(wg_block[positive] if wg_block is not None else None))
+            self._negative.add(self._keys(-block[negative]),
+                                weights=(wg_block[negative] if wg_block is not None else None))
+            zero = ~(positive | negative)
+            self.zero_count += (np.count_nonzero(zero) if wg_block is None else np.sum(wg_block[zero]))
+
+        return self
+
+    def merge(self, other):
+        """
+        Add the content of another sketch (with the same relative_accuracy)
+        """
+
+        if other.gamma != self.gamma:
+            raise Exception('Only sketches with the same relative_accuracy can be merged!')
+
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    def _buckets(self):
+        """
+        Representative values and counts of all buckets in increasing order
+        """
+
+        scale = 2. / (1. + self.gamma)
+        values = np.concatenate([-scale * self.gamma**self._negative.keys()[::-1],
+                                [0.],
+                                scale * self.gamma**self._positive.keys()])
+        counts = np.concatenate([self._negative.counts[::-1], [self.zero_count], self._positive.counts])
+
+        return values, counts
+
+    def quantile(self, q):
+        """
+        Values at the quantiles q (scalar or array-like in [0, 1])
+        """
+
+        if self.count <= 0:
+            raise Exception('Empty sketch!')
+
+        values, counts = self._buckets()
+        cum = np.cumsum(counts)
+        index = np.searchsorted(cum, np.asarray(q, dtype=np.float64) * cum[-1], side='left')
+        index = np.clip(index, 0, len(values)-1)
+
+        res = np.clip(values[index], self.min, self.max)
+        res = np.where(np.asarray(q) <= 0, self.min, res)
+        res = np.where(np.asarray(q) >= 1, self.max, res)
+
+        return res if np.ndim(q) else float(res)
+
+    def cdf(self, x):
+        """
+        Fraction of the (weighted) values below x (scalar or array-like)
+        """
+
+        if self.count <= 0:
+            raise Exception('Empty sketch!')
+
+        values, counts = self._buckets()
+        cum = np.concatenate([[0.], np.cumsum(counts)])
+
+        return cum[np.searchsorted(values, x, side='right')] / cum[-1]
+
+    def edges(self, nbins, XRANGE=None):
+        """
+        nbins bin edges with (about) the same number of values in each bin
+            XRANGE: only the values within [min, max] are split
+            edges closer than the accuracy are merged, so fewer bins may be returned
+        """
+
+        if XRANGE is None:
+            q_min, q_max = 0., 1.
+        else:
+            q_min, q_max = self.cdf(XRANGE[0]), self.cdf(XRANGE[1])
+
+        edges = self.quantile(np.linspace(q_min, q_max, nbins))
+        if XRANGE is not None:
+            edges[0], edges[-1] = XRANGE[0], XRANGE[-1]
+            edges = np.clip(edges, XRANGE[0], XRANGE[1])
+        edges = np.unique(edges)
+        if len(edges) < nbins:
+            logger.warning(f'Only {len(edges)-1} distinct quantile bins are found!')
+
+        return edges
+
+def compute_sketch(para, wg=None, relative_accuracy=0.005, xlog=False, chunk_size=None):
+    """
+    Quantile sketch of one parameter, built chunk by chunk
+        sketches of several parameters (or computed in parallel) are combined with merge
+
+    Parameters
+    ----------
+    para : array-like, path to a .npy file or (path, column) of a .npy structured array or FITS binary table
+        values
+
+    wg : array-like, path to a .npy file or (path, column), default: None
+        weights of the values
+
+    relative_accuracy : float, default: 0.005
+        relative accuracy of the quantiles
+
+    xlog : bool, default: False
+        only keep positive values (for logarithmic bins)
+
+    chunk_size : int, default: None
+        number of values read at once
+        None: whole arrays in one go (CHUNK_SIZE for files)
+
+    Returns
+    -------
+        QuantileSketch
+    """
+
+    sketch = QuantileSketch(relative_accuracy=relative_accuracy)
+    for para_chunk, wg_chunk in _iter_chunks(para, wg, chunk_size=chunk_size):
+        para_chunk = np.asarray(para_chunk).ravel()
+        if wg_chunk is not None:
+            wg_chunk = np.asarray(wg_chunk).ravel()
+        if xlog:
+            positive = para_chunk > 0
+            para_chunk = para_chunk[positive]
+            if wg_chunk is not None:
+                wg_chunk = wg_chunk[positive]
+        sketch.update(para_chunk, weights=wg_chunk)
+
+    return sketch
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 20:47:33
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 20:47:33
+
+### per-phase timing of the renders
+
+__all__ = ["RenderStats", "add_render_callback", "remove_render_callback", "record_render_stats"]
+# examples need data, not run by pytest-doctestplus
+__doctest_skip__ = ["record_render_stats"]
+
+import time
+import logging
+import functools
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+# phases of a render, in order
+PHASES = ('prepare', 'wait', 'artists', 'layout', 'draw', 'encode')
+
+# functions called with the RenderStats of each render (in the rendering thread)
+_CALLBACKS = []
+_CALLBACKS_LOCK = threading.Lock()
+
+# recorder of the render running in each thread
+_ACTIVE = threading.local()
+
+class RenderStats:
+    """
+    Wall and CPU time of each phase of one render, with the size of the figure
+        phases:
+            prepare: binning and data preparation (before the figure is created)
+            wait: waiting for other threads to finish drawing their figures
+            artists: artists, locators and legends
+            layout: tight_layout
+            draw: drawing the figure (ticks, texts, artists) when it is saved
+            encode: encoding and writing the file (in memory with an AsyncWriter)
+        CPU time is the time spent by the rendering thread
+
+    Attributes
+    ----------
+    func : str
+        name of the plotting function
+
+    outpath : str or None
+
+    wall, cpu : dict
+        seconds spent in each phase
+
+    n_artists : int
+        number of data artists (lines, collections, patches, images)
+
+    n_elements : int
+        number of points, segments and vertices of the data artists
+
+    output_bytes : int or None
+        size of the saved file (None if not saved, or written later by an AsyncWriter)
+    """
+
+    def __init__(self, func, outpath):
+
+        self.func = func
+        self.outpath = outpath if isinstance(outpath, str) else None
+        self.wall = dict.fromkeys(PHASES, 0.)
+        self.cpu = dict.fromkeys(PHASES, 0.)
+        self.n_artists = 0
+        self.n_elements = 0
+        self.output_bytes = None
+
+    @property
+    def wall_total(self):
+        return sum(self.wall.values())
+
+    @property
+    def cpu_total(self):
+        return sum(self.cpu.values())
+
+    def as_dict(self):
+        """
+        Flat dictionary (e.g. for monitoring or a table of many renders)
+        """
+
+        res = dict(func=self.func, outpath=self.outpath,
+                    wall_total=self.wall_total, cpu_total=self.cpu_total)
+        res.update({f'wall_{phase}': val for phase, val in self.wall.items()})
+        res.update({f'cpu_{phase}': val for phase, val in self.cpu.items()})
+        res.update(n_artists=self.n_artists, n_elements=self.n_elements, output_bytes=self.output_bytes)
+
+        return res
+
+    def __repr__(self):
+
+        phases = ', '.join(f'{phase}={self.wall[phase]:.3f}' for phase in PHASES if self.wall[phase] > 0)
+        return (f'RenderStats({self.func}: {self.wall_total:.3f} s [{phases}], '
+                f'{self.n_artists} artists, {self.n_elements} elements, {self.output_bytes} bytes)')
+
+class _Recorder:
+    """
+    Accumulate the time spent in the current phase until the next one
+    """
+
+    def __init__(self, stats):
+
+        self.stats = stats
+        self.phase = 'prepare'
+        self.t_wall = time.perf_counter()
+        self.t_cpu = time.thread_time()
+
+    def mark(self, phase):
+        """
+        Start a new phase, returns the previous one
+        """
+
+        t_wall, t_cpu = time.perf_counter(), time.thread_time()
+        self.stats.wall[self.phase] += t_wall - self.t_wall
+        self.stats.cpu[self.phase] += t_cpu - self.t_cpu
+        self.t_wall, self.t_cpu = t_wall, t_cpu
+
+        previous, self.phase = self.phase, phase
+        return previous
+
+def _active_recorder():
+    """
+    Recorder of the render running in this thread (None if the renders are not recorded)
+    """
+
+    return getattr(_ACTIVE, 'recorder', None)
+
+def _mark_phase(phase):
+    """
+    Start a phase of the current render (if recorded)
+    """
+
+    recorder = _active_recorder()
+    if recorder is not None:
+        recorder.mark(phase)
+
+@contextlib.contextmanager
+def _phase(phase):
+    """
+    Time a block as one phase, then go back to the previous one
+    """
+
+    recorder = _active_recorder()
+    if recorder is None:
+        yield
+        return
+
+    previous = recorder.mark(phase)
+    try:
+        yield
+    finally:
+        recorder.mark(previous)
+
+def _record_output(n_artists=None, n_elements=None, output_bytes=None):
+    """
+    Sizes of the figure of the current render (if recorded)
+    """
+
+    recorder = _active_recorder()
+    if recorder is None:
+        return
+
+    if n_artists is not None:
+        recorder.stats.n_artists = n_artists
+    if n_elements is not None:
+        recorder.stats.n_elements = n_elements
+    if output_bytes is not None:
+        recorder.stats.output_bytes = output_bytes
+
+def _instrumented(func):
+    """
+    Record the RenderStats of a plotting function when callbacks are registered
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+
+        # not recorded, or called by another plotting function
+        if (not _CALLBACKS) or (_active_recorder() is not None):
+            return func(*args, **kwargs)
+
+        stats = RenderStats(func.__name__, args[0] if args else kwargs.get('outpath'))
+        _ACTIVE.recorder = recorder = _Recorder(stats)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            recorder.mark(recorder.phase)
+            _ACTIVE.recorder = None
+            with _CALLBACKS_LOCK:
+                callbacks = list(_CALLBACKS)
+            for callback in callbacks:
+                try:
+                    callback(stats)
+                except Exception:
+                    logger.exception('Render callback failed')
+
+    return wrapper
+
+def add_render_callback(callback):
+    """
+    Call callback(RenderStats) after each render of the plotting functions
+        (in the thread of the render, also when it fails)
+    """
+
+    with _CALLBACKS_LOCK:
+        _CALLBACKS.append(callback)
+
+def remove_render_callback(callback):
+    """
+    Stop calling a callback added by add_render_callback
+    """
+
+    with _CALLBACKS_LOCK:
+        _CALLBACKS.remove(callback)
+
+@contextlib.contextmanager
+def record_render_stats():
+    """
+    Collect the RenderStats of the renders of this thread within the block
+
+    Yields
+    ------
+        list of RenderStats (filled as the renders finish)
+
+    Examples
+    --------
+    >>> with record_render_stats() as stats:
+    ...     HistPlotFunc(outpath, paras, wgs, COLORs, LABELs, nbins, XRANGE)
+    >>> stats[0].wall
+    """
+
+    stats = []
+    thread_id = threading.get_ident()
+
+    def _collect(res):
+        if threading.get_ident() == thread_id:
+            stats.append(res)
+
+    add_render_callback(_collect)
+    try:
+        yield stats
+    finally:
+        remove_render_callback(_collect)
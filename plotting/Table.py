@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 21:31:05
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 21:31:05
+
+### plotting functions fed with the columns of a table
+
+__all__ = ["table_series", "plot_table"]
+# examples need data, not run by pytest-doctestplus
+__doctest_skip__ = ["table_series", "plot_table"]
+
+import inspect
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# arguments taking one array rather than a list of series (ScatterPlotFunc)
+_SINGLE_SERIES = ('xval', 'yval', 'cval')
+
+def _column(table, name):
+    """
+    One column of a table as a numpy array, without copying when possible
+        numpy structured arrays: a strided view of the field
+        pyarrow tables: the buffer of single-chunk columns without nulls
+        pandas DataFrames: the block of the column (numeric types)
+        dictionaries (and other mappings): the array as it is
+    """
+
+    if isinstance(table, np.ndarray):
+        if table.dtype.names is None:
+            raise Exception('Table arrays need named fields (numpy structured array)!')
+        return table[name]
+
+    # pyarrow Table or RecordBatch (pyarrow is not imported here)
+    if hasattr(table, 'schema') and hasattr(table, 'column'):
+        column = table.column(name)
+        if getattr(column, 'num_chunks', 1) == 1:
+            if hasattr(column, 'chunk'):
+                column = column.chunk(0)
+            return column.to_numpy(zero_copy_only=False)
+        return column.to_numpy()
+
+    # pandas DataFrame
+    if hasattr(table, 'iloc'):
+        return table[name].to_numpy()
+
+    return np.asarray(table[name])
+
+def _group_slices(keys):
+    """
+    Rows of each group as a slice
+        rows already in runs of one group are sliced as they are (order is None),
+        otherwise order sorts the rows by group (stable)
+
+    Returns
+    -------
+    order : None or array of int
+
+    slices : dict
+        group value -> slice of the (sorted) rows, in increasing order of the group values
+    """
+
+    def _runs(keys):
+        starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+        stops = np.concatenate([starts[1:], [len(keys)]])
+        return keys[starts], starts, stops
+
+    # empty table: no groups
+    if len(keys) == 0:
+        return None, {}
+
+    order = None
+    run_keys, starts, stops = _runs(keys)
+    if len(np.unique(run_keys)) < len(run_keys):
+        order = np.argsort(keys, kind='stable')
+        run_keys, starts, stops = _runs(keys[order])
+
+    runs = sorted(zip(run_keys.tolist(), starts, stops), key=lambda run: run[0])
+
+    return order, {key: slice(start, stop) for key, start, stop in runs}
+
+def table_series(table, columns, by=None, groups=None):
+    """
+    Columns of a table as the series of the plotting functions, one per group
+        series are views of the table columns, no copy per series:
+        rows sorted (or gathered) by the group-by column are sliced as they are,
+        otherwise each column is reordered once and then sliced
+
+    Parameters
+    ----------
+    table : numpy structured array, dict of arrays, pandas DataFrame or pyarrow Table
+        pandas and pyarrow are only used if they are given
+
+    columns : dict
+        argument name -> column specification
+            'col': one series of the column per group (one series without by)
+            ['col1', 'col2']: the series of each column in turn
+            ('col_lower', 'col_upper'): asymmetric errors (records with two fields for structured arrays)
+            None: None for each series (e.g. no weights)
+        arguments ending with '_list' (subplots functions): a list of specifications, one per panel
+        'xval', 'yval', 'cval' (ScatterPlotFunc): one column name, without by
+
+    by : str, default: None
+        group-by column, one series per value
+
+    groups : list, default: None
+        values of by to plot, in this order (None: all of them, sorted)
+
+    Returns
+    -------
+    keys : list
+        values of by of the series (None without by, empty for an empty table without groups)
+
+    series : dict
+        argument name -> list of series (arrays), or one array for xval, yval, cval
+    """
+
+    keys = None
+    order = None
+    slices = [slice(None)]
+    if by is not None:
+        order, group_slices = _group_slices(_column(table, by))
+        if order is not None:
+            logger.debug(f'Rows are not grouped by {by}: the columns are reordered once')
+        keys = list(group_slices) if groups is None else list(groups)
+        for key in keys:
+            if key not in group_slices:
+                raise Exception(f'No rows with {by} = {key}!')
+        slices = [group_slices[key] for key in keys]
+
+    def _split(data):
+        if order is not None:
+            data = data[order]
+        return [data[slc] for slc in slices]
+
+    def _spec_series(spec):
+        if spec is None:
+            return [None] * len(slices)
+        if isinstance(spec, str):
+            return _split(_column(table, spec))
+        if isinstance(spec, tuple):
+            if len(spec) != 2:
+                raise Exception(f'Errors need two columns (lower, upper), got {spec}!')
+            if isinstance(table, np.ndarray):
+                # a view of the two fields
+                return _split(table[list(spec)])
+            return list(zip(*(_split(_column(table, name)) for name in spec)))
+        return [res for sub_spec in spec for res in _spec_series(sub_spec)]
+
+    series = {}
+    for arg, spec in columns.items():
+        if arg in _SINGLE_SERIES:
+            if by is not None:
+                raise Exception(f'{arg} takes one column, which cannot be grouped by {by}!')
+            series[arg] = _column(table, spec)
+        elif arg.endswith('_list'):
+            series[arg] = [_spec_series(panel_spec) for panel_spec in spec]
+        else:
+            series[arg] = _spec_series(spec)
+
+    return keys, series
+
+def plot_table(func, outpath, table, columns, by=None, groups=None, **kwargs):
+    """
+    Plot the columns of a table with one of the plotting functions, one series per group
+        the series are views of the table (see table_series),
+        COLORs (default colour cycle), LABELs (group values) and wgs (no weights) are filled in if not given
+
+    Parameters
+    ----------
+    func : function or str
+        a public function of HistPlot, LinePlot or HistLinePlot (or its name)
+
+    outpath : str or None
+        outpath of func
+
+    table, columns, by, groups : see table_series
+
+    **kwargs : the other arguments of func
+
+    Returns
+    -------
+        the value returned by func
+
+    Examples
+    --------
+    >>> plot_table(HistPlotFunc, 'mag.png', cat, {'paras': 'mag', 'wgs': 'weight'}, by='tomo_bin',
+    ...             nbins=60, XRANGE=[18, 25], XLABEL='mag')
+    >>> plot_table('ErrorPlotFunc', 'mz.png', binned, {'xvals': 'z', 'yvals': 'm', 'yerrs': ('m_low', 'm_high')},
+    ...             by='sample', groups=['KiDS', 'DES'], LINEs=['none']*2)
+    """
+
+    if isinstance(func, str):
+        from .Batch import _batch_functions
+        func = _batch_functions()[func]
+
+    keys, series = table_series(table, columns, by=by, groups=groups)
+
+    parameters = inspect.signature(func).parameters
+    for arg in series:
+        if arg not in parameters:
+            raise Exception(f'{func.__name__} has no argument {arg}!')
+
+    flat = [val for arg, val in series.items() if (arg not in _SINGLE_SERIES) and (not arg.endswith('_list'))]
+    if flat:
+        N_series = len(flat[0])
+        if ('COLORs' in parameters) and ('COLORs' not in kwargs):
+            kwargs['COLORs'] = [f'C{i % 10}' for i in range(N_series)]
+        if ('LABELs' in parameters) and ('LABELs' not in kwargs):
+            kwargs['LABELs'] = [str(key) for key in keys] if keys is not None else None
+        if ('wgs' in parameters) and ('wgs' not in series) and ('wgs' not in kwargs):
+            kwargs['wgs'] = None
+
+    return func(outpath, **series, **kwargs)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 18:02:15
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 18:02:15
+
+### figures built once and re-rendered with new data
+
+__all__ = ["FigureTemplate"]
+# examples need data, not run by pytest-doctestplus
+__doctest_skip__ = ["FigureTemplate"]
+
+import inspect
+import logging
+
+import numpy as np
+
+from matplotlib.patches import StepPatch
+
+from .CommonInternal import _normalise_hist, _figure_context, _rasterize_dense, _error_array
+from .Binning import compute_hist
+
+logger = logging.getLogger(__name__)
+
+# data arguments that can be updated, for each supported function
+_TEMPLATE_DATA = {
+    'LinePlotFunc': ('xvals', 'yvals'),
+    'LinePlotFunc_subplots': ('xvals_list', 'yvals_list'),
+    'ErrorPlotFunc': ('xvals', 'yvals', 'yerrs', 'xerrs'),
+    'ErrorPlotFunc_subplots': ('xvals_list', 'yvals_list', 'yerrs_list', 'xerrs_list'),
+    'HistPlotFunc': ('paras', 'wgs'),
+    'HistPlotFunc_subplots': ('paras_list', 'wgs_list'),
+}
+
+def _errorbar_segments(xvl, yvl, xerr, yerr):
+    """
+    Error bar segments and cap positions as drawn by matplotlib.axes.Axes.errorbar
+        errors in any of the forms accepted by the plotting functions (see _error_array)
+        returns ([x segments, y segments], [x lower caps, x upper caps, y lower caps, y upper caps])
+        for the errors that are not None
+    """
+
+    segments = []
+    caps = []
+    for err, axis in [(xerr, 0), (yerr, 1)]:
+        if err is None:
+            continue
+        err = _error_array(err, xvl)
+        low, high = (err[0], err[1]) if err.ndim == 2 else (err, err)
+        lows = np.stack([xvl, yvl], axis=-1)
+        highs = lows.copy()
+        lows[:, axis] -= low
+        highs[:, axis] += high
+        segments.append(np.stack([lows, highs], axis=1))
+        caps.extend([lows, highs])
+
+    return segments, caps
+
+class FigureTemplate:
+    """
+    A figure built once by one of the plotting functions and re-rendered with new data
+        the layout (axes, labels, legends, locators, tight_layout) is kept,
+        only the data of the artists are replaced before each output,
+        axes without fixed ranges are re-scaled to the new data
+
+    Supported functions and data arguments:
+        LinePlotFunc (xvals, yvals), LinePlotFunc_subplots (xvals_list, yvals_list),
+        ErrorPlotFunc (xvals, yvals, yerrs, xerrs),
+        ErrorPlotFunc_subplots (xvals_list, yvals_list, yerrs_list, xerrs_list),
+        HistPlotFunc (paras, wgs), HistPlotFunc_subplots (paras_list, wgs_list)
+        the number of series (and whether they have errors) should stay the same,
+        histograms keep the bins of the first call (fixed XRANGE and nbins or bins edges),
+        decimate, downsample and hist_errors are not supported
+
+    Parameters
+    ----------
+    func : function
+        one of the supported plotting functions
+
+    *args, **kwargs : arguments of func without outpath
+        the data of the first figure and all the style arguments
+
+    Examples
+    --------
+    >>> template = FigureTemplate(LinePlotFunc, xvals, yvals, COLORs, LABELs=LABELs, XRANGE=[0, 1])
+    >>> for i_fig, (xvals, yvals) in enumerate(data):
+    ...     template.render(f'fig_{i_fig}.png', xvals=xvals, yvals=yvals)
+    >>> template.close()
+    """
+
+    def __init__(self, func, *args, **kwargs):
+
+        self.func_name = func.__name__
+        if self.func_name not in _TEMPLATE_DATA:
+            raise Exception(f'Unsupported function for FigureTemplate: {self.func_name}')
+
+        arguments = inspect.signature(func).bind(None, *args, **kwargs)
+        arguments.apply_defaults()
+        self.arguments = dict(arguments.arguments)
+        self.arguments.pop('outpath')
+
+        # the points kept depend on the data, they would not be selected again by render
+        for name in ('decimate', 'downsample'):
+            if self.arguments.get(name):
+                raise Exception(f'{name} is not supported by FigureTemplate!')
+
+        self.subplots = self.func_name.endswith('_subplots')
+        self.hist = self.func_name.startswith('Hist')
+        if self.hist:
+            self._prebin_arguments()
+
+        self.savefig_kwargs = dict(dpi=self.arguments['dpi'], format=self.arguments['fig_format'])
+        if self.arguments.get('transparent', False):
+            self.savefig_kwargs['transparent'] = True
+
+        self.fig = func(None, **self.arguments)
+
+        # the data artists of each panel, in the order of the series
+        N_plots = self.arguments['N_plots'] if self.subplots else 1
+        data_name = _TEMPLATE_DATA[self.func_name][0]
+        series_list = self.arguments[data_name] if self.subplots else [self.arguments[data_name]]
+        self.axes = self.fig.axes[:N_plots]
+        self.artists = []
+        for ax, series in zip(self.axes, series_list):
+            if self.hist:
+                artists = [patch for patch in ax.patches if isinstance(patch, StepPatch)]
+            elif self.func_name.startswith('Error'):
+                artists = list(ax.containers)
+            else:
+                artists = list(ax.lines)
+            self.artists.append(artists[:len(series)])
+
+    def _prebin_arguments(self):
+        """
+        Bin the first histograms, so that they are drawn as step patches whose values can be replaced
+        """
+
+        if self.arguments.get('hist_errors') is not None:
+            raise Exception('hist_errors is not supported by FigureTemplate!')
+
+        xlog = self.arguments['xlog']
+        if self.subplots:
+            nbins_list = self.arguments['nbins_list']
+            XRANGE_list = self.arguments['XRANGE_list']
+            paras_list = []
+            for i_plot, paras in enumerate(self.arguments['paras_list']):
+                XRANGE = XRANGE_list[i_plot] if XRANGE_list is not None else self.arguments['XRANGE']
+                wgs = self.arguments['wgs_list'][i_plot] if self.arguments['wgs_list'] is not None else None
+                paras_list.append([compute_hist(para, nbins_list[i_plot], XRANGE,
+                                        wg=(wgs[i_para] if wgs is not None else None), xlog=xlog)
+                                    for i_para, para in enumerate(paras)])
+            self.arguments.update(paras_list=paras_list, wgs_list=None, prebinned=True)
+        else:
+            nbins = self.arguments['nbins'] if self.arguments['bins'] is None else self.arguments['bins']
+            if isinstance(nbins, str) or isinstance(self.arguments['XRANGE'], str):
+                raise Exception('FigureTemplate needs fixed bins (numerical XRANGE and nbins or bins edges)!')
+            wgs = self.arguments['wgs']
+            paras = [compute_hist(para, nbins, self.arguments['XRANGE'],
+                        wg=(wgs[i_para] if wgs is not None else None), xlog=xlog)
+                        for i_para, para in enumerate(self.arguments['paras'])]
+            self.arguments.update(paras=paras, wgs=None, prebinned=True, bins=None)
+
+    def _update_series(self, ax, artists, data):
+        """
+        Replace the data of the artists of one panel
+        """
+
+        series = data[0]
+        if len(series) != len(artists):
+            raise Exception(f'FigureTemplate was built with {len(artists)} series, got {len(series)}!')
+
+        for i_series, artist in enumerate(artists):
+            if self.hist:
+                wgs = data[1]
+                edges = artist.get_data().edges
+                counts = compute_hist(series[i_series], edges, None,
+                                    wg=(wgs[i_series] if wgs is not None else None))[0]
+                counts, _ = _normalise_hist(counts, edges,
+                                        DENSITY=self.arguments['DENSITY'], cumulative=self.arguments.get('cumulative', False))
+                artist.set_data(values=counts)
+            elif len(data) == 2:
+                artist.set_data(series[i_series], data[1][i_series])
+            else:
+                xvl = np.asarray(series[i_series], dtype=float)
+                yvl = np.asarray(data[1][i_series], dtype=float)
+                yerr = data[2][i_series] if data[2] is not None else None
+                xerr = data[3][i_series] if data[3] is not None else None
+                if ((xerr is not None) != artist.has_xerr) or ((yerr is not None) != artist.has_yerr):
+                    raise Exception('FigureTemplate cannot add or remove error bars!')
+                data_line, caplines, barlinecols = artist.lines
+                data_line.set_data(xvl, yvl)
+                segments, caps = _errorbar_segments(xvl, yvl, xerr, yerr)
+                for barlinecol, segment in zip(barlinecols, segments):
+                    barlinecol.set_segments(segment)
+                for capline, cap in zip(caplines, caps):
+                    capline.set_data(cap[:, 0], cap[:, 1])
+
+    def render(self, outpath, **data):
+        """
+        Save the figure with new data
+
+        Parameters
+        ----------
+        outpath : str
+            where to save the figure
+
+        **data : the data arguments of the function
+            missing ones are kept from the previous render
+        """
+
+        names = _TEMPLATE_DATA[self.func_name]
+        unknown = set(data) - set(names)
+        if unknown:
+            raise Exception(f'Unsupported data arguments for {self.func_name}: {sorted(unknown)}')
+        self.arguments.update(data)
+
+        values = [self.arguments[name] for name in names]
+        for i_plot, (ax, artists) in enumerate(zip(self.axes, self.artists)):
+            if self.subplots:
+                panel = [(value[i_plot] if value is not None else None) for value in values]
+            else:
+                panel = values
+            self._update_series(ax, artists, panel)
+
+        # rescale after all panels are updated (shared axes)
+        for ax, artists in zip(self.axes, self.artists):
+            ax.relim()
+            # error bar collections are not included by relim
+            for artist in artists:
+                if hasattr(artist, 'has_xerr'):
+                    for barlinecol in artist.lines[2]:
+                        for segment in barlinecol.get_segments():
+                            ax.update_datalim(segment)
+        for ax in self.axes:
+            ax.autoscale_view()
+
+        # the element counts change with the data
+        _rasterize_dense(self.fig, self.arguments['rasterize_threshold'])
+
+        # drawn with the settings the figure was built with
+        with _figure_context(rc=self.fig._plotting_rc):
+            self.fig.savefig(outpath, **self.savefig_kwargs)
+        print("Figure saved as", outpath)
+
+    def close(self):
+        """
+        Release the figure
+        """
+
+        self.fig.clear()
+        self.fig = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 19:58:47
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 19:58:47
+
+### cache of LaTeX labels for usetex=True
+#   relies on TexManager internals (get_text_width_height_descent, _cache_dir),
+#   tested with matplotlib 3.11; without them, labels are compiled and measured by matplotlib as usual
+
+__all__ = ["warm_tex_cache", "set_tex_cache_dir"]
+# examples need LaTeX, not run by pytest-doctestplus
+__doctest_skip__ = ["warm_tex_cache"]
+
+import time
+import inspect
+import logging
+import functools
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from matplotlib import dviread
+from matplotlib.texmanager import TexManager
+
+from .CommonInternal import _figure_context
+
+logger = logging.getLogger(__name__)
+
+# number of label sizes kept in memory
+TEX_METRICS_SIZE = 2**16
+
+_TEX_LOCK = threading.Lock()
+_tex_metrics_enabled = False
+
+@functools.lru_cache(maxsize=TEX_METRICS_SIZE)
+def _tex_metrics(dvipath, dpi):
+    """
+    Width, height and descent of a compiled label at dpi
+        the dvi file name is a hash of the string, preamble and font size
+    """
+
+    with dviread.Dvi(dvipath, dpi) as dvi:
+        page, = dvi
+
+    return page.width, page.height + page.descent, page.descent
+
+def _get_text_width_height_descent(cls, tex, fontsize, renderer=None):
+    """
+    TexManager.get_text_width_height_descent, with the dvi files read once
+    """
+
+    if tex.strip() == '':
+        return 0, 0, 0
+    dvipath = cls.make_dvi(tex, fontsize)
+    dpi_fraction = renderer.points_to_pixels(1.) if renderer else 1
+
+    return _tex_metrics(dvipath, round(72 * dpi_fraction, 6))
+
+def _tex_internals_supported():
+    """
+    Whether TexManager has the internals the cache relies on (as in matplotlib 3.11)
+    """
+
+    if not (hasattr(TexManager, '_cache_dir') and hasattr(TexManager, 'make_dvi')
+            and hasattr(TexManager, 'get_text_width_height_descent')):
+        return False
+
+    parameters = list(inspect.signature(TexManager.get_text_width_height_descent).parameters)
+    return parameters == ['tex', 'fontsize', 'renderer']
+
+def _enable_tex_metrics():
+    """
+    Keep the sizes of the compiled labels in memory
+        (matplotlib re-reads the dvi file each time a label is measured, several times per figure)
+        installed by set_tex_cache_dir and warm_tex_cache only
+
+    Returns
+    -------
+        False if the TexManager of this matplotlib version is not supported (nothing is changed)
+    """
+
+    global _tex_metrics_enabled
+    with _TEX_LOCK:
+        if _tex_metrics_enabled:
+            return True
+        if not _tex_internals_supported():
+            logger.warning('TexManager of this matplotlib version is not supported: LaTeX labels are not cached!!!')
+            return False
+        TexManager.get_text_width_height_descent = classmethod(_get_text_width_height_descent)
+        _tex_metrics_enabled = True
+
+    return True
+
+def set_tex_cache_dir(cache_dir):
+    """
+    Directory where the compiled LaTeX labels are stored
+        files are named by a hash of the string, preamble and font size (and dpi),
+        so that a directory kept between runs, or shared by worker processes,
+        saves compiling the same labels again (the default is in the matplotlib cache directory),
+        the sizes of the compiled labels are also kept in memory from then on
+
+    Parameters
+    ----------
+    cache_dir : str
+        directory of the compiled labels (created if needed)
+
+    Returns
+    -------
+        the previous directory (None if the TexManager of this matplotlib version is not supported)
+    """
+
+    if not _enable_tex_metrics():
+        return None
+
+    path = Path(cache_dir)
+    path.mkdir(parents=True, exist_ok=True)
+
+    previous = TexManager._cache_dir
+    TexManager._cache_dir = path
+
+    return str(previous)
+
+def warm_tex_cache(labels, font_sizes=12, texPacks=None, dpi=300, n_workers=4):
+    """
+    Compile labels with LaTeX before the renders
+        the labels are compiled in parallel (dvi and png at dpi) into the cache directory,
+        and their glyphs and sizes are loaded in memory,
+        so that the following renders with usetex=True only use the cache
+
+    Parameters
+    ----------
+    labels : list of str
+        texts as they are drawn: axis labels, legend labels, titles, and tick labels
+        (e.g. r'$\\mathdefault{10^{2}}$' for logarithmic ticks)
+
+    font_sizes : float or list of float, default: 12
+        sizes the labels are drawn at (font_size of the functions, 1.2*font_size for titles)
+
+    texPacks : list of str, default: None
+        LaTeX packages (same as the texPacks argument of the functions)
+
+    dpi : float, default: 300
+        resolution of the renders
+
+    n_workers : int, default: 4
+        number of LaTeX processes run at the same time
+
+    Returns
+    -------
+        number of (label, size) pairs (0 if the TexManager of this matplotlib version is not supported)
+
+    Examples
+    --------
+    >>> warm_tex_cache([r'$M_\\star$', r'$z_{\\rm phot}$'] + [f'${i}$' for i in range(10)], font_sizes=[12, 14.4])
+    >>> for outpath, xvals, yvals in jobs:
+    ...     LinePlotFunc(outpath, xvals, yvals, COLORs, XLABEL=r'$M_\\star$', usetex=True)
+    """
+
+    if not _enable_tex_metrics():
+        return 0
+
+    tex_rc = {'text.latex.preamble': '\n'.join(texPacks)} if texPacks is not None else None
+    # 'lp' is measured by matplotlib for the baseline of every text
+    jobs = [(label, float(size)) for size in np.atleast_1d(font_sizes) for label in dict.fromkeys(['lp'] + list(labels))]
+
+    def _compile(job):
+        label, size = job
+        TexManager.get_grey(label, size, dpi)
+        if label.strip() != '':
+            _tex_metrics(TexManager.make_dvi(label, size), round(dpi, 6))
+
+    t_start = time.perf_counter()
+    # the TeX sources depend on rcParams: set them for all the threads (and the sizes are kept in memory)
+    with _figure_context(usetex=True, rc=tex_rc):
+        TexManager()
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            list(executor.map(_compile, jobs))
+    logger.info(f'{len(jobs)} LaTeX labels ready in {time.perf_counter() - t_start:.1f} s')
+
+    return len(jobs)
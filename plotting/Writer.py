@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# @Author: lshuns
+# @Date:   2026-10-18 19:02:26
+# @Last Modified by:   lshuns
+# @Last Modified time: 2026-10-18 19:02:26
+
+### figures written to disk by a background thread
+
+__all__ = ["AsyncWriter"]
+# examples need data, not run by pytest-doctestplus
+__doctest_skip__ = ["AsyncWriter"]
+
+import io
+import os
+import queue
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# formats drawn to an RGBA buffer in the calling thread, then encoded by the writer (Pillow format names),
+#   the other formats are encoded by savefig in the calling thread
+_RASTER_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'tif': 'TIFF', 'tiff': 'TIFF', 'webp': 'WEBP'}
+
+def _pillow_format(fmt):
+    """
+    Pillow format name of a raster format, None if the figure is encoded by savefig
+        (vector formats, or formats the installed Pillow cannot write)
+    """
+
+    if fmt not in _RASTER_FORMATS:
+        return None
+
+    from PIL import Image
+    Image.init()
+    pil_format = _RASTER_FORMATS[fmt]
+
+    return pil_format if pil_format in Image.SAVE else None
+
+def _output_format(outpath, fig_format=None):
+    """
+    Output format from fig_format or the outpath extension (png by default, same as savefig)
+    """
+
+    if fig_format is not None:
+        return fig_format.lower()
+
+    ext = os.path.splitext(os.fspath(outpath))[1]
+    if ext:
+        return ext[1:].lower()
+
+    return 'png'
+
+class AsyncWriter:
+    """
+    Background thread writing figures to disk
+        the plotting functions draw the figure in memory (an RGBA buffer for raster formats,
+        the encoded file for vector formats) and hand it over to the writer,
+        which encodes the raster images and writes the files while the caller carries on
+
+    Parameters
+    ----------
+    max_pending : int, default: 8
+        number of figures waiting to be written (the plotting functions block when it is reached,
+        which bounds the memory held by the buffers)
+
+    Examples
+    --------
+    >>> with AsyncWriter() as writer:
+    ...     for i_fig, (xvals, yvals) in enumerate(data):
+    ...         LinePlotFunc(f'fig_{i_fig}.png', xvals, yvals, COLORs, writer=writer)
+    >>> # all the figures are written here (errors are raised by flush and close)
+
+    Writers not closed are closed at interpreter exit, so that the queued figures are still written
+    """
+
+    def __init__(self, max_pending=8):
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors = []
+        self._lock = threading.Lock()
+        # queueing a figure and closing are exclusive, so that nothing is queued after the end of the thread
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='plotting-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self._close_at_exit)
+
+    def submit(self, fig, outpath, message=None, dpi=300, fig_format=None, **savefig_kw):
+        """
+        Draw a figure in memory and queue it for writing
+
+        Parameters
+        ----------
+        fig : matplotlib Figure object
+            drawn in the calling thread (with the current rcParams)
+
+        outpath : str
+            where to save the figure
+
+        message : str, default: None
+            printed before outpath once written
+
+        dpi, fig_format, **savefig_kw : passed to matplotlib.figure.Figure.savefig
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            result: outpath once written, or the exception raised while writing
+        """
+
+        if self._closed:
+            raise Exception('AsyncWriter is closed!')
+
+        fmt = _output_format(outpath, fig_format)
+        pil_format = _pillow_format(fmt)
+        buf = io.BytesIO()
+        if pil_format is not None:
+            # size of the drawn image (rounded by the renderer, or cropped with bbox_inches='tight')
+            sizes = []
+            cid = fig.canvas.mpl_connect('draw_event',
+                                        lambda event: sizes.append((event.renderer.width, event.renderer.height)))
+            try:
+                fig.savefig(buf, format='rgba', dpi=dpi, **savefig_kw)
+            finally:
+                fig.canvas.mpl_disconnect(cid)
+            width, height = (int(size) for size in sizes[-1])
+            data = np.frombuffer(buf.getbuffer(), dtype=np.uint8).reshape(height, width, 4)
+        else:
+            fig.savefig(buf, format=fmt, dpi=dpi, **savefig_kw)
+            data = buf.getvalue()
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._submit_lock:
+            # closed while drawing
+            if self._closed:
+                raise Exception('AsyncWriter is closed!')
+            self._queue.put((future, data, outpath, pil_format, dpi, message))
+
+        return future
+
+    def _write(self, data, outpath, pil_format, dpi):
+        """
+        Encode (raster images, with Pillow) and write one figure
+        """
+
+        if isinstance(data, bytes):
+            with open(outpath, 'wb') as file:
+                file.write(data)
+            return
+
+        from PIL import Image
+        image = Image.fromarray(data)
+        if pil_format == 'JPEG':
+            image = image.convert('RGB')
+        image.save(outpath, format=pil_format, dpi=(dpi, dpi))
+
+    def _run(self):
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            future, data, outpath, pil_format, dpi, message = item
+            try:
+                self._write(data, outpath, pil_format, dpi)
+            except Exception as exc:
+                logger.error(f'Failed to write {outpath}: {exc}')
+                with self._lock:
+                    self._errors.append(exc)
+                future.set_exception(exc)
+            else:
+                if message is not None:
+                    print(message, outpath)
+                future.set_result(outpath)
+            finally:
+                self._queue.task_done()
+
+    @property
+    def pending(self):
+        """
+        Number of figures not written yet
+        """
+
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """
+        Wait until all the queued figures are written
+            the first write error since the last flush is raised (the others are logged)
+        """
+
+        self._queue.join()
+
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise Exception(f'{len(errors)} figures could not be written') from errors[0]
+
+    def close(self):
+        """
+        Write the queued figures and stop the thread (errors are raised as in flush)
+        """
+
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        atexit.unregister(self._close_at_exit)
+
+        self._thread.join()
+        self.flush()
+
+    def _close_at_exit(self):
+        """
+        Write the queued figures at interpreter exit (the thread is a daemon), errors are logged
+        """
+
+        try:
+            self.close()
+        except Exception as exc:
+            logger.error(f'AsyncWriter closed at exit: {exc}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -4,14 +4,44 @@
 # @Last Modified by:   lshuns
 # @Last Modified time: 2023-12-18 15:30:26
 
+import importlib
+
 from .version import version as __version__
-__all__ = []
 
-from .HistPlot import *
-__all__ += HistPlot.__all__
+# public names of each submodule
+#   submodules (and matplotlib) are only imported when one of their names is first used
+_SUBMODULE_ALL = {
+    'HistPlot': ["HistPlotFunc", "Hist2DPlotFunc", "HistPlotFunc_subplots", "Hist2DPlotFunc_subplots"],
+    'LinePlot': ["LinePlotFunc", "LinePlotFunc_subplots", "ErrorPlotFunc", "ErrorPlotFunc_subplots",
+                "ScatterPlotFunc", "ErrorPlotFunc_2sub_shareX"],
+    'HistLinePlot': ["HistErrorPlotFunc", "HistTwinxErrorPlotFunc"],
+    'Binning': ["compute_hist", "compute_hist_batch", "compute_hist2d", "compute_binned_stat2d"],
+    'Cache': ["BinningCache"],
+    'Sketch': ["QuantileSketch", "compute_sketch"],
+    'Template': ["FigureTemplate"],
+    'Batch': ["render_batch"],
+    'Writer': ["AsyncWriter"],
+    'TexCache': ["warm_tex_cache", "set_tex_cache_dir"],
+    'Stats': ["RenderStats", "add_render_callback", "remove_render_callback", "record_render_stats"],
+    'Table': ["table_series", "plot_table"],
+}
+
+__all__ = [name for names in _SUBMODULE_ALL.values() for name in names]
+
+_NAME_MODULE = {name: module for module, names in _SUBMODULE_ALL.items() for name in names}
+
+def __getattr__(name):
+
+    if name in _SUBMODULE_ALL:
+        return importlib.import_module(f'.{name}', __name__)
+
+    if name in _NAME_MODULE:
+        value = getattr(importlib.import_module(f'.{_NAME_MODULE[name]}', __name__), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-from .LinePlot import *
-__all__ += LinePlot.__all__
+def __dir__():
 
-from .HistLinePlot import *
-__all__ += HistLinePlot.__all__
\ No newline at end of file
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULE_ALL))
@@ -0,0 +1,63 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import os
+
+import numpy as np
+import pytest
+from matplotlib.texmanager import TexManager
+
+from plotting import TexCache, render_batch
+
+
+def _specs(tmp_path):
+
+    x = np.linspace(0.1, 10., 50)
+    return [('LinePlotFunc', dict(outpath=str(tmp_path / 'line.png'), xvals=[x], yvals=[np.sin(x)],
+                                COLORs=['r'], dpi=72)),
+            {'func': 'HistPlotFunc', 'kwargs': dict(outpath=str(tmp_path / 'hist.png'), paras=[np.cos(x)],
+                                                wgs=None, COLORs=['r'], LABELs=['a'], nbins=11,
+                                                XRANGE=[-1., 1.], dpi=72)},
+            # a mistake in the arguments fails this job only
+            ('LinePlotFunc', dict(outpath=str(tmp_path / 'bad.png'), xvals=[x], yvals=[np.sin(x)],
+                                COLORs=['r'], not_an_argument=1))]
+
+
+@pytest.mark.parametrize('n_workers', [None, 2])
+def test_results_and_error_records(tmp_path, n_workers):
+
+    results = render_batch(_specs(tmp_path), n_workers=n_workers)
+
+    assert [res['func'] for res in results] == ['LinePlotFunc', 'HistPlotFunc', 'LinePlotFunc']
+    assert [res['status'] for res in results] == ['ok', 'ok', 'error']
+    for res in results[:2]:
+        assert res['error'] is None
+        assert os.path.isfile(res['outpath'])
+        assert res['stats']['func'] == res['func']
+        assert res['stats']['outpath'] == res['outpath']
+        assert res['time'] > 0
+    if n_workers is not None:
+        assert all(res['pid'] != os.getpid() for res in results)
+
+    assert 'not_an_argument' in results[2]['error']
+    assert not os.path.exists(results[2]['outpath'])
+
+
+def test_unsupported_function(tmp_path):
+
+    with pytest.raises(Exception, match='Unsupported function for render_batch'):
+        render_batch([('savefig', dict(outpath=str(tmp_path / 'a.png')))])
+
+
+def test_tex_cache_dir_restored(tmp_path, monkeypatch):
+
+    # TexManager and the cache state restored after the test
+    monkeypatch.setattr(TexCache, '_tex_metrics_enabled', False)
+    monkeypatch.setattr(TexManager, 'get_text_width_height_descent', TexManager.get_text_width_height_descent)
+    monkeypatch.setattr(TexManager, '_cache_dir', TexManager._cache_dir)
+    previous = TexManager._cache_dir
+
+    results = render_batch(_specs(tmp_path)[:1], tex_cache_dir=str(tmp_path / 'tex'))
+
+    assert results[0]['status'] == 'ok'
+    assert (tmp_path / 'tex').is_dir()
+    assert TexManager._cache_dir == previous
@@ -0,0 +1,367 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+
+from plotting.Binning import compute_hist, compute_hist_batch, compute_hist2d, compute_binned_stat2d
+from plotting.Binning import _map_binning, _decimate_index, _open_array, _minmax_index, _lttb_index, _downsample_index
+
+
+def _data(n=50000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.uniform(0.5, 1.5, n)
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_compute_hist_linear(weighted):
+
+    para, wg = _data()
+    wg = wg if weighted else None
+    counts, edges = compute_hist(para, 31, [-3., 3.], wg=wg)
+
+    counts_ref, edges_ref = np.histogram(para, bins=np.linspace(-3., 3., 31), weights=wg)
+    assert np.allclose(edges, edges_ref)
+    assert np.allclose(counts, counts_ref)
+
+
+def test_compute_hist_values_on_edges():
+
+    # every edge (the last one included), out-of-range values and NaN
+    edges = np.linspace(-1., 1., 11)
+    para = np.concatenate([edges, edges[:-1] + 0.05, [-1.5, 1.5, np.nan]])
+    wg = np.arange(1., len(para) + 1.)
+
+    for wg_tmp in [None, wg]:
+        counts = compute_hist(para, 11, [-1., 1.], wg=wg_tmp)[0]
+        with np.errstate(invalid='ignore'):
+            counts_ref = np.histogram(para, bins=edges, weights=wg_tmp)[0]
+        assert np.allclose(counts, counts_ref)
+
+
+def test_compute_hist_float32():
+
+    para, wg = _data()
+    para = para.astype(np.float32)
+    counts = compute_hist(para, 31, [-3., 3.], wg=wg.astype(np.float32))[0]
+
+    # float32 values on the same bins, weights summed in float64
+    counts_ref = np.histogram(para, bins=np.linspace(-3., 3., 31), weights=wg.astype(np.float32).astype(np.float64))[0]
+    assert np.allclose(counts, counts_ref)
+
+
+def _chunks(arr, chunk_size):
+
+    return iter([arr[i_start:i_start+chunk_size] for i_start in range(0, len(arr), chunk_size)])
+
+
+def test_compute_hist_streamed(tmp_path):
+
+    para, wg = _data()
+    counts_ref = compute_hist(para, 31, [-3., 3.], wg=wg)[0]
+    np.save(tmp_path / 'para.npy', para)
+    np.save(tmp_path / 'wg.npy', wg)
+
+    # chunked arrays, .npy files and iterators of chunks
+    assert np.allclose(compute_hist(para, 31, [-3., 3.], wg=wg, chunk_size=7777)[0], counts_ref)
+    assert np.allclose(compute_hist(str(tmp_path / 'para.npy'), 31, [-3., 3.], wg=str(tmp_path / 'wg.npy'),
+                                    chunk_size=7777)[0], counts_ref)
+    assert np.allclose(compute_hist(_chunks(para, 7777), 31, [-3., 3.], wg=_chunks(wg, 7777))[0], counts_ref)
+    # iterator weights of an in-memory array
+    assert np.allclose(compute_hist(para, 31, [-3., 3.], wg=_chunks(wg, 5000))[0], counts_ref)
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_compute_hist2d(weighted):
+
+    para, wg = _data()
+    y_val = _data(seed=1)[0]
+    wg = wg if weighted else None
+
+    counts, xedges, yedges = compute_hist2d(para, y_val, [20, 30], [-3., 3.], [-2., 2.], wg=wg)
+    counts_ref, xedges_ref, yedges_ref = np.histogram2d(para, y_val, bins=[20, 30],
+                                                        range=[[-3., 3.], [-2., 2.]], weights=wg)
+    assert np.allclose(counts, counts_ref)
+    assert np.allclose(xedges, xedges_ref)
+    assert np.allclose(yedges, yedges_ref)
+
+    # range of the values
+    counts = compute_hist2d(para, y_val, 25, wg=wg)[0]
+    assert np.allclose(counts, np.histogram2d(para, y_val, bins=25, weights=wg)[0])
+
+
+def test_compute_hist2d_float32_and_chunks(tmp_path):
+
+    para, wg = _data()
+    y_val = _data(seed=1)[0]
+    counts_ref = np.histogram2d(para, y_val, bins=20, range=[[-3., 3.], [-2., 2.]], weights=wg)[0]
+
+    counts = compute_hist2d(para, y_val, 20, [-3., 3.], [-2., 2.], wg=wg, count_dtype=np.float32)[0]
+    assert counts.dtype == np.float32
+    assert np.allclose(counts, counts_ref, rtol=1e-4)
+
+    np.save(tmp_path / 'x.npy', para)
+    counts = compute_hist2d(str(tmp_path / 'x.npy'), _chunks(y_val, 7777), 20, [-3., 3.], [-2., 2.],
+                            wg=wg, chunk_size=5000)[0]
+    assert np.allclose(counts, counts_ref)
+
+    with pytest.raises(Exception, match='XRANGE and YRANGE'):
+        compute_hist2d(str(tmp_path / 'x.npy'), y_val, 20)
+
+
+def test_compute_hist_batch():
+
+    para, wg = _data()
+    paras = [para, 2. * para, para[:1000]]
+    wgs = [wg, None, wg[:1000]]
+    counts, edges = compute_hist_batch(paras, 31, [-3., 3.], wgs=wgs)
+
+    assert counts.shape == (3, 30)
+    for counts_tmp, para_tmp, wg_tmp in zip(counts, paras, wgs):
+        assert np.allclose(counts_tmp, np.histogram(para_tmp, bins=edges, weights=wg_tmp)[0])
+
+    counts, edges = compute_hist_batch([10**para], 21, [0.01, 100.], xlog=True)
+    assert np.array_equal(counts[0], np.histogram(10**para, bins=np.logspace(-2., 2., 21))[0])
+
+
+def test_map_binning_workers(tmp_path):
+
+    para, wg = _data()
+    path = str(tmp_path / 'para.npy')
+    np.save(path, para)
+    kwargs = dict(nbins=31, XRANGE=[-3., 3.])
+    # shared arrays, a strided view, a file and an iterator (run in this process)
+    tasks = [(dict(para=para, wg=wg), kwargs),
+            (dict(para=para[::3], wg=None), kwargs),
+            (dict(para=path, wg=wg), dict(kwargs, sumw2=True)),
+            (dict(para=_chunks(para, 7000), wg=None), kwargs)]
+
+    results = _map_binning(compute_hist, tasks, n_workers=2)
+    results_ref = _map_binning(compute_hist, tasks[:3] + [(dict(para=para, wg=None), kwargs)])
+    assert len(results) == 4
+    for res, res_ref in zip(results, results_ref):
+        assert len(res) == len(res_ref)
+        for arr, arr_ref in zip(res, res_ref):
+            assert np.allclose(arr, arr_ref)
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_compute_hist_log(weighted):
+
+    para, wg = _data()
+    para = 10**para
+    wg = wg if weighted else None
+    counts, edges = compute_hist(para, 21, [0.01, 100.], wg=wg, xlog=True)
+
+    counts_ref = np.histogram(para, bins=np.logspace(-2., 2., 21), weights=wg)[0]
+    assert np.allclose(edges, np.logspace(-2., 2., 21))
+    assert np.allclose(counts, counts_ref)
+
+
+def test_compute_hist_sumw2():
+
+    para, wg = _data()
+    bins = np.linspace(-3., 3., 31)
+    counts, sumw2, edges = compute_hist(para, 31, [-3., 3.], wg=wg, sumw2=True)
+
+    assert np.allclose(counts, np.histogram(para, bins=bins, weights=wg)[0])
+    assert np.allclose(sumw2, np.histogram(para, bins=bins, weights=wg**2)[0])
+
+    # unit weights
+    counts, sumw2, edges = compute_hist(para, 31, [-3., 3.], sumw2=True)
+    assert np.array_equal(counts, sumw2)
+
+
+def test_compute_hist_explicit_edges():
+
+    para, wg = _data()
+    edges = np.array([-3., -1., -0.2, 0., 0.1, 2., 3.])
+    counts, edges_out = compute_hist(para, edges, None, wg=wg)
+
+    assert np.array_equal(edges_out, edges)
+    assert np.allclose(counts, np.histogram(para, bins=edges, weights=wg)[0])
+
+
+@pytest.mark.parametrize('log', [False, True])
+def test_compute_binned_stat2d(log):
+
+    x_val, y_val = _data(n=20000)
+    cval = x_val + y_val
+    cval[::50] = np.nan
+    XRANGE, YRANGE = [-2., 2.], [0.5, 1.5]
+    if log:
+        x_val, XRANGE = 10**x_val, [0.01, 100.]
+    xedges_ref = np.logspace(-2., 2., 11) if log else np.linspace(-2., 2., 11)
+    yedges_ref = np.linspace(0.5, 1.5, 9)
+
+    grid, xedges, yedges = compute_binned_stat2d(x_val, y_val, [10, 8], XRANGE, YRANGE, xlog=log)
+    counts_ref = np.histogram2d(x_val, y_val, bins=[xedges_ref, yedges_ref])[0]
+    assert np.allclose(xedges, xedges_ref)
+    assert np.allclose(yedges, yedges_ref)
+    assert np.allclose(np.nan_to_num(grid), counts_ref)
+    assert np.array_equal(np.isnan(grid), counts_ref == 0)
+
+    # NaN values of cval are ignored
+    valid = ~np.isnan(cval)
+    grid = compute_binned_stat2d(x_val, y_val, [10, 8], XRANGE, YRANGE, cval=cval, statistic='mean', xlog=log)[0]
+    counts_ref, sums_ref = [np.histogram2d(x_val[valid], y_val[valid], bins=[xedges_ref, yedges_ref],
+                                        weights=weights)[0] for weights in [None, cval[valid]]]
+    with np.errstate(invalid='ignore'):
+        assert np.allclose(grid, sums_ref / counts_ref, equal_nan=True)
+
+    grid = compute_binned_stat2d(x_val, y_val, [10, 8], XRANGE, YRANGE, cval=cval, statistic='median', xlog=log)[0]
+    ix = np.searchsorted(xedges_ref, x_val, side='right') - 1
+    iy = np.searchsorted(yedges_ref, y_val, side='right') - 1
+    for i_x in range(10):
+        for i_y in range(8):
+            values = cval[valid & (ix == i_x) & (iy == i_y)]
+            if len(values):
+                assert np.isclose(grid[i_x, i_y], np.median(values))
+            else:
+                assert np.isnan(grid[i_x, i_y])
+
+    with pytest.raises(Exception, match='cval is required'):
+        compute_binned_stat2d(x_val, y_val, 10, XRANGE, YRANGE, statistic='mean')
+
+
+def test_decimate_index():
+
+    x_val, y_val = _data(n=5000)
+    x_val[::100] = np.nan
+    XRANGE, YRANGE = [-2., 2.], [0.5, 1.5]
+    keep = _decimate_index(x_val, y_val, [8, 4], XRANGE, YRANGE)
+
+    # the last point of each cell, out-of-range and NaN points are dropped
+    with np.errstate(invalid='ignore'):
+        ix = np.floor((x_val + 2.) / 0.5)
+        iy = np.floor((y_val - 0.5) / 0.25)
+    last = {}
+    for i_point, cell in enumerate(zip(ix, iy)):
+        if (0 <= cell[0] < 8) and (0 <= cell[1] < 4):
+            last[cell] = i_point
+    assert np.array_equal(keep, sorted(last.values()))
+
+    keep = _decimate_index(10**x_val, y_val, [8, 4], [0.01, 100.], YRANGE, xlog=True)
+    assert np.array_equal(keep, sorted(last.values()))
+
+
+def test_minmax_index():
+
+    x_val = np.linspace(0., 1., 10000)
+    y_val = np.sin(40. * x_val)
+    y_val[5000:5100] = np.nan
+    index = _minmax_index(x_val, y_val, 50)
+
+    assert np.all(np.diff(index) > 0)
+    assert (index[0] == 0) and (index[-1] == len(x_val) - 1)
+    # extremes and the first point of the NaN gap are kept
+    assert np.nanargmax(y_val) in index
+    assert np.nanargmin(y_val) in index
+    assert 5000 in index
+    # at most 4 points per column, plus the NaN gap
+    assert len(index) <= 4 * 51 + 2
+
+    # fewer points than columns: all of them
+    assert np.array_equal(_minmax_index(x_val[:100], y_val[:100], 50), np.arange(100))
+
+
+def test_minmax_index_log():
+
+    x_val = np.logspace(-2., 2., 10000)
+    y_val = np.cos(x_val)
+    y_val[::7] = -1.
+    index = _minmax_index(x_val, y_val, 40, xlog=True, ylog=True)
+
+    assert np.all(np.diff(index) > 0)
+    # the maximum of each column is kept (non-positive values are not drawn with ylog)
+    assert np.argmax(y_val) in index
+
+
+def test_lttb_index():
+
+    x_val = np.linspace(0., 1., 5000)
+    y_val = np.sin(30. * x_val)
+    y_val[100] = 10.
+    y_val[2000:2100] = np.nan
+    index = _lttb_index(x_val, y_val, 200)
+
+    assert len(index) == 200
+    assert np.all(np.diff(index) > 0)
+    assert (index[0] == 0) and (index[-1] == len(x_val) - 1)
+    # the spike is kept, NaN values are never kept
+    assert 100 in index
+    assert np.all(np.isfinite(y_val[index]))
+
+    # fewer points than the output size: all finite points
+    assert np.array_equal(_lttb_index(x_val[:150], y_val[:150], 200), np.arange(150))
+
+
+def test_downsample_non_monotonic():
+
+    x_val = np.concatenate([np.linspace(0., 1., 3000), np.linspace(1., 0., 3000)])
+    y_val = np.sin(10. * x_val)
+    assert np.array_equal(_downsample_index(x_val, y_val, 50), np.arange(len(x_val)))
+    assert np.array_equal(_downsample_index(x_val, y_val, 50, method='lttb'), np.arange(len(x_val)))
+
+
+def _fits_card(keyword, value=None):
+
+    if value is None:
+        return f'{keyword:<80}'
+    if isinstance(value, bool):
+        value = 'T' if value else 'F'
+    elif isinstance(value, str):
+        value = "'{:<8}'".format(value.replace("'", "''"))
+    return f'{keyword:<8}= {value:>20} / comment'.ljust(80)
+
+
+def _fits_header(cards):
+
+    header = ''.join(_fits_card(*card) for card in cards) + _fits_card('END')
+    return (header + ' ' * (-len(header) % 2880)).encode('ascii')
+
+
+def _fits_data(data):
+
+    return data + b'\0' * (-len(data) % 2880)
+
+
+def test_fits_binary_table(tmp_path):
+
+    n_rows = 1001
+    rng = np.random.default_rng(0)
+    rows = np.empty(n_rows, dtype=[('MAG', '>f8'), ('Z', '>f4'), ('ID', '>i8'), ('NAME', 'S8'), ('VEC', '>f4', (3,))])
+    rows['MAG'] = rng.normal(22., 1., n_rows)
+    rows['Z'] = rng.uniform(0., 2., n_rows)
+    rows['ID'] = np.arange(n_rows)
+    rows['NAME'] = b'gal'
+    image = np.arange(12, dtype='>i2').reshape(3, 4)
+
+    path = tmp_path / 'cat.fits'
+    with open(path, 'wb') as file:
+        file.write(_fits_header([('SIMPLE', True), ('BITPIX', 8), ('NAXIS', 0), ('EXTEND', True)]))
+        # an image extension before the table
+        file.write(_fits_header([('XTENSION', 'IMAGE'), ('BITPIX', 16), ('NAXIS', 2), ('NAXIS1', 4), ('NAXIS2', 3),
+                                ('PCOUNT', 0), ('GCOUNT', 1)]))
+        file.write(_fits_data(image.tobytes()))
+        file.write(_fits_header([('XTENSION', 'BINTABLE'), ('BITPIX', 8), ('NAXIS', 2),
+                                ('NAXIS1', rows.dtype.itemsize), ('NAXIS2', n_rows), ('PCOUNT', 0), ('GCOUNT', 1),
+                                ('TFIELDS', 5),
+                                ('TTYPE1', 'MAG'), ('TFORM1', 'D'), ('TTYPE2', 'Z'), ('TFORM2', 'E'),
+                                ('TTYPE3', 'ID'), ('TFORM3', 'K'), ('TTYPE4', 'NAME'), ('TFORM4', '8A'),
+                                ('TTYPE5', 'VEC'), ('TFORM5', '3E'), ('EXTNAME', "it's")]))
+        file.write(_fits_data(rows.tobytes()))
+
+    for name in ['MAG', 'Z', 'ID']:
+        assert np.array_equal(_open_array((str(path), name)), rows[name])
+    # case-insensitive column names
+    assert np.array_equal(_open_array((str(path), 'mag')), rows['MAG'])
+
+    counts = compute_hist((str(path), 'MAG'), 21, [19., 25.], wg=(str(path), 'Z'), chunk_size=100)[0]
+    counts_ref = np.histogram(rows['MAG'], bins=np.linspace(19., 25., 21), weights=rows['Z'].astype(np.float64))[0]
+    assert np.allclose(counts, counts_ref)
+
+    with pytest.raises(Exception, match='not a scalar column'):
+        _open_array((str(path), 'VEC'))
+    with pytest.raises(Exception, match='No column'):
+        _open_array((str(path), 'NOPE'))
@@ -0,0 +1,141 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import os
+import tracemalloc
+
+import numpy as np
+
+from plotting import BinningCache
+from plotting.Binning import compute_hist
+from plotting.Cache import _content_hash
+
+
+def _data(n=10000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.uniform(0.5, 1.5, n)
+
+
+def test_hits_and_misses():
+
+    para, wg = _data()
+    cache = BinningCache()
+    kwargs = dict(nbins=21, XRANGE=[-3., 3.])
+
+    res = cache.compute(compute_hist, dict(para=para, wg=wg), kwargs)
+    res_again = cache.compute(compute_hist, dict(para=para.copy(), wg=wg), kwargs)
+    assert cache.stats['misses'] == 1
+    assert cache.stats['hits'] == 1
+    for arr, arr_again in zip(res, res_again):
+        assert np.array_equal(arr, arr_again)
+
+    # a different value, weight or bin specification is a miss
+    para_changed = para.copy()
+    para_changed[123] += 1e-9
+    cache.compute(compute_hist, dict(para=para_changed, wg=wg), kwargs)
+    cache.compute(compute_hist, dict(para=para, wg=None), kwargs)
+    cache.compute(compute_hist, dict(para=para, wg=wg), dict(kwargs, nbins=31))
+    assert cache.stats['misses'] == 4
+
+    # iterators are not cached
+    cache.compute(compute_hist, dict(para=iter([para]), wg=None), kwargs)
+    assert cache.stats['uncached'] == 1
+
+    # results are copies
+    res[0][:] = 0
+    assert np.any(cache.compute(compute_hist, dict(para=para, wg=wg), kwargs)[0] != 0)
+
+
+def test_file_invalidated_on_mtime(tmp_path):
+
+    para, _ = _data()
+    path = str(tmp_path / 'para.npy')
+    np.save(path, para)
+    cache = BinningCache()
+    kwargs = dict(nbins=21, XRANGE=[-3., 3.])
+
+    counts = cache.compute(compute_hist, dict(para=path), kwargs)[0]
+    assert np.array_equal(cache.compute(compute_hist, dict(para=path), kwargs)[0], counts)
+    assert cache.stats['hits'] == 1
+
+    # same size, new content and modification time
+    np.save(path, 2. * para)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    counts_new = cache.compute(compute_hist, dict(para=path), kwargs)[0]
+    assert cache.stats['misses'] == 2
+    assert np.array_equal(counts_new, compute_hist(2. * para, **kwargs)[0])
+
+
+def test_eviction_at_max_bytes():
+
+    para, _ = _data()
+    kwargs = dict(nbins=101, XRANGE=[-3., 3.])
+    # (counts, edges): 100 int64 and 101 float64
+    nbytes = 100 * 8 + 101 * 8
+    cache = BinningCache(max_bytes=3 * nbytes)
+
+    paras = [para + i_para for i_para in range(5)]
+    for para_tmp in paras:
+        cache.compute(compute_hist, dict(para=para_tmp), kwargs)
+    assert cache.stats['entries'] == 3
+    assert cache.stats['nbytes'] == 3 * nbytes
+
+    # the least recently used ones are dropped
+    cache.compute(compute_hist, dict(para=paras[0]), kwargs)
+    assert cache.stats['hits'] == 0
+    cache.compute(compute_hist, dict(para=paras[4]), kwargs)
+    assert cache.stats['hits'] == 1
+
+
+def test_disk_store(tmp_path):
+
+    para, wg = _data()
+    kwargs = dict(nbins=21, XRANGE=[-3., 3.])
+    res = BinningCache(cache_dir=str(tmp_path)).compute(compute_hist, dict(para=para, wg=wg), kwargs)
+
+    cache = BinningCache(cache_dir=str(tmp_path))
+    res_disk = cache.compute(compute_hist, dict(para=para, wg=wg), kwargs)
+    assert cache.stats['disk_hits'] == 1
+    for arr, arr_disk in zip(res, res_disk):
+        assert np.array_equal(arr, arr_disk)
+
+    cache.clear(disk=True)
+    assert not any(file.endswith('.npz') for file in os.listdir(tmp_path))
+
+
+def test_disk_store_from_older_version(tmp_path, monkeypatch):
+
+    para, _ = _data()
+    kwargs = dict(nbins=21, XRANGE=[-3., 3.])
+    BinningCache(cache_dir=str(tmp_path)).compute(compute_hist, dict(para=para), kwargs)
+
+    monkeypatch.setattr('plotting.Cache.CACHE_VERSION', 2)
+    cache = BinningCache(cache_dir=str(tmp_path))
+    cache.compute(compute_hist, dict(para=para), kwargs)
+    assert cache.stats['disk_hits'] == 0
+    assert cache.stats['misses'] == 1
+
+
+def test_strided_input_hashed_by_block():
+
+    para = np.random.default_rng(0).normal(0., 1., (4000, 1000))
+    records = np.zeros(1001, dtype=[('a', np.float64), ('b', np.int32)])
+    records['a'] = np.arange(1001.)
+
+    # same hash as a contiguous copy
+    for strided in [para[:, ::2], para.T, para[::3], np.asfortranarray(para), records[::2], records['b']]:
+        assert _content_hash(strided) == _content_hash(strided.copy())
+    records_changed = records.copy()
+    records_changed['b'][-1] = 1
+    assert _content_hash(records_changed) != _content_hash(records)
+
+    # without copying the whole input
+    strided = para[:, ::2]
+    tracemalloc.start()
+    try:
+        _content_hash(strided)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < strided.nbytes / 4
@@ -0,0 +1,177 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+
+from plotting import HistPlotFunc, LinePlotFunc, HistErrorPlotFunc
+from plotting.CommonInternal import _prebinned_hist_inputs, _error_array, _element_count, _rasterize_dense
+
+
+def _data(n=5000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.uniform(0.5, 1.5, n)
+
+
+def test_prebinned_inputs_one_parameter(tmp_path):
+
+    para, wg = _data()
+    counts_ref, edges_ref = np.histogram(para, bins=np.linspace(-3., 3., 11), weights=wg)
+    path = str(tmp_path / 'para.npy')
+    np.save(path, para)
+
+    for single in [para, list(para), path]:
+        x, counts, edges = _prebinned_hist_inputs(single, wg, 11, [-3., 3.])
+        assert np.allclose(counts, counts_ref)
+        assert np.allclose(edges, edges_ref)
+        assert np.allclose(x, edges_ref[:-1])
+
+
+def test_prebinned_inputs_list_of_parameters(tmp_path):
+
+    para, wg = _data()
+    table = np.empty(len(para), dtype=[('a', np.float64), ('b', np.float64)])
+    table['a'], table['b'] = para, 2. * para
+    path = str(tmp_path / 'table.npy')
+    np.save(path, table)
+    paths = [str(tmp_path / 'a.npy'), str(tmp_path / 'b.npy')]
+    np.save(paths[0], para)
+    np.save(paths[1], 2. * para)
+    bins = np.linspace(-3., 3., 11)
+
+    # one file column is one parameter
+    x, counts, edges = _prebinned_hist_inputs((path, 'b'), None, 11, [-3., 3.])
+    assert np.allclose(counts, np.histogram(2. * para, bins=bins)[0])
+
+    # lists of files and of file columns are lists of parameters
+    for paras in [paths, [(path, 'a'), (path, 'b')], (para, 2. * para)]:
+        x, counts_list, edges = _prebinned_hist_inputs(paras, [wg, wg], 11, [-3., 3.])
+        assert len(counts_list) == 2
+        assert np.allclose(counts_list[0], np.histogram(para, bins=bins, weights=wg)[0])
+        assert np.allclose(counts_list[1], np.histogram(2. * para, bins=bins, weights=wg)[0])
+
+
+def test_prebinned_inputs_2d_array_columns():
+
+    para, wg = _data()
+    paras = np.column_stack([para, 2. * para])
+    wgs = np.column_stack([wg, wg**2])
+    bins = np.linspace(-3., 3., 11)
+
+    # one parameter per column, as matplotlib hist
+    x, counts_list, edges = _prebinned_hist_inputs(paras, wgs, 11, [-3., 3.])
+    assert len(counts_list) == 2
+    for i_col in range(2):
+        assert np.allclose(counts_list[i_col], np.histogram(paras[:, i_col], bins=bins, weights=wgs[:, i_col])[0])
+
+
+@pytest.mark.parametrize('hist_errors', [None, 'bar'])
+def test_hist_error_2d_array_matches_hist(hist_errors):
+
+    rng = np.random.default_rng(0)
+    paras = 10**rng.normal(0., 1., (1000, 2))
+    x = np.linspace(0.1, 10., 5)
+    res = HistErrorPlotFunc(None, paras, None, ['r', 'b'], [x], [x], ['k'], nbins_hist=21, XRANGE=[0.01, 100.],
+                            xlog=True, hist_errors=hist_errors)
+    fig = res[0] if hist_errors is not None else res
+
+    ax_ref = Figure().subplots()
+    ax_ref.hist(paras, bins=np.logspace(-2., 2., 21), histtype='step')
+    patches = [patch for ax in fig.axes for patch in ax.patches]
+    assert len(patches) == len(ax_ref.patches) == 2
+    for patch, patch_ref in zip(patches, ax_ref.patches):
+        assert np.allclose(patch.get_xy(), patch_ref.get_xy())
+
+
+def _render(outpath, i_fig):
+
+    x = np.linspace(0.1, 10., 50)
+    if i_fig % 2:
+        para, wg = _data(seed=i_fig)
+        HistPlotFunc(outpath, [para], [wg], ['r'], ['a'], 30, [-4., 4.], XLABEL='x', font_size=10 + i_fig % 3, dpi=72)
+    else:
+        LinePlotFunc(outpath, [x, x], [np.sin(x + i_fig), np.cos(x)], ['r', 'b'], LABELs=['a', 'b'],
+                    XLABEL='x', YLABEL='y', xlog=(i_fig % 4 == 0), font_size=10 + i_fig % 3, dpi=72)
+
+
+def test_threaded_renders_match_serial(tmp_path):
+
+    N_figs = 12
+    for i_fig in range(N_figs):
+        _render(str(tmp_path / f'serial_{i_fig}.png'), i_fig)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda i_fig: _render(str(tmp_path / f'threaded_{i_fig}.png'), i_fig), range(N_figs)))
+
+    for i_fig in range(N_figs):
+        assert np.array_equal(imread(tmp_path / f'serial_{i_fig}.png'), imread(tmp_path / f'threaded_{i_fig}.png'))
+
+
+def test_rasterize_dense_thresholds(tmp_path):
+
+    para, _ = _data()
+    fig = Figure()
+    ax = fig.subplots()
+    line = ax.plot(np.arange(1000.), para[:1000])[0]
+    points = ax.scatter(para[:50], para[50:100])
+    patch = ax.hist(para, bins=20, histtype='step')[2][0]
+    assert _element_count(line) == 1000
+    assert _element_count(points) == 50
+
+    _rasterize_dense(fig, None)
+    assert not any(artist.get_rasterized() for artist in [line, points, patch])
+    _rasterize_dense(fig, 100)
+    assert line.get_rasterized()
+    assert not points.get_rasterized()
+    assert not patch.get_rasterized()
+    _rasterize_dense(fig, 0)
+    assert all(artist.get_rasterized() for artist in [line, points, patch])
+
+    # the dense line is embedded as an image in vector outputs
+    x = np.arange(1000.)
+    for threshold, has_image in [(None, False), (100, True)]:
+        outpath = str(tmp_path / f'line_{threshold}.pdf')
+        LinePlotFunc(outpath, [x], [para[:1000]], ['r'], rasterize_threshold=threshold, dpi=72)
+        with open(outpath, 'rb') as f:
+            assert (b'/Subtype /Image' in f.read()) == has_image
+
+
+def test_error_array_layouts():
+
+    xvals = np.arange(5.)
+    lower, upper = np.full(5, 0.1), np.full(5, 0.2)
+    both = np.vstack([lower, upper])
+
+    assert _error_array(None, xvals) is None
+    assert _error_array(0.1, xvals) == 0.1
+    assert np.array_equal(_error_array(lower, xvals), lower)
+    assert np.array_equal(_error_array((lower, upper), xvals), both)
+    # (lower, upper) of all the points
+    assert np.array_equal(_error_array([0.1, 0.2], xvals), [[0.1], [0.2]])
+    assert np.array_equal(_error_array(np.array([[0.1], [0.2]]), xvals), [[0.1], [0.2]])
+    # 2xN and (N, 2) arrays are used without copying
+    assert np.shares_memory(_error_array(both, xvals), both)
+    assert np.shares_memory(_error_array(both.T, xvals), both)
+    assert np.array_equal(_error_array(both.T, xvals), both)
+    # records with two fields
+    records = np.empty(5, dtype=[('lower', np.float64), ('upper', np.float64)])
+    records['lower'], records['upper'] = lower, upper
+    assert np.array_equal(_error_array(records, xvals), both)
+    assert np.shares_memory(_error_array(records, xvals), records)
+    # a single point
+    assert np.array_equal(_error_array([0.1, 0.2], 1.), [[0.1], [0.2]])
+
+
+def test_error_array_unsupported():
+
+    xvals = np.arange(5.)
+    with pytest.raises(Exception, match='Unsupported shape'):
+        _error_array(np.ones(4), xvals)
+    with pytest.raises(Exception, match='Unsupported shape'):
+        _error_array(np.ones((3, 5)), xvals)
+    records = np.zeros(5, dtype=[('a', np.float64), ('b', np.float64), ('c', np.float64)])
+    with pytest.raises(Exception, match='two fields'):
+        _error_array(records, xvals)
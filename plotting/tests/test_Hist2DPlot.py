@@ -0,0 +1,37 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+
+from plotting import Hist2DPlotFunc_subplots
+
+
+def _data(n=20000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.normal(0., 2., n), rng.uniform(0.5, 1.5, n)
+
+
+def test_subplots_bin_edges():
+
+    x_val, y_val, wg = _data()
+    xedges = np.array([-3., -1., 0., 0.5, 3.])
+    yedges = np.array([-4., 0., 1., 4.])
+    fig = Hist2DPlotFunc_subplots(None, 2, [x_val, x_val], [y_val, y_val], [wg, wg],
+                                [20, [xedges, yedges]], XRANGE=[-3., 3.], YRANGE=[-4., 4.])
+
+    counts_uniform = np.histogram2d(x_val, y_val, bins=20, range=[[-3., 3.], [-4., 4.]], weights=wg)[0]
+    counts_edges = np.histogram2d(x_val, y_val, bins=[xedges, yedges], weights=wg)[0]
+    meshes = [ax.collections[0] for ax in fig.axes if ax.collections]
+    assert np.allclose(meshes[0].get_array().reshape(20, 20).T, counts_uniform)
+    assert np.allclose(meshes[1].get_array().reshape(3, 4).T, counts_edges)
+
+
+def test_subplots_bin_edges_need_arrays(tmp_path):
+
+    x_val, y_val, _ = _data()
+    path = str(tmp_path / 'x.npy')
+    np.save(path, x_val)
+    with pytest.raises(Exception, match='in-memory arrays'):
+        Hist2DPlotFunc_subplots(None, 1, [path], [y_val], None, [[np.linspace(-3, 3, 5)]*2],
+                                XRANGE=[-3., 3.], YRANGE=[-4., 4.])
@@ -0,0 +1,77 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from plotting import HistPlotFunc, HistPlotFunc_subplots, HistErrorPlotFunc, AsyncWriter
+from plotting.Binning import compute_hist
+
+
+def _data(n=20000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.uniform(0.5, 1.5, n)
+
+
+def test_quantile_bins_without_xrange():
+
+    para, wg = _data()
+    fig = HistPlotFunc(None, [para], [wg], ['r'], ['a'], 11, None, bins='quantile')
+
+    ax = fig.axes[0]
+    assert np.allclose(ax.get_xlim(), [para.min(), para.max()])
+
+
+def test_subplots_batch_binning_mixed_bins():
+
+    para, wg = _data()
+    edges = np.array([-3., -1., 0., 0.5, 1., 3.])
+    fig = HistPlotFunc_subplots(None, 3, [[para], [para], [para]], [[wg], [wg], [wg]], [['r']]*3, [['a']]*3,
+                        [20, edges, edges], [-4., 4.], XRANGE_list=[[-4., 4.], [-3., 3.], None],
+                        shareX=False, shareY=False, batch_binning=True)
+
+    # first panel binned in the batch
+    # nbins is the number of edges
+    counts_ref = np.histogram(para, bins=np.linspace(-4., 4., 20), weights=wg)[0]
+    assert np.allclose(fig.axes[0].patches[0].get_data().values, counts_ref)
+    # explicit edges and no range: binned one by one
+    assert len(fig.axes[1].patches) == 1
+    assert len(fig.axes[2].patches) == 1
+
+
+def test_subplots_prebinned_with_sumw2():
+
+    para, wg = _data()
+    hist = compute_hist(para, 21, [-4., 4.], wg=wg, sumw2=True)
+    fig = HistPlotFunc_subplots(None, 2, [[hist[0::2]], [hist]], None, [['r']]*2, [['a']]*2,
+                        [21, 21], [-4., 4.], prebinned=True)
+
+    for ax in fig.axes[:2]:
+        assert np.allclose(ax.patches[0].get_data().values, hist[0])
+
+
+def test_hist_errors_returns_figure_and_hists():
+
+    para, wg = _data()
+    fig, hists = HistPlotFunc(None, [para, para[::2]], [wg, wg[::2]], ['r', 'b'], ['a', 'b'], 21, [-4., 4.],
+                            hist_errors='bar')
+
+    assert isinstance(fig, Figure)
+    bins = np.linspace(-4., 4., 21)
+    for (counts, sumw2, edges), (para_tmp, wg_tmp) in zip(hists, [(para, wg), (para[::2], wg[::2])]):
+        assert np.allclose(edges, bins)
+        assert np.allclose(counts, np.histogram(para_tmp, bins=bins, weights=wg_tmp)[0])
+        assert np.allclose(sumw2, np.histogram(para_tmp, bins=bins, weights=wg_tmp**2)[0])
+
+
+def test_hist_errors_returns_future_with_writer(tmp_path):
+
+    para, wg = _data()
+    with AsyncWriter() as writer:
+        future, hists = HistErrorPlotFunc(str(tmp_path / 'hist.png'), [para], [wg], ['r'],
+                            [np.arange(3.)], [np.ones(3)], ['k'], nbins_hist=20, XRANGE=[-4., 4.],
+                            hist_errors='band', writer=writer)
+        future.result()
+
+    assert (tmp_path / 'hist.png').exists()
+    assert len(hists) == 1
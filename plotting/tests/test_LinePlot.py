@@ -0,0 +1,62 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+
+from plotting import ScatterPlotFunc
+from plotting.Binning import compute_binned_stat2d, _decimate_index
+
+
+def _data(n=20000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.normal(0., 1., n)
+
+
+@pytest.mark.parametrize('aggregate', ['count', 'mean', 'median'])
+@pytest.mark.parametrize('xlog', [False, True])
+def test_scatter_aggregate(aggregate, xlog):
+
+    xval, yval = _data()
+    cval = xval * yval
+    XRANGE, YRANGE = [-3., 3.], [-3., 3.]
+    if xlog:
+        xval, XRANGE = 10**xval, [1e-3, 1e3]
+    fig = ScatterPlotFunc(None, xval, yval, cval=cval, XRANGE=XRANGE, YRANGE=YRANGE, xlog=xlog,
+                        aggregate=aggregate, aggregate_bins=[30, 20])
+
+    grid, xedges, yedges = compute_binned_stat2d(xval, yval, [30, 20], XRANGE, YRANGE,
+                                cval=(cval if aggregate != 'count' else None), statistic=aggregate, xlog=xlog)
+    ax = fig.axes[0]
+    # a mesh on logarithmic axes, otherwise an image
+    if xlog:
+        assert len(ax.images) == 0
+        drawn = ax.collections[0].get_array()
+    else:
+        assert len(ax.collections) == 0
+        drawn = ax.images[0].get_array()
+        assert np.allclose(ax.images[0].get_extent(), [xedges[0], xedges[-1], yedges[0], yedges[-1]])
+    assert np.allclose(np.ma.filled(drawn, np.nan).ravel(), grid.T.ravel(), equal_nan=True)
+    # the colour bar
+    assert len(fig.axes) == 2
+
+
+def test_scatter_decimate_keeps_per_point_properties():
+
+    xval, yval = _data()
+    cval = np.arange(len(xval), dtype=float)
+    POINTS = 1. + np.arange(len(xval)) % 7
+    alpha = np.linspace(0.1, 1., len(xval))
+    XRANGE, YRANGE = [-3., 3.], [-3., 3.]
+    fig = ScatterPlotFunc(None, xval, yval, POINTS=POINTS, alpha=alpha, cval=cval, XRANGE=XRANGE, YRANGE=YRANGE,
+                        FIGSIZE=[2., 1.5], dpi=20, decimate=True)
+
+    # one cell per pixel of the figure, the last point of each cell is drawn
+    keep = _decimate_index(xval, yval, [40, 30], XRANGE, YRANGE)
+    assert np.all(np.diff(keep) > 0)
+    assert 0 < len(keep) < len(xval)
+    sc = fig.axes[0].collections[0]
+    assert np.allclose(sc.get_offsets(), np.column_stack([xval[keep], yval[keep]]))
+    assert np.array_equal(sc.get_array(), cval[keep])
+    assert np.array_equal(sc.get_sizes(), POINTS[keep])
+    assert np.array_equal(sc.get_alpha(), alpha[keep])
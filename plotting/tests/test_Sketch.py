@@ -0,0 +1,90 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+
+from plotting import QuantileSketch, compute_sketch
+
+QUANTILES = [0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999]
+
+
+def _within_accuracy(values, quantiles, q, relative_accuracy):
+    """
+    Sketch quantiles are within relative_accuracy of a value between the neighbouring exact quantiles
+        (ranks are only resolved to one value)
+    """
+
+    n = len(values)
+    sorted_values = np.sort(values)
+    lower = sorted_values[np.clip(np.floor(np.asarray(q) * n).astype(int) - 1, 0, n-1)]
+    upper = sorted_values[np.clip(np.ceil(np.asarray(q) * n).astype(int), 0, n-1)]
+    tol = relative_accuracy * np.maximum(np.abs(lower), np.abs(upper))
+
+    return np.all((quantiles >= lower - tol) & (quantiles <= upper + tol))
+
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.005])
+def test_quantile(relative_accuracy):
+
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(0., 1., 50000), rng.lognormal(1., 1., 50000), np.zeros(10)])
+    sketch = QuantileSketch(relative_accuracy=relative_accuracy).update(values)
+
+    assert sketch.count == len(values)
+    assert _within_accuracy(values, sketch.quantile(QUANTILES), QUANTILES, relative_accuracy)
+    assert sketch.quantile(0.) == values.min()
+    assert sketch.quantile(1.) == values.max()
+    assert np.isclose(sketch.quantile(0.5), np.quantile(values, 0.5), rtol=2*relative_accuracy, atol=1e-3)
+
+
+def test_merge():
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(10., 3., 100000)
+    values[::1000] = np.nan
+    whole = QuantileSketch().update(values)
+    merged = QuantileSketch()
+    for i_start in range(0, len(values), 7777):
+        merged.merge(QuantileSketch().update(values[i_start:i_start+7777]))
+
+    assert merged.count == whole.count
+    assert np.array_equal(merged.quantile(QUANTILES), whole.quantile(QUANTILES))
+    assert _within_accuracy(values[~np.isnan(values)], merged.quantile(QUANTILES), QUANTILES, 0.005)
+
+    with pytest.raises(Exception, match='same relative_accuracy'):
+        merged.merge(QuantileSketch(relative_accuracy=0.01))
+
+
+def test_weighted_quantile():
+
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1., 2., 20000)
+    # integer weights are the same as repeated values
+    weights = rng.integers(1, 4, len(values))
+    sketch = QuantileSketch().update(values, weights=weights)
+
+    assert _within_accuracy(np.repeat(values, weights), sketch.quantile(QUANTILES), QUANTILES, 0.005)
+
+
+def test_edges():
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(0., 1., 100000) + 5.
+    sketch = compute_sketch(values, chunk_size=10000)
+
+    edges = sketch.edges(11)
+    assert len(edges) == 11
+    assert (edges[0] == values.min()) and (edges[-1] == values.max())
+    assert _within_accuracy(values, edges[1:-1], np.linspace(0., 1., 11)[1:-1], 0.005)
+
+    # only the values within XRANGE are split
+    edges = sketch.edges(6, XRANGE=[4., 6.])
+    assert (edges[0] == 4.) and (edges[-1] == 6.)
+    inside = values[(values >= 4.) & (values <= 6.)]
+    assert _within_accuracy(inside, edges[1:-1], np.linspace(0., 1., 6)[1:-1], 0.005)
+
+
+def test_empty_sketch():
+
+    with pytest.raises(Exception, match='Empty sketch'):
+        QuantileSketch().update([np.nan]).quantile(0.5)
@@ -0,0 +1,77 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from plotting import HistPlotFunc, LinePlotFunc, RenderStats
+from plotting import add_render_callback, remove_render_callback, record_render_stats
+from plotting.Stats import PHASES
+
+
+def _data(n=20000, seed=0):
+
+    rng = np.random.default_rng(seed)
+    return rng.normal(0., 1., n), rng.uniform(0.5, 1.5, n)
+
+
+def test_record_render_stats(tmp_path):
+
+    para, wg = _data()
+    outpath = str(tmp_path / 'hist.png')
+    with record_render_stats() as stats:
+        HistPlotFunc(outpath, [para], [wg], ['r'], ['a'], 30, [-4., 4.], dpi=72)
+    # other threads are not recorded
+    thread = threading.Thread(target=LinePlotFunc, args=(None, [para[:10]], [wg[:10]], ['r']))
+    with record_render_stats() as stats_other:
+        thread.start()
+        thread.join()
+
+    assert len(stats) == 1
+    assert len(stats_other) == 0
+    res = stats[0]
+    assert isinstance(res, RenderStats)
+    assert (res.func, res.outpath) == ('HistPlotFunc', outpath)
+    for phase in ['prepare', 'artists', 'draw', 'encode']:
+        assert res.wall[phase] > 0
+    assert np.isclose(res.wall_total, sum(res.wall.values()))
+    assert res.n_artists >= 1
+    assert res.output_bytes == os.path.getsize(outpath)
+
+    flat = res.as_dict()
+    assert flat['func'] == 'HistPlotFunc'
+    assert set(f'wall_{phase}' for phase in PHASES) <= set(flat)
+    assert set(f'cpu_{phase}' for phase in PHASES) <= set(flat)
+    assert flat['output_bytes'] == res.output_bytes
+
+
+def test_callbacks(caplog):
+
+    x = np.linspace(0., 1., 10)
+    calls = []
+
+    def _failing(stats):
+        raise RuntimeError('callback error')
+
+    add_render_callback(calls.append)
+    add_render_callback(_failing)
+    try:
+        # a failing callback is logged, the render still returns
+        fig = LinePlotFunc(None, [x], [x], ['r'])
+        assert fig is not None
+        assert 'Render callback failed' in caplog.text
+        # failed renders are reported too
+        with pytest.raises(Exception):
+            LinePlotFunc(None, [x], [x[:5]], ['r'])
+    finally:
+        remove_render_callback(calls.append)
+        remove_render_callback(_failing)
+
+    assert [stats.func for stats in calls] == ['LinePlotFunc', 'LinePlotFunc']
+    assert calls[0].outpath is None
+    assert calls[0].output_bytes is None
+
+    LinePlotFunc(None, [x], [x], ['r'])
+    assert len(calls) == 2
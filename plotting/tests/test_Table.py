@@ -0,0 +1,84 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+
+from plotting import HistPlotFunc
+from plotting.Table import table_series, plot_table
+
+
+def _table(n=100, seed=0):
+
+    rng = np.random.default_rng(seed)
+    table = np.empty(n, dtype=[('x', np.float64), ('y', np.float64), ('low', np.float64), ('high', np.float64),
+                                ('group', np.int64)])
+    table['x'] = rng.normal(size=n)
+    table['y'] = rng.normal(size=n)
+    table['low'] = rng.uniform(size=n)
+    table['high'] = rng.uniform(size=n)
+    table['group'] = rng.integers(0, 3, n)
+    return table
+
+
+def test_empty_table():
+
+    table = _table(0)
+
+    keys, series = table_series(table, {'paras': 'x', 'wgs': None}, by='group')
+    assert keys == []
+    assert series == {'paras': [], 'wgs': []}
+
+    with pytest.raises(Exception, match='No rows'):
+        table_series(table, {'paras': 'x'}, by='group', groups=[1])
+
+
+def test_grouped_series():
+
+    table = _table()
+    keys, series = table_series(table, {'paras': 'x', 'wgs': None, 'yerrs': ('low', 'high')}, by='group')
+
+    assert keys == [0, 1, 2]
+    for key, para, err in zip(keys, series['paras'], series['yerrs']):
+        rows = table[table['group'] == key]
+        assert np.array_equal(para, rows['x'])
+        assert np.array_equal(err['low'], rows['low'])
+        assert np.array_equal(err['high'], rows['high'])
+    assert series['wgs'] == [None] * 3
+
+
+def test_sorted_rows_are_views():
+
+    table = np.sort(_table(), order='group', kind='stable')
+    keys, series = table_series(table, {'paras': ['x', 'y']}, by='group', groups=[2, 0])
+
+    assert keys == [2, 0]
+    # the series of each column in turn
+    for para, (name, key) in zip(series['paras'], [('x', 2), ('x', 0), ('y', 2), ('y', 0)]):
+        assert np.array_equal(para, table[name][table['group'] == key])
+        assert np.shares_memory(para, table)
+
+
+def test_dict_table_and_subplots():
+
+    table = _table()
+    columns = {name: table[name] for name in table.dtype.names}
+    keys, series = table_series(columns, {'paras_list': ['x', ['x', 'y']], 'xval': 'x'})
+
+    assert keys is None
+    assert np.array_equal(series['xval'], table['x'])
+    assert len(series['paras_list'][0]) == 1
+    assert np.array_equal(series['paras_list'][1][1], table['y'])
+
+    with pytest.raises(Exception, match='cannot be grouped'):
+        table_series(columns, {'xval': 'x'}, by='group')
+
+
+def test_plot_table_without_weights(caplog):
+
+    table = _table()
+    fig = plot_table(HistPlotFunc, None, table, {'paras': 'x'}, by='group', nbins=11, XRANGE=[-3., 3.], DENSITY=True)
+
+    assert len(fig.axes[0].patches) == 3
+    assert [text.get_text() for text in fig.axes[0].get_legend().get_texts()] == ['0', '1', '2']
+    # no weights, so no warning about DENSITY with weights
+    assert 'DENSITY and wgs' not in caplog.text
@@ -0,0 +1,69 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+from matplotlib.image import imread
+
+from plotting import FigureTemplate, LinePlotFunc, LinePlotFunc_subplots, ErrorPlotFunc, HistPlotFunc
+from plotting.Binning import compute_hist
+
+# fixed ranges, so that the template and the direct renders share the axes
+STYLE = dict(XRANGE=[0., 10.], YRANGE=[-2., 2.], dpi=72)
+
+
+def _same_image(path1, path2):
+
+    return np.array_equal(imread(path1), imread(path2))
+
+
+def test_line_round_trip(tmp_path):
+
+    x = np.linspace(0., 10., 50)
+    with FigureTemplate(LinePlotFunc, [x, x], [np.sin(x), np.cos(x)], ['r', 'b'], LABELs=['a', 'b'], **STYLE) as template:
+        for i_fig in range(2):
+            yvals = [np.sin(x + i_fig + 1.), 0.5 * np.cos(x)]
+            template.render(str(tmp_path / f'template_{i_fig}.png'), xvals=[x, x], yvals=yvals)
+            LinePlotFunc(str(tmp_path / f'direct_{i_fig}.png'), [x, x], yvals, ['r', 'b'], LABELs=['a', 'b'], **STYLE)
+            assert _same_image(tmp_path / f'template_{i_fig}.png', tmp_path / f'direct_{i_fig}.png')
+
+
+def test_error_round_trip(tmp_path):
+
+    x = np.linspace(0., 10., 50)
+    yerrs = [(0.1 * np.ones(50), 0.2 * np.ones(50))]
+    with FigureTemplate(ErrorPlotFunc, [x], [np.sin(x)], [0.1 * np.ones(50)], ['r'], **STYLE) as template:
+        template.render(str(tmp_path / 'template.png'), xvals=[x], yvals=[np.cos(x)], yerrs=yerrs)
+    ErrorPlotFunc(str(tmp_path / 'direct.png'), [x], [np.cos(x)], yerrs, ['r'], **STYLE)
+
+    assert _same_image(tmp_path / 'template.png', tmp_path / 'direct.png')
+
+
+def test_hist_round_trip(tmp_path):
+
+    rng = np.random.default_rng(0)
+    para = rng.normal(0.5, 1., 5000)
+    style = dict(YRANGE=[0., 1000.], dpi=72)
+    with FigureTemplate(HistPlotFunc, [rng.normal(size=5000)], [None], ['r'], ['a'], 21, [-3., 3.], **style) as template:
+        template.render(str(tmp_path / 'template.png'), paras=[para], wgs=[None])
+        # the template keeps the bins of the first call
+        with pytest.raises(Exception, match='series'):
+            template.render(str(tmp_path / 'wrong.png'), paras=[para, para], wgs=[None, None])
+    # the template draws step patches, as the prebinned histograms
+    HistPlotFunc(str(tmp_path / 'direct.png'), [compute_hist(para, 21, [-3., 3.])], None, ['r'], ['a'], 21, [-3., 3.],
+                prebinned=True, **style)
+
+    assert _same_image(tmp_path / 'template.png', tmp_path / 'direct.png')
+
+
+def test_unsupported_arguments():
+
+    x = np.linspace(0., 10., 50)
+    with pytest.raises(Exception, match='decimate is not supported'):
+        FigureTemplate(LinePlotFunc, [x], [np.sin(x)], ['r'], LINEs=['none'], decimate=True, **STYLE)
+    with pytest.raises(Exception, match='downsample is not supported'):
+        FigureTemplate(LinePlotFunc_subplots, 1, [[x]], [[np.sin(x)]], [['r']], downsample='minmax', **STYLE)
+    with pytest.raises(Exception, match='hist_errors is not supported'):
+        FigureTemplate(HistPlotFunc, [x], None, ['r'], ['a'], 11, [0., 10.], hist_errors='bar')
+
+    # default values are accepted
+    FigureTemplate(LinePlotFunc, [x], [np.sin(x)], ['r'], decimate=False, downsample=None, **STYLE).close()
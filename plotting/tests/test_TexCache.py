@@ -0,0 +1,46 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import pytest
+from matplotlib.texmanager import TexManager
+
+from plotting import TexCache
+from plotting.CommonInternal import _figure_context
+
+
+@pytest.fixture
+def tex_manager(monkeypatch):
+    """
+    TexManager and the cache state restored after the test
+    """
+
+    monkeypatch.setattr(TexCache, '_tex_metrics_enabled', False)
+    monkeypatch.setattr(TexManager, 'get_text_width_height_descent', TexManager.get_text_width_height_descent)
+    monkeypatch.setattr(TexManager, '_cache_dir', TexManager._cache_dir)
+    return TexManager.__dict__['get_text_width_height_descent']
+
+
+def test_usetex_alone_keeps_matplotlib(tex_manager):
+
+    with _figure_context(usetex=True):
+        pass
+
+    assert TexManager.__dict__['get_text_width_height_descent'] is tex_manager
+
+
+def test_set_tex_cache_dir(tex_manager, tmp_path):
+
+    previous = TexCache.set_tex_cache_dir(tmp_path / 'tex')
+
+    assert previous is not None
+    assert TexManager._cache_dir == tmp_path / 'tex'
+    assert TexManager.__dict__['get_text_width_height_descent'] is not tex_manager
+
+
+def test_unsupported_matplotlib(tex_manager, tmp_path, monkeypatch, caplog):
+
+    monkeypatch.delattr(TexManager, '_cache_dir')
+
+    assert TexCache.set_tex_cache_dir(tmp_path / 'tex') is None
+    assert TexCache.warm_tex_cache(['$x$']) == 0
+    assert 'not supported' in caplog.text
+    assert TexManager.__dict__['get_text_width_height_descent'] is tex_manager
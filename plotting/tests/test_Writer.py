@@ -0,0 +1,100 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import os
+import sys
+import subprocess
+import threading
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+import plotting
+from plotting import AsyncWriter
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def _figure():
+
+    # size in pixels not an integer at the dpi used below
+    fig = Figure(figsize=(3.33, 2.21))
+    ax = fig.add_subplot()
+    ax.plot([0., 1., 2.], [3., 1., 2.])
+    return fig
+
+
+@pytest.mark.parametrize('ext', ['png', 'jpg', 'tif', 'tiff'])
+def test_raster_size_and_format(tmp_path, ext):
+
+    fig = _figure()
+    with AsyncWriter() as writer:
+        future = writer.submit(fig, str(tmp_path / f'async.{ext}'), dpi=97)
+    fig.savefig(tmp_path / f'ref.{ext}', dpi=97)
+
+    assert future.result() == str(tmp_path / f'async.{ext}')
+    assert Image.open(tmp_path / f'async.{ext}').size == Image.open(tmp_path / f'ref.{ext}').size
+    if ext == 'png':
+        assert np.array_equal(np.asarray(Image.open(tmp_path / 'async.png')),
+                            np.asarray(Image.open(tmp_path / 'ref.png')))
+
+
+def test_tight_bbox(tmp_path):
+
+    fig = _figure()
+    with AsyncWriter() as writer:
+        writer.submit(fig, str(tmp_path / 'async.png'), dpi=97, bbox_inches='tight')
+    fig.savefig(tmp_path / 'ref.png', dpi=97, bbox_inches='tight')
+
+    assert Image.open(tmp_path / 'async.png').size == Image.open(tmp_path / 'ref.png').size
+
+
+def test_written_at_exit(tmp_path):
+
+    script = f'''
+from matplotlib.figure import Figure
+from plotting import AsyncWriter
+writer = AsyncWriter()
+for i_fig in range(4):
+    fig = Figure()
+    fig.add_subplot().plot([0, 1], [0, i_fig])
+    writer.submit(fig, {str(tmp_path)!r} + f'/fig_{{i_fig}}.png')
+'''
+    # run from the directory of the package
+    subprocess.run([sys.executable, '-c', script], check=True,
+                    cwd=os.path.dirname(os.path.dirname(plotting.__file__)))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f'fig_{i_fig}.png' for i_fig in range(4)]
+
+
+def test_submit_while_closing(tmp_path):
+
+    writer = AsyncWriter(max_pending=2)
+    futures = []
+    refused = []
+    submitted = threading.Event()
+
+    def _submit(i_thread):
+        for i_fig in range(10):
+            try:
+                futures.append(writer.submit(_figure(), str(tmp_path / f'fig_{i_thread}_{i_fig}.png'), dpi=20))
+            except Exception as exc:
+                assert 'closed' in str(exc)
+                refused.append(i_fig)
+            if len(futures) >= 4:
+                submitted.set()
+
+    # closed while the threads are still submitting
+    threads = [threading.Thread(target=_submit, args=(i_thread,)) for i_thread in range(4)]
+    for thread in threads:
+        thread.start()
+    submitted.wait(timeout=60)
+    writer.close()
+    for thread in threads:
+        thread.join()
+
+    # every accepted figure is written by close, the others are refused
+    assert len(futures) + len(refused) == 40
+    assert all(future.done() for future in futures)
+    assert writer.pending == 0
+    assert len(list(tmp_path.iterdir())) == len(futures)